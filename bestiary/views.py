@@ -1,9 +1,11 @@
+from django.contrib.contenttypes.models import ContentType
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
-from django.db.models import Max
 from django.http import Http404
 from django.shortcuts import render, get_object_or_404, redirect
 from django.urls import reverse
+from django.utils.functional import SimpleLazyObject
 
+from data_log.models import LevelReport
 from .filters import MonsterFilter
 from .forms import FilterMonsterForm
 from .models import Monster, Dungeon, Level
@@ -175,7 +177,7 @@ def dungeon_detail(request, slug, difficulty=None, floor=None):
             lvl = levels.last()
 
             # Redirect to URL with floor if dungeon has more than 1 floor
-            if dung.level_set.count() > 1:
+            if len(dung.level_set.all()) > 1:
                 return redirect('bestiary:dungeon_detail', slug=dung.slug, floor=1)
 
     if not lvl:
@@ -185,14 +187,22 @@ def dungeon_detail(request, slug, difficulty=None, floor=None):
     if not lvl:
         raise Http404()
 
-    try:
-        report = lvl.logs.latest()
-    except lvl.logs.model.DoesNotExist:
-        report = None
+    report_id, report_content_type_id = LevelReport.get_latest_ids(lvl.pk)
+
+    def load_report():
+        try:
+            return LevelReport.objects.get(pk=report_id)
+        except LevelReport.DoesNotExist:
+            # Cached ID of a report which no longer exists
+            LevelReport.clear_latest_ids(lvl.pk)
+            return LevelReport.objects.filter(level=lvl).order_by('-generated_on').first()
+
+    # Report is loaded only when its rendered fragment is not already cached
+    report = SimpleLazyObject(load_report) if report_id else None
 
     floor_range = range(
         1,
-        dung.level_set.aggregate(Max('floor'))['floor__max'] + 1
+        max(level.floor for level in dung.level_set.all()) + 1
     )
 
     context = {
@@ -201,12 +211,13 @@ def dungeon_detail(request, slug, difficulty=None, floor=None):
         'floor_range': floor_range,
         'is_scenario': dung.category == Dungeon.CATEGORY_SCENARIO,
         'level': lvl,
-        'report': report
+        'report': report,
+        'report_id': report_id,
     }
 
     by_grade = dung.category in [Dungeon.CATEGORY_RIFT_OF_WORLDS_BEASTS, Dungeon.CATEGORY_WORLD_BOSS]
 
-    if by_grade and hasattr(report.content_type.model_class(), 'GRADE_CHOICES'):
+    if by_grade and report_content_type_id and hasattr(ContentType.objects.get_for_id(report_content_type_id).model_class(), 'GRADE_CHOICES'):
         return render(request, 'dungeons/detail/report_by_grade.html', context)
     else:
         return render(request, 'dungeons/detail/report.html', context)
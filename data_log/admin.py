@@ -273,3 +273,60 @@ class LevelReportAdmin(admin.ModelAdmin):
 
     def get_queryset(self, request):
         return super().get_queryset(request).select_related('level', 'level__dungeon')
+
+
+@admin.register(models.SummonReport)
+class SummonReportAdmin(admin.ModelAdmin):
+    list_display = ('item', 'generated_on', 'end_timestamp', 'log_count', 'unique_contributors')
+    readonly_fields = ('generated_on', 'item', 'last_log_id')
+    exclude = ('counters',)
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('item')
+
+
+@admin.register(models.MagicBoxReport)
+class MagicBoxReportAdmin(admin.ModelAdmin):
+    list_display = ('box_type', 'generated_on', 'log_count', 'unique_contributors')
+    list_filter = ('box_type',)
+    readonly_fields = ('generated_on',)
+
+
+@admin.register(models.CraftRuneReport)
+class CraftRuneReportAdmin(admin.ModelAdmin):
+    list_display = ('craft_level', 'generated_on', 'log_count', 'unique_contributors')
+    list_filter = ('craft_level',)
+    readonly_fields = ('generated_on',)
+
+
+@admin.register(models.ReportAudit)
+class ReportAuditAdmin(admin.ModelAdmin):
+    # Slowest reports first, to find the levels most in need of optimization
+    list_display = ('report_level', 'report_content_type', 'report_generated_on', 'duration', 'query_count', 'rows_scanned', 'report_log_count', 'slice_reason', 'slice_start')
+    list_filter = ('report__content_type', 'slice_reason')
+    ordering = ('-duration',)
+    readonly_fields = ('report', 'duration', 'query_count', 'rows_scanned', 'slice_start', 'slice_reason')
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related(
+            'report__content_type',
+            'report__levelreport__level__dungeon',
+        )
+
+    def report_level(self, obj):
+        return getattr(getattr(obj.report, 'levelreport', None), 'level', None)
+    report_level.short_description = 'Level'
+
+    def report_content_type(self, obj):
+        return obj.report.content_type
+    report_content_type.short_description = 'Log Type'
+
+    def report_generated_on(self, obj):
+        return obj.report.generated_on
+    report_generated_on.short_description = 'Generated On'
+    report_generated_on.admin_order_field = 'report__generated_on'
+
+    def report_log_count(self, obj):
+        return obj.report.log_count
+    report_log_count.short_description = 'Log Count'
+    report_log_count.admin_order_field = 'report__log_count'
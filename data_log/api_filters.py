@@ -0,0 +1,23 @@
+import django_filters.rest_framework as filters
+
+from bestiary.models import Dungeon
+from .models import LevelDropRate
+
+
+class LevelDropRateFilter(filters.FilterSet):
+    drop_type = filters.ChoiceFilter(choices=LevelDropRate.DROP_TYPE_CHOICES)
+    rune_type = filters.MultipleChoiceFilter(choices=LevelDropRate._meta.get_field('rune_type').choices)
+    rune_quality = filters.MultipleChoiceFilter(choices=LevelDropRate._meta.get_field('rune_quality').choices)
+    dungeon_category = filters.MultipleChoiceFilter(field_name='level__dungeon__category', choices=Dungeon.CATEGORY_CHOICES)
+
+    class Meta:
+        model = LevelDropRate
+        fields = {
+            'level': ['exact'],
+            'level__dungeon': ['exact'],
+            'log_grade': ['exact'],
+            'item': ['exact'],
+            'monster': ['exact'],
+            'grade': ['exact', 'gte', 'lte'],
+            'sample_size': ['gte'],
+        }
@@ -1,9 +1,11 @@
 from rest_framework import routers
 
-from . import views
+from . import api_views, views
 
 app_name = 'log_data'
 
 router = routers.SimpleRouter()
 router.register(r'data_logs', views.LogData, base_name='log-upload')
+router.register(r'dungeon-log-export', views.DungeonLogExport, base_name='dungeon-log-export')
+router.register(r'drop-rates', api_views.LevelDropRateViewSet, base_name='data_log/drop-rates')
 urlpatterns = router.urls
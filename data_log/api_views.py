@@ -0,0 +1,41 @@
+from django.db.models import F, Max, Sum
+from django_filters import rest_framework as filters
+from rest_framework import viewsets
+from rest_framework.decorators import action
+from rest_framework.filters import OrderingFilter
+from rest_framework_extensions.cache.mixins import CacheResponseMixin
+
+from bestiary.pagination import BestiarySetPagination
+from . import api_filters, models, serializers
+
+
+class LevelDropRateViewSet(CacheResponseMixin, viewsets.ReadOnlyModelViewSet):
+    """
+    Drop rates from the latest report of every level. Filter by drop and order by drops_per_energy to find
+    the level which drops it most efficiently.
+    """
+    queryset = models.LevelDropRate.objects.all().order_by(F('drops_per_energy').desc(nulls_last=True), 'pk')
+    serializer_class = serializers.LevelDropRateSerializer
+    pagination_class = BestiarySetPagination
+    filter_backends = (filters.DjangoFilterBackend, OrderingFilter)
+    filter_class = api_filters.LevelDropRateFilter
+    ordering_fields = (
+        'drop_chance',
+        'drops_per_run',
+        'drops_per_energy',
+        'sample_size',
+    )
+
+    @action(detail=False)
+    def totals(self, request):
+        # Matching drop rates summed per level, best first
+        queryset = self.filter_queryset(self.get_queryset()).order_by().values('level', 'log_grade').annotate(
+            drops_per_run=Sum('drops_per_run'),
+            drops_per_energy=Sum('drops_per_energy'),
+            energy_cost=Max('energy_cost'),
+            sample_size=Max('sample_size'),
+        ).order_by(F('drops_per_energy').desc(nulls_last=True), '-drops_per_run', 'level')
+
+        page = self.paginate_queryset(queryset)
+        serializer = serializers.LevelDropRateTotalSerializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class DataLogConfig(AppConfig):
     name = 'data_log'
+
+    def ready(self):
+        import data_log.signals #noqa
@@ -0,0 +1,159 @@
+import gzip
+from hashlib import sha256
+from queue import Full, Queue
+from threading import Thread
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import CharField, F, Func, Value
+from django.db.models.functions import Cast, Concat, Extract
+
+from . import models
+from .reports.generate import get_drop_querysets
+
+EXPORT_DATASETS = ('logs',) + tuple(get_drop_querysets(models.DungeonLog.objects.none()).keys())
+EXPORT_CHUNK_SIZE = 64 * 1024
+EXPORT_QUEUE_SIZE = 16  # Chunks buffered between the database and a slow client
+EXPORT_CLIENT_TIMEOUT = 60  # Seconds to wait for a client to accept more data before aborting the export
+
+
+def _contributor_salt():
+    # Derived from SECRET_KEY so the key itself never appears in the SQL
+    return sha256(f'data-log-export-{settings.SECRET_KEY}'.encode()).hexdigest()
+
+
+def get_export_queryset(dataset, level=None, start=None, end=None):
+    """
+    Anonymized values() queryset of completed dungeon logs, or of one type of drop from them.
+    Wizard IDs are replaced with a salted hash so contributions can be grouped but not identified.
+
+    :param dataset: 'logs' or a drop type from EXPORT_DATASETS
+    :param level: Optional Level or ID to export
+    :param start: Optional earliest timestamp
+    :param end: Optional latest timestamp
+    """
+    if dataset not in EXPORT_DATASETS:
+        raise ValueError(f'Unknown export dataset {dataset}')
+
+    logs = models.DungeonLog.objects.filter(success__isnull=False)
+    if level:
+        logs = logs.filter(level=level)
+    if start:
+        logs = logs.filter(timestamp__gte=start)
+    if end:
+        logs = logs.filter(timestamp__lte=end)
+
+    if dataset == 'logs':
+        return logs.order_by('pk').values(
+            'id',
+            'timestamp',
+            'server',
+            'level_id',
+            'success',
+            clear_time_seconds=Extract(F('clear_time'), lookup_name='epoch'),
+            contributor=Func(
+                Concat(Cast('wizard_id', CharField()), Value(_contributor_salt())),
+                function='md5',
+                output_field=CharField(),
+            ),
+        )
+
+    drops = get_drop_querysets(logs)[dataset]
+    return drops.order_by('pk').values(*[field.attname for field in drops.model._meta.concrete_fields])
+
+
+def get_copy_sql(queryset):
+    # Postgres COPY statement streaming the queryset's rows as CSV with a header row
+    with connection.cursor() as cursor:
+        sql, params = queryset.query.sql_with_params()
+        select = cursor.mogrify(sql, params).decode()
+
+    return f'COPY ({select}) TO STDOUT WITH (FORMAT csv, HEADER)'
+
+
+class _ChunkWriter:
+    # Collects the many small writes made by COPY into larger chunks
+    def __init__(self, write_chunk, chunk_size=EXPORT_CHUNK_SIZE):
+        self.write_chunk = write_chunk
+        self.chunk_size = chunk_size
+        self.buffer = bytearray()
+
+    def write(self, data):
+        self.buffer += data
+
+        if len(self.buffer) >= self.chunk_size:
+            self.flush()
+
+        return len(data)
+
+    def flush(self):
+        if self.buffer:
+            self.write_chunk(bytes(self.buffer))
+            self.buffer = bytearray()
+
+
+def copy_export(file, dataset, compress=True, **filters):
+    """
+    Write an export straight from Postgres to a binary file object, without loading rows into Python.
+
+    :param compress: gzip the output
+    """
+    queryset = get_export_queryset(dataset, **filters)
+
+    if compress:
+        with gzip.GzipFile(fileobj=file, mode='wb') as gzip_file:
+            with connection.cursor() as cursor:
+                cursor.copy_expert(get_copy_sql(queryset), gzip_file)
+    else:
+        with connection.cursor() as cursor:
+            cursor.copy_expert(get_copy_sql(queryset), file)
+
+
+def stream_export(dataset, compress=True, **filters):
+    """
+    Iterator of chunks of an export for a streaming response. COPY runs in a separate thread feeding a bounded
+    queue, so memory use is constant however large the export.
+
+    Arguments are validated immediately, before any response is started.
+    """
+    get_export_queryset(dataset, **filters)
+    return _stream_chunks(dataset, compress, filters)
+
+
+def _stream_chunks(dataset, compress, filters):
+    chunks = Queue(maxsize=EXPORT_QUEUE_SIZE)
+
+    def put_chunk(chunk):
+        # Raising here aborts the COPY if the client stops reading
+        chunks.put(chunk, timeout=EXPORT_CLIENT_TIMEOUT)
+
+    def produce():
+        writer = _ChunkWriter(put_chunk)
+        result = None
+
+        try:
+            copy_export(writer, dataset, compress=compress, **filters)
+            writer.flush()
+        except Exception as e:
+            result = e
+        finally:
+            # The thread has its own database connection
+            connection.close()
+
+        try:
+            # Marks the end of the export, or passes the error on to be raised in the response
+            put_chunk(result)
+        except Full:
+            pass
+
+    Thread(target=produce, daemon=True).start()
+
+    while True:
+        chunk = chunks.get()
+
+        if chunk is None:
+            return
+        if isinstance(chunk, Exception):
+            raise chunk
+
+        yield chunk
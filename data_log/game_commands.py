@@ -8,7 +8,7 @@ from . import schemas
 
 
 class GameApiCommand:
-    def __init__(self, schema, parse_fns):
+    def __init__(self, schema, parse_fns, rollup_model=None):
         self.validator = Draft4Validator(schema)
         self.accepted_commands = {
             key: schema['properties'][key]['properties'].keys() for key in schema['required']
@@ -16,6 +16,7 @@ class GameApiCommand:
         if not isinstance(parse_fns, list):
             parse_fns = [parse_fns]
         self.parsers = parse_fns
+        self.rollup_model = rollup_model  # Log model whose daily drop rollups need updating after a parse
 
     def parse(self, *args, **kwargs):
         for fn in self.parsers:
@@ -63,7 +64,8 @@ active_log_commands = {
     ),
     'BattleScenarioResult': GameApiCommand(
         schemas.battle_scenario_result,
-        models.DungeonLog.parse_scenario_result
+        models.DungeonLog.parse_scenario_result,
+        rollup_model=models.DungeonLog
     ),
     'BattleDungeonStart': GameApiCommand(
         schemas.battle_dungeon_start,
@@ -71,11 +73,13 @@ active_log_commands = {
     ),
     'BattleDungeonResult_V2': GameApiCommand(
         schemas.battle_dungeon_result_v2,
-        models.DungeonLog.parse_dungeon_result_v2
+        models.DungeonLog.parse_dungeon_result_v2,
+        rollup_model=models.DungeonLog
     ),
     'BattleRiftDungeonResult': GameApiCommand(
         schemas.battle_rift_dungeon_result,
-        models.RiftDungeonLog.parse_rift_dungeon_result
+        models.RiftDungeonLog.parse_rift_dungeon_result,
+        rollup_model=models.RiftDungeonLog
     ),
     'BattleWorldBossStart': GameApiCommand(
         schemas.battle_world_boss_start,
@@ -95,7 +99,8 @@ active_log_commands = {
     ),
     'BattleDimensionHoleDungeonResult_v2': GameApiCommand(
         schemas.battle_dimension_hole_result_v2,
-        models.DungeonLog.parse_dimension_hole_result_v2
+        models.DungeonLog.parse_dimension_hole_result_v2,
+        rollup_model=models.DungeonLog
     )
 }
 
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+
+from data_log.reports.benchmark import REPORT_GENERATORS, benchmark_report_generators
+
+
+class Command(BaseCommand):
+    help = 'Time each report generator and count the queries it runs'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--generator',
+            action='append',
+            dest='generators',
+            choices=list(REPORT_GENERATORS.keys()),
+            help='Report generator to run. May be repeated. Default is all generators.',
+        )
+        parser.add_argument('--repeat', type=int, default=1)
+        parser.add_argument('--approximate', action='store_true', help='Use approximate report mode for large levels')
+        parser.add_argument('--keep', action='store_true', help='Keep the generated reports instead of rolling them back')
+
+    def handle(self, *args, **options):
+        generator_kwargs = {}
+        if options['approximate']:
+            generator_kwargs['approximate'] = True
+
+        results = benchmark_report_generators(
+            generators=options['generators'],
+            repeat=options['repeat'],
+            keep_reports=options['keep'],
+            **generator_kwargs
+        )
+
+        self.stdout.write(f'{"Generator":<15}{"Run":>5}{"Seconds":>12}{"Queries":>10}{"DB Seconds":>12}')
+        for name, runs in results.items():
+            for run_num, result in enumerate(runs, start=1):
+                self.stdout.write(
+                    f'{name:<15}{run_num:>5}{result["duration"]:>12.2f}{result["queries"]:>10}{result["query_time"]:>12.2f}'
+                )
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from data_log.rollups import ROLLUP_MODELS, rebuild_daily_rollups
+from herders.models import Summoner
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the daily drop rollups used by the personal data log dashboards from the raw logs'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--summoner', type=int, default=None, help='Only rebuild rollups for this summoner ID')
+
+    def handle(self, *args, **options):
+        summoner = None
+        if options['summoner']:
+            try:
+                summoner = Summoner.objects.get(pk=options['summoner'])
+            except Summoner.DoesNotExist:
+                raise CommandError(f'Summoner {options["summoner"]} does not exist')
+
+        for model in ROLLUP_MODELS:
+            self.stdout.write(f'Rebuilding {model._meta.verbose_name} rollups...')
+            days = sum(1 for _ in rebuild_daily_rollups(model, summoner))
+            self.stdout.write(f'  {days} days')
+
+        self.stdout.write(self.style.SUCCESS('Done!'))
@@ -0,0 +1,35 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_datetime
+
+from data_log.export import EXPORT_DATASETS, copy_export
+
+
+class Command(BaseCommand):
+    help = 'Export anonymized dungeon logs or their drops as CSV, streamed directly from the database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('dataset', choices=EXPORT_DATASETS)
+        parser.add_argument('--level', type=int, default=None, help='Level ID to export')
+        parser.add_argument('--start', default=None, help='Earliest log timestamp, ISO 8601')
+        parser.add_argument('--end', default=None, help='Latest log timestamp, ISO 8601')
+        parser.add_argument('--output', default=None, help='File to write. Defaults to stdout')
+        parser.add_argument('--no-compress', action='store_true', help='Write plain CSV instead of gzip')
+
+    def handle(self, *args, **options):
+        filters = {'level': options['level']}
+
+        for key in ['start', 'end']:
+            if options[key]:
+                filters[key] = parse_datetime(options[key])
+                if filters[key] is None:
+                    raise CommandError(f'Invalid {key} timestamp {options[key]}')
+
+        compress = not options['no_compress']
+
+        if options['output']:
+            with open(options['output'], 'wb') as f:
+                copy_export(f, options['dataset'], compress=compress, **filters)
+        else:
+            copy_export(sys.stdout.buffer, options['dataset'], compress=compress, **filters)
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from data_log.synthetic import SyntheticLogGenerator
+
+
+class Command(BaseCommand):
+    help = 'Populate the database with synthetic dungeon, rift and world boss logs for load testing reports'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dungeon-logs', type=int, default=100000, help='Number of Cairos dungeon logs to create')
+        parser.add_argument('--rift-logs', type=int, default=0, help='Number of rift beast logs to create')
+        parser.add_argument('--world-boss-logs', type=int, default=0, help='Number of world boss logs to create')
+        parser.add_argument('--wizards', type=int, default=5000, help='Number of unique wizard IDs to spread logs across')
+        parser.add_argument('--days', type=int, default=14, help='Logs are timestamped randomly within this many days')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=None, help='Random seed for reproducible data')
+
+    def handle(self, *args, **options):
+        try:
+            generator = SyntheticLogGenerator(
+                num_wizards=options['wizards'],
+                days=options['days'],
+                batch_size=options['batch_size'],
+                seed=options['seed'],
+            )
+
+            for description, count, generate in [
+                ('dungeon logs', options['dungeon_logs'], generator.dungeon_logs),
+                ('rift beast logs', options['rift_logs'], generator.rift_dungeon_logs),
+                ('world boss logs', options['world_boss_logs'], generator.world_boss_logs),
+            ]:
+                if count > 0:
+                    self.stdout.write(f'Creating {count} {description}...')
+                    for created in generate(count):
+                        self.stdout.write(f'  {created}/{count}')
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(self.style.SUCCESS('Done!'))
@@ -0,0 +1,47 @@
+# Generated by Django 2.2.15 on 2026-10-18 20:47
+
+from django.db import migrations, models
+
+# (model, index name) of each log table indexed for personal log history
+LOG_INDEXES = [
+    ('craftrunelog', 'data_log_cr_summone_8c3ec0_idx'),
+    ('dungeonlog', 'data_log_du_summone_00e15b_idx'),
+    ('fulllog', 'data_log_fu_summone_5855e0_idx'),
+    ('magicboxcraft', 'data_log_ma_summone_e69d74_idx'),
+    ('riftdungeonlog', 'data_log_ri_summone_83e03a_idx'),
+    ('riftraidlog', 'data_log_ri_summone_764408_idx'),
+    ('shoprefreshlog', 'data_log_sh_summone_67f0c1_idx'),
+    ('summonlog', 'data_log_su_summone_e349f1_idx'),
+    ('wishlog', 'data_log_wi_summone_4f5f04_idx'),
+    ('worldbosslog', 'data_log_wo_summone_8d886a_idx'),
+]
+
+
+def create_index(model_name, index_name):
+    # Built without locking the table against writes, so log uploads continue while the index builds
+    return migrations.RunSQL(
+        f'CREATE INDEX CONCURRENTLY IF NOT EXISTS "{index_name}" '
+        f'ON "data_log_{model_name}" ("summoner_id", "timestamp", "id");',
+        reverse_sql=f'DROP INDEX CONCURRENTLY IF EXISTS "{index_name}";',
+    )
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('data_log', '0024_auto_20200808_1642'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[create_index(model_name, index_name) for model_name, index_name in LOG_INDEXES],
+            state_operations=[
+                migrations.AddIndex(
+                    model_name=model_name,
+                    index=models.Index(fields=['summoner', 'timestamp', 'id'], name=index_name),
+                ) for model_name, index_name in LOG_INDEXES
+            ],
+        ),
+    ]
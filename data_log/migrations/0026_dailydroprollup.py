@@ -0,0 +1,36 @@
+# Generated by Django 2.2.15 on 2026-10-18 20:50
+
+import django.contrib.postgres.fields.jsonb
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('herders', '0017_auto_20200808_1642'),
+        ('bestiary', '0027_auto_20200901_0846'),
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('data_log', '0025_log_summoner_timestamp_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyDropRollup',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('log_count', models.IntegerField()),
+                ('success_count', models.IntegerField()),
+                ('items', django.contrib.postgres.fields.jsonb.JSONField(default=list, help_text='[item, total quantity] pairs')),
+                ('monsters', django.contrib.postgres.fields.jsonb.JSONField(default=list, help_text='[monster, grade, count] entries')),
+                ('runes', django.contrib.postgres.fields.jsonb.JSONField(default=list, help_text='[type, quality, stars, count] entries')),
+                ('content_type', models.ForeignKey(help_text='The logging model rolled up', on_delete=django.db.models.deletion.CASCADE, to='contenttypes.ContentType')),
+                ('level', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to='bestiary.Level')),
+                ('summoner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='herders.Summoner')),
+            ],
+            options={
+                'unique_together': {('summoner', 'content_type', 'level', 'date')},
+            },
+        ),
+    ]
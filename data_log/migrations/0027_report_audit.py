@@ -0,0 +1,26 @@
+# Generated by Django 2.2.15 on 2026-10-18 20:56
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('data_log', '0026_dailydroprollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReportAudit',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('duration', models.DurationField(help_text='Time taken to generate the report')),
+                ('query_count', models.IntegerField()),
+                ('rows_scanned', models.BigIntegerField(help_text='Total rows returned by all queries run while generating the report')),
+                ('slice_start', models.DateTimeField(blank=True, help_text='Earliest log timestamp selected by slice_records', null=True)),
+                ('slice_reason', models.CharField(choices=[('all', 'All records'), ('timespan', 'Report timespan'), ('minimum_count', 'Minimum count'), ('maximum_count', 'Maximum count')], max_length=20)),
+                ('report', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='audit', to='data_log.Report')),
+            ],
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 2.2.15 on 2026-10-18 20:59
+
+import django.contrib.postgres.fields.jsonb
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('data_log', '0027_report_audit'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='summonreport',
+            name='counters',
+            field=django.contrib.postgres.fields.jsonb.JSONField(default=dict, help_text='Running totals the report is updated from'),
+        ),
+        migrations.AddField(
+            model_name='summonreport',
+            name='last_log_id',
+            field=models.IntegerField(default=0, help_text='Most recent SummonLog included in the report'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 2.2.15 on 2026-10-18 21:01
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('data_log', '0028_summonreport_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CraftRuneReport',
+            fields=[
+                ('report_ptr', models.OneToOneField(auto_created=True, on_delete=django.db.models.deletion.CASCADE, parent_link=True, primary_key=True, serialize=False, to='data_log.Report')),
+                ('craft_level', models.IntegerField(choices=[(1, 'Low'), (2, 'Mid'), (3, 'High')])),
+            ],
+            bases=('data_log.report',),
+        ),
+        migrations.CreateModel(
+            name='MagicBoxReport',
+            fields=[
+                ('report_ptr', models.OneToOneField(auto_created=True, on_delete=django.db.models.deletion.CASCADE, parent_link=True, primary_key=True, serialize=False, to='data_log.Report')),
+                ('box_type', models.IntegerField(choices=[(8, 'Unknown Magic Box'), (9, 'Mystical Magic Box'), (12, 'Legendary Magic Box')])),
+            ],
+            bases=('data_log.report',),
+        ),
+    ]
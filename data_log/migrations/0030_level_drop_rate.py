@@ -0,0 +1,49 @@
+# Generated by Django 2.2.15 on 2026-10-18 21:03
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bestiary', '0027_auto_20200901_0846'),
+        ('data_log', '0029_craft_reports'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LevelDropRate',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('log_grade', models.IntegerField(blank=True, help_text='Battle grade of the logs, for reports split by grade', null=True)),
+                ('drop_type', models.CharField(choices=[('item', 'Item'), ('monster', 'Monster'), ('rune', 'Rune')], max_length=10)),
+                ('grade', models.IntegerField(blank=True, help_text='Stars of the monster or rune', null=True)),
+                ('rune_type', models.IntegerField(blank=True, choices=[(1, 'Energy'), (2, 'Fatal'), (3, 'Blade'), (4, 'Rage'), (5, 'Swift'), (6, 'Focus'), (7, 'Guard'), (8, 'Endure'), (9, 'Violent'), (10, 'Will'), (11, 'Nemesis'), (12, 'Shield'), (13, 'Revenge'), (14, 'Despair'), (15, 'Vampire'), (16, 'Destroy'), (17, 'Fight'), (18, 'Determination'), (19, 'Enhance'), (20, 'Accuracy'), (21, 'Tolerance')], null=True)),
+                ('rune_quality', models.IntegerField(blank=True, choices=[(0, 'Normal'), (1, 'Magic'), (2, 'Rare'), (3, 'Hero'), (4, 'Legend')], null=True)),
+                ('drop_count', models.IntegerField(help_text='Number of logs with this drop')),
+                ('quantity', models.IntegerField(help_text='Total quantity dropped')),
+                ('drop_chance', models.FloatField(help_text='Percent of runs with this drop')),
+                ('drops_per_run', models.FloatField(help_text='Average quantity dropped per run')),
+                ('energy_cost', models.IntegerField(blank=True, null=True)),
+                ('drops_per_energy', models.FloatField(blank=True, help_text='Average quantity dropped per energy spent', null=True)),
+                ('sample_size', models.IntegerField(help_text='Number of logs in the report')),
+                ('item', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='bestiary.GameItem')),
+                ('level', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='drop_rates', to='bestiary.Level')),
+                ('monster', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='bestiary.Monster')),
+                ('report', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='drop_rates', to='data_log.LevelReport')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='leveldroprate',
+            index=models.Index(fields=['drop_type', 'item', '-drops_per_energy'], name='data_log_le_drop_ty_370609_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='leveldroprate',
+            index=models.Index(fields=['drop_type', 'monster', '-drops_per_energy'], name='data_log_le_drop_ty_ca4b04_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='leveldroprate',
+            index=models.Index(fields=['drop_type', 'rune_type', 'grade', 'rune_quality'], name='data_log_le_drop_ty_719b72_idx'),
+        ),
+    ]
@@ -1,2 +1,3 @@
 from .log_models import *
 from .report_models import *
+from .rollup_models import *
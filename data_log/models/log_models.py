@@ -29,6 +29,10 @@ class LogEntry(models.Model):
         abstract = True
         ordering = ('-timestamp', '-pk')
         get_latest_by = 'timestamp'
+        indexes = [
+            # Personal log history, ordered and paginated by (timestamp, id)
+            models.Index(fields=['summoner', 'timestamp', 'id']),
+        ]
 
     def parse_common_log_data(self, log_data):
         self.wizard_id = log_data['request']['wizard_id']
@@ -1,8 +1,11 @@
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.postgres.fields import JSONField
+from django.core.cache import cache
 from django.db import models
 
-from bestiary.models import Level, GameItem
+from bestiary.models import Level, GameItem, Monster, Rune
+from data_log.util import SLICE_REASON_CHOICES
+from .log_models import CraftRuneLog, MagicBoxCraft
 
 
 class Report(models.Model):
@@ -28,11 +31,119 @@ class Report(models.Model):
 
 
 class LevelReport(Report):
+    LATEST_CACHE_TIMEOUT = 60 * 60 * 24 * 7
+
     level = models.ForeignKey(Level, on_delete=models.PROTECT, related_name='logs')
 
     def __str__(self):
         return f"{self.level} {self.generated_on}"
 
+    @staticmethod
+    def latest_cache_key(level_id):
+        return f'level-report-latest-{level_id}'
+
+    @classmethod
+    def get_latest_ids(cls, level_id):
+        # (report id, content type id) of the newest report for a level. Kept up to date by data_log.signals
+        key = cls.latest_cache_key(level_id)
+        latest = cache.get(key)
+
+        if latest is None:
+            latest = cls.objects.filter(
+                level_id=level_id
+            ).order_by('-generated_on').values_list('pk', 'content_type_id').first() or (None, None)
+            cache.set(key, latest, cls.LATEST_CACHE_TIMEOUT)
+
+        return latest
+
+    @classmethod
+    def clear_latest_ids(cls, level_id):
+        cache.delete(cls.latest_cache_key(level_id))
+
+
+class LevelDropRate(models.Model):
+    """
+    Drop rates extracted from the latest report of each level, so levels can be compared by indexed queries
+    instead of loading every report.
+    """
+    DROP_ITEM = 'item'
+    DROP_MONSTER = 'monster'
+    DROP_RUNE = 'rune'
+
+    DROP_TYPE_CHOICES = (
+        (DROP_ITEM, 'Item'),
+        (DROP_MONSTER, 'Monster'),
+        (DROP_RUNE, 'Rune'),
+    )
+
+    report = models.ForeignKey(LevelReport, on_delete=models.CASCADE, related_name='drop_rates')
+    level = models.ForeignKey(Level, on_delete=models.CASCADE, related_name='drop_rates')
+    log_grade = models.IntegerField(blank=True, null=True, help_text='Battle grade of the logs, for reports split by grade')
+    drop_type = models.CharField(max_length=10, choices=DROP_TYPE_CHOICES)
+    item = models.ForeignKey(GameItem, on_delete=models.CASCADE, blank=True, null=True)
+    monster = models.ForeignKey(Monster, on_delete=models.CASCADE, blank=True, null=True)
+    grade = models.IntegerField(blank=True, null=True, help_text='Stars of the monster or rune')
+    rune_type = models.IntegerField(choices=Rune.TYPE_CHOICES, blank=True, null=True)
+    rune_quality = models.IntegerField(choices=Rune.QUALITY_CHOICES, blank=True, null=True)
+    drop_count = models.IntegerField(help_text='Number of logs with this drop')
+    quantity = models.IntegerField(help_text='Total quantity dropped')
+    drop_chance = models.FloatField(help_text='Percent of runs with this drop')
+    drops_per_run = models.FloatField(help_text='Average quantity dropped per run')
+    energy_cost = models.IntegerField(blank=True, null=True)
+    drops_per_energy = models.FloatField(blank=True, null=True, help_text='Average quantity dropped per energy spent')
+    sample_size = models.IntegerField(help_text='Number of logs in the report')
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['drop_type', 'item', '-drops_per_energy']),
+            models.Index(fields=['drop_type', 'monster', '-drops_per_energy']),
+            models.Index(fields=['drop_type', 'rune_type', 'grade', 'rune_quality']),
+        ]
+
+    def __str__(self):
+        return f'{self.level} - {self.get_drop_type_display()} - {self.drops_per_run}'
+
 
 class SummonReport(Report):
     item = models.ForeignKey(GameItem, on_delete=models.PROTECT)
+    last_log_id = models.IntegerField(default=0, help_text='Most recent SummonLog included in the report')
+    counters = JSONField(default=dict, help_text='Running totals the report is updated from')
+
+    def __str__(self):
+        return f"{self.item} {self.generated_on}"
+
+
+class MagicBoxReport(Report):
+    box_type = models.IntegerField(choices=MagicBoxCraft.BOX_CHOICES)
+
+    def __str__(self):
+        return f"{self.get_box_type_display()} {self.generated_on}"
+
+    @classmethod
+    def get_latest_reports(cls):
+        # Newest report of each box type
+        return cls.objects.order_by('box_type', '-generated_on').distinct('box_type')
+
+
+class CraftRuneReport(Report):
+    craft_level = models.IntegerField(choices=CraftRuneLog.CRAFT_CHOICES)
+
+    def __str__(self):
+        return f"{self.get_craft_level_display()} {self.generated_on}"
+
+    @classmethod
+    def get_latest_reports(cls):
+        # Newest report of each craft level
+        return cls.objects.order_by('craft_level', '-generated_on').distinct('craft_level')
+
+
+class ReportAudit(models.Model):
+    report = models.OneToOneField(Report, on_delete=models.CASCADE, related_name='audit')
+    duration = models.DurationField(help_text='Time taken to generate the report')
+    query_count = models.IntegerField()
+    rows_scanned = models.BigIntegerField(help_text='Total rows returned by all queries run while generating the report')
+    slice_start = models.DateTimeField(blank=True, null=True, help_text='Earliest log timestamp selected by slice_records')
+    slice_reason = models.CharField(max_length=20, choices=SLICE_REASON_CHOICES)
+
+    def __str__(self):
+        return f'{self.report} - {self.duration}'
@@ -0,0 +1,29 @@
+from django.contrib.contenttypes.models import ContentType
+from django.contrib.postgres.fields import JSONField
+from django.db import models
+
+from bestiary.models import Level
+from herders.models import Summoner
+
+
+class DailyDropRollup(models.Model):
+    # Totals of one summoner's completed logs and drops for a single level and day, maintained at log upload
+    summoner = models.ForeignKey(Summoner, on_delete=models.CASCADE)
+    content_type = models.ForeignKey(
+        ContentType,
+        on_delete=models.CASCADE,
+        help_text="The logging model rolled up"
+    )
+    level = models.ForeignKey(Level, on_delete=models.PROTECT)
+    date = models.DateField()
+    log_count = models.IntegerField()
+    success_count = models.IntegerField()
+    items = JSONField(default=list, help_text="[item, total quantity] pairs")
+    monsters = JSONField(default=list, help_text="[monster, grade, count] entries")
+    runes = JSONField(default=list, help_text="[type, quality, stars, count] entries")
+
+    class Meta:
+        unique_together = ('summoner', 'content_type', 'level', 'date')
+
+    def __str__(self):
+        return f"{self.summoner} {self.level} {self.date}"
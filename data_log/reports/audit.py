@@ -0,0 +1,69 @@
+from contextlib import contextmanager
+from datetime import timedelta
+from time import perf_counter
+
+from django.db import connection
+
+from data_log import models
+from data_log.util import SLICE_ALL
+
+
+class GenerationAudit:
+    """
+    Database execute wrapper counting the queries run and rows returned while generating a report.
+    """
+
+    def __init__(self):
+        self.query_count = 0
+        self.rows_scanned = 0
+        self.duration = None
+        self.slice_windows = []
+
+    def __call__(self, execute, sql, params, many, context):
+        result = execute(sql, params, many, context)
+        self.query_count += 1
+
+        # rowcount is -1 when not known, e.g. for server side cursors
+        rowcount = context['cursor'].rowcount
+        if rowcount > 0:
+            self.rows_scanned += rowcount
+
+        return result
+
+    def add_slice_window(self, window_start, reason):
+        self.slice_windows.append((window_start, reason))
+
+    def save(self, report):
+        # The earliest window is the one that determined the report's start timestamp
+        sliced = [window for window in self.slice_windows if window[0] is not None]
+        unsliced = [window for window in self.slice_windows if window[0] is None]
+        slice_start, slice_reason = unsliced[0] if unsliced else min(sliced, default=(None, SLICE_ALL))
+
+        # Reports updated in place, such as summon reports, keep the audit of their latest update
+        audit, _ = models.ReportAudit.objects.update_or_create(
+            report=report,
+            defaults={
+                'duration': self.duration if self.duration is not None else timedelta(0),
+                'query_count': self.query_count,
+                'rows_scanned': self.rows_scanned,
+                'slice_start': slice_start,
+                'slice_reason': slice_reason,
+            },
+        )
+        return audit
+
+
+@contextmanager
+def audit_generation():
+    """
+    Measure duration, query count and rows scanned of the enclosed report generation.
+
+    :return: GenerationAudit. Call save() with the created report to store the results.
+    """
+    audit = GenerationAudit()
+    start = perf_counter()
+
+    with connection.execute_wrapper(audit):
+        yield audit
+
+    audit.duration = timedelta(seconds=perf_counter() - start)
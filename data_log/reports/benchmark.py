@@ -0,0 +1,52 @@
+from time import perf_counter
+
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from . import generate
+
+REPORT_GENERATORS = {
+    'dungeon': generate.generate_dungeon_log_reports,
+    'rift_raid': generate.generate_rift_raid_reports,
+    'rift_dungeon': generate.generate_rift_dungeon_reports,
+    'world_boss': generate.generate_world_boss_dungeon_reports,
+}
+
+
+def time_function(func, *args, **kwargs):
+    """
+    Run func and measure wall time and database queries.
+
+    :return: dict of {'duration': <seconds>, 'queries': <query count>, 'query_time': <seconds spent in database>}
+    """
+    with CaptureQueriesContext(connection) as queries:
+        start = perf_counter()
+        func(*args, **kwargs)
+        duration = perf_counter() - start
+
+    return {
+        'duration': duration,
+        'queries': len(queries),
+        'query_time': sum(float(query['time']) for query in queries.captured_queries),
+    }
+
+
+def benchmark_report_generators(generators=None, repeat=1, keep_reports=False, **kwargs):
+    """
+    Time each report generator. Generated reports are rolled back unless keep_reports is set.
+
+    :return: dict of {generator name: list of timing results, one per repetition}
+    """
+    results = {}
+
+    for name in generators or REPORT_GENERATORS.keys():
+        results[name] = []
+
+        for _ in range(repeat):
+            with transaction.atomic():
+                results[name].append(time_function(REPORT_GENERATORS[name], **kwargs))
+
+                if not keep_reports:
+                    transaction.set_rollback(True)
+
+    return results
@@ -0,0 +1,343 @@
+import json
+from copy import deepcopy
+
+from bestiary.models import RuneObjectBase, Monster
+from . import chart_templates
+
+
+def drop_summary(summary_data):
+    # Transform level drop summary to highcharts expected format
+    chart_data = deepcopy(chart_templates.pie)
+    chart_data['title']['text'] = 'Overall distribution'
+    chart_data['series'].append({
+        'name': 'Drop Types',
+        'colorByPoint': True,
+        'data': [
+            {
+                'name': drop['name'],
+                'y': drop['count']
+            } for drop in summary_data
+        ],
+    })
+
+    return chart_data
+
+
+def _common_chart_attributes(chart_template, **kwargs):
+    chart_data = deepcopy(chart_template)
+    chart_data['title']['text'] = kwargs.get('title')
+
+    if kwargs.get('legend'):
+        chart_data['legend'] = {
+            'useHTML': True,
+            'align': 'right',
+            'x': 0,
+            'verticalAlign': 'top',
+            'y': 25,
+            'floating': True,
+            'backgroundColor': 'white',
+            'borderColor': '#CCC',
+            'borderWidth': 1,
+            'shadow': False,
+        }
+
+    if kwargs.get('percentage'):
+        # chart_data['yAxis']['max'] = 100
+        chart_data['yAxis']['labels'] = {
+            'format': '{value}%'
+        }
+        if chart_data['chart']['type'] == 'column':
+            chart_data['tooltip']['pointFormat'] = '<tr><td style="color:{series.color};padding:0">{series.name}: </td><td style="padding:0"><b>{point.y:.1f}%</b></td></tr>'
+
+    if kwargs.get('percentage') == False:
+        if chart_data['chart']['type'] == 'pie':
+            chart_data['plotOptions']['pie']['dataLabels']['format'] = '<b>{point.name}</b>: {point.y}'
+
+    return chart_data
+
+
+TRUE_FALSE_COLORS = {
+    'True': '#1a912e',
+    'False': '#911a1a',
+}
+
+_element_choices = dict(Monster.ELEMENT_CHOICES)
+ELEMENT_COLORS = {
+    _element_choices[Monster.ELEMENT_PURE]: '#ffffff',
+    _element_choices[Monster.ELEMENT_FIRE]: '#cb4f4f',
+    _element_choices[Monster.ELEMENT_WIND]: '#f3dc88',
+    _element_choices[Monster.ELEMENT_WATER]: '#3258a8',
+    _element_choices[Monster.ELEMENT_LIGHT]: '#e9e9e9',
+    _element_choices[Monster.ELEMENT_DARK]: '#4d4d4d',
+}
+
+_quality_choices = dict(RuneObjectBase.QUALITY_CHOICES)
+QUALITY_COLORS = {
+    _quality_choices[RuneObjectBase.QUALITY_NORMAL]: '#eeeeee',
+    _quality_choices[RuneObjectBase.QUALITY_MAGIC]: '#04d25e',
+    _quality_choices[RuneObjectBase.QUALITY_RARE]: '#3bc9fe',
+    _quality_choices[RuneObjectBase.QUALITY_HERO]: '#d66ef6',
+    _quality_choices[RuneObjectBase.QUALITY_LEGEND]: '#ef9f24',
+}
+
+QUALITY_SORT_ORDER = {
+    v: k for k, v in _quality_choices.items()
+}
+
+RUNE_SET_SORT_ORDER = {
+    v: k for k, v in dict(RuneObjectBase.TYPE_CHOICES).items()
+}
+
+
+def _apply_colors(series_data, colors):
+    for series in series_data:
+        if 'colorByPoint' in series:
+            # Pie chart - color each point individually
+            for point in series['data']:
+                if point['name'] in colors:
+                    point['color'] = colors[point['name']]
+        else:
+            if series['name'] in colors:
+                series['color'] = colors[series['name']]
+    return series_data
+
+
+def _color_quality_series(series_data):
+    return _apply_colors(series_data, QUALITY_COLORS)
+
+
+def _color_pass_fail_series(series_data):
+    return _apply_colors(series_data, TRUE_FALSE_COLORS)
+
+
+def _color_element_series(series_data):
+    return _apply_colors(series_data, ELEMENT_COLORS)
+
+
+_series_colors = {
+    'quality': _color_quality_series,
+    'pass_fail': _color_pass_fail_series,
+    'element': _color_element_series,
+}
+
+
+# All _sort_by_x functions assume the input data is a list of tuples which are key:value pairs
+# None values assigned value of 0 for sorting
+def _sort_by_key(data):
+    return sorted(data, key=lambda x: x[0] or 0)
+
+
+def _sort_by_value(data):
+    return sorted(data, key=lambda x: x[1] or 0)
+
+
+def _sort_by_rune_set(data):
+    # Assumes keys are rune set strings
+    return sorted(data, key=lambda x: RUNE_SET_SORT_ORDER[x[0]])
+
+
+def _sort_by_quality(data):
+    # Assumes keys are quality strings
+    return sorted(data, key=lambda x: QUALITY_SORT_ORDER[x[0]])
+
+
+_sort_methods = {
+    'value': _sort_by_value,
+    'key': _sort_by_key,
+    'rune': _sort_by_rune_set,
+    'quality': _sort_by_quality,
+}
+
+
+def _sort_data(data, by='value', reverse=False):
+    sorted_data = _sort_methods[by](data)
+
+    if reverse:
+        return list(reversed(sorted_data))
+
+    return sorted_data
+
+
+def color_series(chart_data, color_type):
+    if color_type in _series_colors:
+        chart_data['series'] = _series_colors[color_type](chart_data['series'])
+
+    return chart_data
+
+
+def pie(**kwargs):
+    data = list(kwargs.get('data').items())
+    if 'sorted' in kwargs:
+        data = _sort_data(data, by=kwargs.get('sorted'), reverse=kwargs.get('reverse'))
+
+    chart_data = _common_chart_attributes(chart_templates.pie, **kwargs)
+    chart_data['series'].append({
+        'name': '',
+        'colorByPoint': True,
+        'data': [
+            {
+                'name': k,
+                'y': v,
+            } for k, v in data
+        ],
+    })
+
+    chart_data = color_series(chart_data, kwargs.get('colors'))
+
+    return chart_data
+
+
+def bar(**kwargs):
+    data = list(kwargs.get('data').items())
+    if 'sorted' in kwargs:
+        data = _sort_data(data, by=kwargs.get('sorted'), reverse=kwargs.get('reverse'))
+
+    chart_data = _common_chart_attributes(chart_templates.column, **kwargs)
+    if kwargs.get('percentage'):
+        total = float(kwargs.get('total', 1)) / 100
+    else:
+        total = 1
+
+    chart_data['plotOptions']['column']['stacking'] = kwargs.get('stacking')
+    chart_data['plotOptions']['column']['groupPadding'] = 0
+    chart_data['plotOptions']['column']['pointPadding'] = 0.05
+
+    chart_data['xAxis']['categories'] = kwargs.get('categories', [v[0] for v in data])
+    chart_data['series'] = [{
+        'name': kwargs.get('series_name'),
+        'data': [float(v[1] or 0) / total for v in data],
+    }]
+
+    chart_data = color_series(chart_data, kwargs.get('colors'))
+
+    return chart_data
+
+
+def histogram(**kwargs):
+    data = kwargs.get('data')
+    chart_data = _common_chart_attributes(chart_templates.column, **kwargs)
+
+    categories = [
+        i['bin'] for i in data
+    ]
+
+    # Construct series
+    series = {}
+    for hist_bin in data:
+        for k, v in hist_bin.items():
+            if k == 'bin':
+                continue
+
+            if k not in series:
+                series[k] = []
+
+            series[k] += [v]
+    series = series.items()
+
+    if 'sorted' in kwargs:
+        series = _sort_data(series, by=kwargs.get('sorted'), reverse=kwargs.get('reverse'))
+
+    chart_data['plotOptions']['column']['stacking'] = 'normal'
+    chart_data['plotOptions']['column']['groupPadding'] = 0
+    chart_data['plotOptions']['column']['pointPadding'] = 0.05
+    chart_data['xAxis']['categories'] = categories
+    chart_data['series'] = [{
+        'name': k,
+        'data': v,
+    } for k, v in series]
+
+    chart_data = color_series(chart_data, kwargs.get('colors'))
+
+    return chart_data
+
+
+chart_types = {
+    'histogram': histogram,
+    'occurrences': bar,
+    'pie': pie,
+}
+
+
+def build_chart(data, **kwargs):
+    # Merge chart data and kwargs such that kwargs overrides existing keys in data
+    chart_parameters = {**data, **kwargs}
+    chart_type = chart_parameters['type']
+    return chart_types[chart_type](**chart_parameters)
+
+
+# Chart options for each report section, matching the arguments used in the data_log templates
+REPORT_CHART_OPTIONS = {
+    'runes': {
+        'type': {'type': 'pie', 'title': 'Rune Set', 'sorted': 'rune'},
+        'slot': {'type': 'pie', 'title': 'Slot', 'sorted': 'key'},
+        'stars': {'type': 'pie', 'title': 'Stars', 'sorted': 'key'},
+        'quality': {'type': 'pie', 'title': 'Quality', 'sorted': 'quality', 'colors': 'quality'},
+        'slot_2_main_stat': {'title': 'Slot 2 Main Stat', 'percentage': True, 'sorted': 'value', 'reverse': True},
+        'slot_4_main_stat': {'title': 'Slot 4 Main Stat', 'percentage': True, 'sorted': 'value', 'reverse': True},
+        'slot_6_main_stat': {'title': 'Slot 6 Main Stat', 'percentage': True, 'sorted': 'value', 'reverse': True},
+        'innate_stat': {'title': 'By Innate Stat', 'percentage': True, 'sorted': 'value', 'reverse': True},
+        'substats': {'title': 'By Substats', 'percentage': True, 'sorted': 'value', 'reverse': True},
+        'value': {'title': 'Rune Sell Value', 'legend': True, 'colors': 'quality', 'sorted': 'quality'},
+        'max_efficiency': {'title': 'Maximum Efficiency Distribution', 'legend': True, 'colors': 'quality', 'sorted': 'quality'},
+    },
+    'rune_crafts': {
+        'rune': {'type': 'pie', 'title': 'Rune Set', 'sorted': 'rune'},
+        'quality': {'type': 'pie', 'title': 'Quality', 'sorted': 'quality', 'colors': 'quality'},
+        'stat': {'title': 'By Stat', 'percentage': True, 'sorted': 'value', 'reverse': True},
+    },
+    'artifacts': {
+        'element': {'type': 'pie', 'title': 'Element', 'sorted': 'key', 'colors': 'element'},
+        'archetype': {'type': 'pie', 'title': 'Archetype', 'sorted': 'key'},
+        'quality': {'type': 'pie', 'title': 'Quality', 'sorted': 'quality', 'colors': 'quality'},
+        'main_stat': {'type': 'pie', 'title': 'Main Stat', 'sorted': 'key'},
+        'effects': {'title': 'Secondary Effects', 'percentage': True, 'sorted': 'value', 'reverse': True},
+        'max_efficiency': {'title': 'Maximum Efficiency Distribution', 'legend': True, 'colors': 'quality', 'sorted': 'quality'},
+    },
+    'monsters': {
+        'monsters': {'title': 'Monsters - Unique'},
+        'family': {'title': 'Monsters - By Family'},
+        'nat_stars': {'type': 'pie', 'title': 'Natural Stars', 'percentage': False, 'sorted': 'key'},
+        'element': {'type': 'pie', 'title': 'Element', 'percentage': False, 'sorted': 'key', 'colors': 'element'},
+        'awakened': {'type': 'pie', 'title': 'Awakened/Unawakened', 'percentage': False},
+    },
+    'clear_time': {
+        'chart': {'title': 'Histogram', 'colors': 'pass_fail'},
+    },
+}
+
+
+def _render_section(section_data, options):
+    return {
+        key: json.dumps(build_chart(section_data[key], **chart_options))
+        for key, chart_options in options.items() if section_data.get(key)
+    }
+
+
+def render_report_charts(report_data):
+    """
+    Pre-render the highcharts payloads for a drop report so pages can serve them without rebuilding each chart.
+
+    :param report_data: Report as returned by drop_report()
+    :return: dict of pre-serialized chart JSON, with the same section and key layout as report_data
+    """
+    charts = {}
+
+    if report_data.get('summary'):
+        charts['summary'] = json.dumps(drop_summary(report_data['summary']['chart']))
+
+    for section, options in REPORT_CHART_OPTIONS.items():
+        section_data = report_data.get(section)
+
+        if not section_data:
+            continue
+
+        if section == 'rune_crafts':
+            # Grindstones and gems are reported separately with the same charts
+            charts[section] = {
+                craft_type: _render_section(craft_data, options)
+                for craft_type, craft_data in section_data.items() if craft_data
+            }
+        else:
+            charts[section] = _render_section(section_data, options)
+
+    return charts
@@ -1,18 +1,33 @@
-from collections import Counter
 from datetime import timedelta
+from itertools import chain
+from math import sqrt
 
 from django.contrib.contenttypes.models import ContentType
-from django.db.models import Count, Min, Max, Avg, Sum, Func, F, Func, Q, CharField, FloatField, Value, StdDev
-from django.db.models.functions import Cast, Concat, Extract
+from django.db import transaction
+from django.db.models import Count, Min, Max, Avg, Sum, Func, F, Func, Q, CharField, FloatField, IntegerField, Value, StdDev
+from django.db.models.functions import Cast, Concat, Extract, Least
+from django.utils import timezone
 from django_pivot.histogram import histogram
+import numpy as np
 
 from bestiary.models import Monster, Rune, Level, GameItem, Dungeon, Artifact, ArtifactCraft
 from data_log import models
-from data_log.util import slice_records, floor_to_nearest, ceil_to_nearest, replace_value_with_choice, \
-    transform_to_dict, round_timedelta
+from data_log.reports.audit import audit_generation
+from data_log.reports.charts import render_report_charts
+from data_log.util import get_slice_window, floor_to_nearest, ceil_to_nearest, replace_value_with_choice, \
+    transform_to_dict, round_timedelta, sample_records, approx_count_distinct, hll_registers, merge_hll_registers, \
+    hll_estimate, HLL_PRECISION
 
 MINIMUM_THRESHOLD = 0.005  # Any drops that occur less than this percentage of time are filtered out
 CLEAR_TIME_BIN_WIDTH = timedelta(seconds=5)
+CLEAR_TIME_OUTLIER_STD_DEVS = 3  # Clear times outside this many std deviations from the average are clipped from the histogram
+NULL_VALUE = -1  # Placeholder for nulls in integer numpy arrays
+APPROXIMATE_MINIMUM_COUNT = 100000  # Only levels with more logs than this get an approximate report
+APPROXIMATE_SAMPLE_SIZE = 25000
+APPROXIMATE_CONFIDENCE = 0.95
+APPROXIMATE_CONFIDENCE_Z = 1.96
+SUMMON_BLESSING_TIMEOUT = timedelta(days=1)  # Blessings with no logged choice after this long are counted as unchosen
+SUMMON_LOG_RESCAN_WINDOW = 5000  # Log IDs below the last update re-checked for logs which committed late
 
 
 def get_report_summary(drops, total_log_count, **kwargs):
@@ -329,127 +344,128 @@ def get_monster_report(qs, total_log_count, **kwargs):
     }
 
 
+def _value_counts(values):
+    # Histogram of an array of values as a list of (value, count) tuples ordered by value
+    if values.size == 0:
+        return []
+
+    if values.dtype.kind in 'iu':
+        # Offset so that negative values, such as the null placeholder, can be counted by bincount
+        offset = values.min()
+        counts = np.bincount(values - offset)
+        present = np.flatnonzero(counts)
+        return list(zip((present + offset).tolist(), counts[present].tolist()))
+    else:
+        unique_values, counts = np.unique(values, return_counts=True)
+        return list(zip(unique_values.tolist(), counts.tolist()))
+
+
+def _int_array(values):
+    # Convert a sequence of nullable integers from values_list() into a numpy array
+    return np.fromiter(
+        (NULL_VALUE if val is None else val for val in values),
+        dtype=np.int64,
+        count=len(values),
+    )
+
+
+def _flat_int_array(arrays):
+    # Flatten a sequence of ArrayField values into a single numpy array
+    return _int_array(list(chain.from_iterable(arr for arr in arrays if arr)))
+
+
+def _occurrences(values, min_count=None, choices=None, sort_by_count=True, name_key='value'):
+    data = []
+    for value, count in _value_counts(values):
+        if min_count is not None and count <= min_count:
+            continue
+
+        data.append({
+            name_key: None if value == NULL_VALUE else value,
+            'count': count,
+        })
+
+    if sort_by_count:
+        data.sort(key=lambda item: item['count'], reverse=True)
+
+    if choices:
+        data = replace_value_with_choice(data, {name_key: choices})
+
+    return transform_to_dict(data, name_key=name_key)
+
+
 def get_rune_report(qs, total_log_count, **kwargs):
-    if qs.count() == 0:
+    # Pull the required columns in a single query and build the distributions in numpy
+    runes = list(
+        qs.order_by().values_list('type', 'stars', 'quality', 'slot', 'main_stat', 'innate_stat', 'value', 'substats')
+    )
+
+    if len(runes) == 0:
         return None
 
     min_count = kwargs.get('min_count', max(1, int(MINIMUM_THRESHOLD * total_log_count)))
 
-    # Substat distribution
-    # Unable to use database aggregation on an ArrayField without ORM gymnastics, so post-process data in python
-    all_substats = qs.annotate(
-        flat_substats=Func(F('substats'), function='unnest')
-    ).values_list('flat_substats', flat=True)
-    substat_counts = Counter(all_substats)
+    rune_types, stars, quality, slots, main_stats, innate_stats, values, substats = zip(*runes)
+    rune_types = _int_array(rune_types)
+    stars = _int_array(stars)
+    quality = _int_array(quality)
+    slots = _int_array(slots)
+    main_stats = _int_array(main_stats)
+    innate_stats = _int_array(innate_stats)
+    values = _int_array(values)
+    all_substats = _flat_int_array(substats)
 
     # Sell value ranges
-    min_value, max_value = qs.aggregate(Min('value'), Max('value')).values()
-    min_value = int(floor_to_nearest(min_value, 1000))
-    max_value = int(ceil_to_nearest(max_value, 1000))
+    values = values[values != NULL_VALUE]
+    min_value = int(floor_to_nearest(values.min(), 1000)) if values.size else 0
+    max_value = int(ceil_to_nearest(values.max(), 1000)) if values.size else 0
 
-    return {
+    report = {
         'stars': {
             'type': 'occurrences',
-            'total': qs.count(),
-            'data': transform_to_dict(
-                list(
-                    qs.values(
-                        grade=Concat(Cast('stars', CharField()), Value('⭐'))
-                    ).annotate(
-                        count=Count('pk')
-                    ).filter(count__gt=min_count).order_by('-count')
-                )
-            ),
+            'total': stars.size,
+            'data': _occurrences(stars, min_count, qs.model.STAR_CHOICES, name_key='grade'),
         },
         'type': {
             'type': 'occurrences',
-            'total': qs.count(),
-            'data': transform_to_dict(
-                replace_value_with_choice(
-                    list(qs.values('type').annotate(count=Count('pk')).filter(count__gt=min_count).order_by('-count')),
-                    {'type': qs.model.TYPE_CHOICES}
-                )
-            ),
+            'total': rune_types.size,
+            'data': _occurrences(rune_types, min_count, qs.model.TYPE_CHOICES, name_key='type'),
         },
         'quality': {
             'type': 'occurrences',
-            'total': qs.count(),
-            'data': transform_to_dict(
-                replace_value_with_choice(
-                    list(qs.values('quality').annotate(count=Count('pk')).filter(count__gt=min_count).order_by('-count')),
-                    {'quality': qs.model.QUALITY_CHOICES}
-                )
-            ),
+            'total': quality.size,
+            'data': _occurrences(quality, min_count, qs.model.QUALITY_CHOICES, name_key='quality'),
         },
         'slot': {
             'type': 'occurrences',
-            'total': qs.count(),
-            'data': transform_to_dict(list(qs.values('slot').annotate(count=Count('pk')).filter(count__gt=min_count).order_by('-count'))),
+            'total': slots.size,
+            'data': _occurrences(slots, min_count, name_key='slot'),
         },
         'main_stat': {
             'type': 'occurrences',
-            'total': qs.count(),
-            'data': transform_to_dict(
-                replace_value_with_choice(
-                    list(qs.values('main_stat').annotate(count=Count('main_stat')).filter(count__gt=min_count).order_by('main_stat')),
-                    {'main_stat': qs.model.STAT_CHOICES}
-                )
-            )
-        },
-        'slot_2_main_stat': {
-            'type': 'occurrences',
-            'total': qs.filter(slot=2).count(),
-            'data': transform_to_dict(
-                replace_value_with_choice(
-                    list(qs.filter(slot=2).values('main_stat').annotate(count=Count('main_stat')).filter(count__gt=min_count).order_by('main_stat')),
-                    {'main_stat': qs.model.STAT_CHOICES}
-                )
-            )
+            'total': main_stats.size,
+            'data': _occurrences(main_stats, min_count, qs.model.STAT_CHOICES, sort_by_count=False, name_key='main_stat'),
         },
-        'slot_4_main_stat': {
-            'type': 'occurrences',
-            'total': qs.filter(slot=4).count(),
-            'data': transform_to_dict(
-                replace_value_with_choice(
-                    list(qs.filter(slot=4).values('main_stat').annotate(count=Count('main_stat')).filter(
-                        count__gt=min_count).order_by('main_stat')),
-                    {'main_stat': qs.model.STAT_CHOICES}
-                )
-            )
-        },
-        'slot_6_main_stat': {
+    }
+
+    for slot in [2, 4, 6]:
+        slot_main_stats = main_stats[slots == slot]
+        report[f'slot_{slot}_main_stat'] = {
             'type': 'occurrences',
-            'total': qs.filter(slot=6).count(),
-            'data': transform_to_dict(
-                replace_value_with_choice(
-                    list(qs.filter(slot=6).values('main_stat').annotate(count=Count('main_stat')).filter(
-                        count__gt=min_count).order_by('main_stat')),
-                    {'main_stat': qs.model.STAT_CHOICES}
-                )
-            )
-        },
+            'total': slot_main_stats.size,
+            'data': _occurrences(slot_main_stats, min_count, qs.model.STAT_CHOICES, sort_by_count=False, name_key='main_stat'),
+        }
+
+    report.update({
         'innate_stat': {
             'type': 'occurrences',
-            'total': qs.count(),
-            'data': transform_to_dict(
-                replace_value_with_choice(
-                    list(qs.values('innate_stat').annotate(count=Count('pk')).filter(count__gt=min_count).order_by('innate_stat')),
-                    {'innate_stat': qs.model.STAT_CHOICES}
-                )
-            )
+            'total': innate_stats.size,
+            'data': _occurrences(innate_stats, min_count, qs.model.STAT_CHOICES, sort_by_count=False, name_key='innate_stat'),
         },
         'substats': {
             'type': 'occurrences',
-            'total': len(all_substats),
-            'data': transform_to_dict(
-                replace_value_with_choice(
-                    sorted(
-                        [{'substat': k, 'count': v} for k, v in substat_counts.items()],
-                        key=lambda count: count['substat']
-                    ),
-                    {'substat': qs.model.STAT_CHOICES}
-                ),
-            )
+            'total': all_substats.size,
+            'data': _occurrences(all_substats, choices=qs.model.STAT_CHOICES, sort_by_count=False, name_key='substat'),
         },
         'max_efficiency': {
             'type': 'histogram',
@@ -461,78 +477,53 @@ def get_rune_report(qs, total_log_count, **kwargs):
             'width': 500,
             'data': histogram(qs, 'value', range(min_value, max_value, 500), slice_on='quality')
         }
-    }
+    })
+
+    return report
 
 
 def get_artifact_report(qs, total_log_count, **kwargs):
-    if qs.count() == 0:
+    # Pull the required columns in a single query and build the distributions in numpy
+    artifacts = list(qs.order_by().values_list('slot', 'element', 'archetype', 'quality', 'main_stat', 'effects'))
+
+    if len(artifacts) == 0:
         return None
 
     min_count = kwargs.get('min_count', max(1, int(MINIMUM_THRESHOLD * total_log_count)))
-    # Secondary effect distribution
-    # Unable to use database aggregation on an ArrayField without ORM gymnastics, so post-process data in python
-    all_effects = qs.annotate(
-        flat_effects=Func(F('effects'), function='unnest')
-    ).values_list('flat_effects', flat=True)
-    effect_counts = Counter(all_effects)
+
+    slots, elements, archetypes, quality, main_stats, effects = zip(*artifacts)
+    slots = _int_array(slots)
+    elements = np.array(elements, dtype=object)[slots == Artifact.SLOT_ELEMENTAL]
+    archetypes = np.array(archetypes, dtype=object)[slots == Artifact.SLOT_ARCHETYPE]
+    quality = _int_array(quality)
+    main_stats = _int_array(main_stats)
+    all_effects = _flat_int_array(effects)
 
     return {
         'element': {
             'type': 'occurrences',
-            'total': qs.filter(slot=Artifact.SLOT_ELEMENTAL).count(),
-            'data': transform_to_dict(
-                replace_value_with_choice(
-                    list(qs.filter(slot=Artifact.SLOT_ELEMENTAL).values('element').annotate(count=Count('pk')).filter(count__gt=min_count).order_by(
-                        '-count')),
-                    {'element': qs.model.ELEMENT_CHOICES}
-                )
-            ),
+            'total': elements.size,
+            'data': _occurrences(elements, min_count, qs.model.ELEMENT_CHOICES, name_key='element'),
         },
         'archetype': {
             'type': 'occurrences',
-            'total': qs.filter(slot=Artifact.SLOT_ARCHETYPE).count(),
-            'data': transform_to_dict(
-                replace_value_with_choice(
-                    list(qs.filter(slot=Artifact.SLOT_ARCHETYPE).values('archetype').annotate(count=Count('pk')).filter(count__gt=min_count).order_by(
-                        '-count')),
-                    {'archetype': qs.model.ARCHETYPE_CHOICES}
-                )
-            ),
+            'total': archetypes.size,
+            'data': _occurrences(archetypes, min_count, qs.model.ARCHETYPE_CHOICES, name_key='archetype'),
         },
         'quality': {
             'type': 'occurrences',
-            'total': qs.count(),
-            'data': transform_to_dict(
-                replace_value_with_choice(
-                    list(qs.values('quality').annotate(count=Count('pk')).filter(count__gt=min_count).order_by(
-                        '-count')),
-                    {'quality': qs.model.QUALITY_CHOICES}
-                )
-            ),
+            'total': quality.size,
+            'data': _occurrences(quality, min_count, qs.model.QUALITY_CHOICES, name_key='quality'),
         },
         'main_stat': {
             'type': 'occurrences',
-            'total': qs.count(),
-            'data': transform_to_dict(
-                replace_value_with_choice(
-                    list(qs.values('main_stat').annotate(count=Count('main_stat')).filter(count__gt=min_count).order_by(
-                        'main_stat')),
-                    {'main_stat': qs.model.STAT_CHOICES}
-                )
-            )
+            'total': main_stats.size,
+            'data': _occurrences(main_stats, min_count, qs.model.STAT_CHOICES, sort_by_count=False, name_key='main_stat'),
         },
         'effects': {
             'type': 'occurrences',
-            'total': len(all_effects),
-            'data': transform_to_dict(
-                replace_value_with_choice(
-                    sorted(
-                        [{'effect': k, 'count': v} for k, v in effect_counts.items()],
-                        key=lambda count: count['effect']
-                    ),
-                    {'effect': qs.model.EFFECT_CHOICES}
-                ),
-            )
+            'total': all_effects.size,
+            'data': _occurrences(all_effects, choices=qs.model.EFFECT_CHOICES, sort_by_count=False, name_key='effect'),
         },
         'max_efficiency': {
             'type': 'histogram',
@@ -622,6 +613,46 @@ def get_drop_querysets(qs):
     return drop_querysets
 
 
+def clear_time_histogram(qs, min_time, max_time, bin_width, slice_on='success'):
+    """
+    Histogram of clear times bucketed by the database in a single grouped query.
+    Times below min_time are excluded and times above max_time are counted in the last bin.
+
+    :return: list of {'bin': <left edge>, <slice value>: <count>, ...} in the same format as django_pivot's histogram
+    """
+    num_bins = max(1, int((max_time - min_time) / bin_width))
+    bucket = Func(
+        Extract(F('clear_time'), lookup_name='epoch'),
+        min_time.total_seconds(),
+        (min_time + bin_width * num_bins).total_seconds(),
+        num_bins,
+        function='width_bucket',
+        output_field=IntegerField(),
+    )
+
+    # LEAST ignores NULL, so logs without a clear time would otherwise land in the last bin
+    counts = qs.filter(clear_time__isnull=False).annotate(
+        bucket=Least(bucket, Value(num_bins, output_field=IntegerField())),
+    ).filter(
+        bucket__gt=0,
+    ).order_by().values_list('bucket', slice_on).annotate(count=Count('pk'))
+
+    slice_values = set()
+    bins = {}
+    for bucket_num, slice_value, count in counts:
+        bins.setdefault(bucket_num, {})[str(slice_value)] = count
+        slice_values.add(slice_value)
+
+    slice_keys = [str(value) for value in sorted(slice_values, key=lambda value: (value is None, value))]
+
+    return [
+        {
+            'bin': str(min_time + bin_width * x),
+            **{key: bins.get(x + 1, {}).get(key, 0) for key in slice_keys},
+        } for x in range(num_bins)
+    ]
+
+
 def drop_report(qs, **kwargs):
     report_data = {}
 
@@ -636,6 +667,8 @@ def drop_report(qs, **kwargs):
         )
 
         if successful_runs.count():
+            bin_width = kwargs.get('clear_time_bin_width', CLEAR_TIME_BIN_WIDTH)
+            outlier_std_devs = kwargs.get('clear_time_outlier_std_devs', CLEAR_TIME_OUTLIER_STD_DEVS)
             clear_time_aggs = successful_runs.aggregate(
                 std_dev=StdDev(Extract(F('clear_time'), lookup_name='epoch')),
                 avg=Avg('clear_time'),
@@ -643,18 +676,17 @@ def drop_report(qs, **kwargs):
                 max=Max('clear_time'),
             )
 
-            # Use +/- 3 std deviations of clear time avg as bounds for time range in case of extreme outliers skewing chart scale
-            min_time = round_timedelta(
-                max(clear_time_aggs['min'], clear_time_aggs['avg'] - timedelta(seconds=clear_time_aggs['std_dev'] * 3)),
-                CLEAR_TIME_BIN_WIDTH,
-                direction='down',
-            )
-            max_time = round_timedelta(
-                min(clear_time_aggs['max'], clear_time_aggs['avg'] + timedelta(seconds=clear_time_aggs['std_dev'] * 3)),
-                CLEAR_TIME_BIN_WIDTH,
-                direction='up',
-            )
-            bins = [min_time + CLEAR_TIME_BIN_WIDTH * x for x in range(0, int((max_time - min_time) / CLEAR_TIME_BIN_WIDTH))]
+            min_time = clear_time_aggs['min']
+            max_time = clear_time_aggs['max']
+
+            if outlier_std_devs is not None:
+                # Use +/- N std deviations of clear time avg as bounds for time range in case of extreme outliers skewing chart scale
+                outlier_range = timedelta(seconds=(clear_time_aggs['std_dev'] or 0) * outlier_std_devs)
+                min_time = max(min_time, clear_time_aggs['avg'] - outlier_range)
+                max_time = min(max_time, clear_time_aggs['avg'] + outlier_range)
+
+            min_time = round_timedelta(min_time, bin_width, direction='down')
+            max_time = round_timedelta(max_time, bin_width, direction='up')
 
             # Histogram generates on entire qs, not just successful runs.
             report_data['clear_time'] = {
@@ -663,8 +695,8 @@ def drop_report(qs, **kwargs):
                 'avg': str(clear_time_aggs['avg']),
                 'chart': {
                     'type': 'histogram',
-                    'width': 5,
-                    'data': histogram(qs, 'clear_time', bins, slice_on='success'),
+                    'width': bin_width.total_seconds(),
+                    'data': clear_time_histogram(qs, min_time, max_time, bin_width),
                 }
             }
 
@@ -676,6 +708,44 @@ def drop_report(qs, **kwargs):
     return report_data
 
 
+def _drop_chance_margin(drop_chance, sample_size, population):
+    # Normal approximation of the confidence interval half-width of a drop chance percentage, with finite population correction
+    p = min(max(drop_chance / 100, 0), 1)
+    fpc = (population - sample_size) / (population - 1) if population > 1 else 0
+    return APPROXIMATE_CONFIDENCE_Z * sqrt(p * (1 - p) / sample_size * fpc) * 100
+
+
+def _add_drop_chance_margins(data, sample_size, population):
+    if isinstance(data, dict):
+        for value in data.values():
+            _add_drop_chance_margins(value, sample_size, population)
+    elif isinstance(data, list):
+        for row in data:
+            if isinstance(row, dict) and row.get('drop_chance') is not None:
+                row['drop_chance_margin'] = _drop_chance_margin(row['drop_chance'], sample_size, population)
+
+
+def approximate_drop_report(qs, **kwargs):
+    # Drop report estimated from a fixed size sample of the logs, with error bounds on drop rates
+    log_count = qs.count()
+    sampled, sample_rate = sample_records(qs, kwargs.get('sample_size', APPROXIMATE_SAMPLE_SIZE))
+    sample_size = sampled.count()
+
+    report_data = drop_report(sampled, **kwargs)
+    _add_drop_chance_margins(report_data['summary']['table'], sample_size, log_count)
+    _add_drop_chance_margins(report_data.get(models.ItemDrop.RELATED_NAME), sample_size, log_count)
+
+    report_data['approximate'] = {
+        'log_count': log_count,
+        'sample_size': sample_size,
+        'sample_rate': sample_rate,
+        'confidence': APPROXIMATE_CONFIDENCE,
+        'max_drop_chance_margin': _drop_chance_margin(50, sample_size, log_count) if sample_size else None,
+    }
+
+    return report_data
+
+
 def grade_summary_report(qs, grade_choices):
     report_data = []
 
@@ -684,69 +754,84 @@ def grade_summary_report(qs, grade_choices):
     # List of all drops. Currently only care about monsters and items
     all_items = GameItem.objects.filter(pk__in=drops['items'].values_list('item', flat=True)) if 'items' in drops else []
     all_monsters = Monster.objects.filter(pk__in=drops['monsters'].values_list('monster', flat=True)) if 'monsters' in drops else []
-    all_runes = drops['runes'] if 'runes' in drops else []
+
+    # Aggregate each drop type by (grade, drop) in a single query, then pivot the results by grade
+    log_counts = dict(qs.order_by().values_list('grade').annotate(count=Count('pk')))
+
+    item_results = {}
+    if 'items' in drops:
+        for result in drops['items'].order_by().values(grade=F('log__grade'), drop=F('item')).annotate(
+            count=Count('pk'),
+            min=Min('quantity'),
+            max=Max('quantity'),
+            avg=Avg('quantity'),
+            total=Sum('quantity'),
+        ):
+            item_results[(result['grade'], result['drop'])] = result
+
+    monster_results = {}
+    if 'monsters' in drops:
+        monster_results = {
+            (grade, monster): count for grade, monster, count in
+            drops['monsters'].order_by().values_list('log__grade', 'monster').annotate(count=Count('pk'))
+        }
+
+    rune_results = {}
+    if 'runes' in drops:
+        rune_results = {
+            (grade, stars): count for grade, stars, count in
+            drops['runes'].order_by().values_list('log__grade', 'stars').annotate(count=Count('pk'))
+        }
+    all_rune_stars = sorted({stars for grade, stars in rune_results.keys()}, reverse=True)
 
     for grade_id, grade_name in grade_choices:
-        grade_qs = qs.filter(grade=grade_id)
-        grade_run_count = grade_qs.count() if grade_qs.count() else 1
+        grade_log_count = log_counts.get(grade_id, 0)
+        grade_run_count = grade_log_count if grade_log_count else 1
 
         grade_report = {
             'grade': grade_name,
-            'log_count': grade_qs.count(),
+            'log_count': grade_log_count,
             'drops': [],
         }
         for item in all_items:
-            result = drops['items'].filter(
-                log__in=grade_qs,
-                item=item,
-            ).aggregate(
-                count=Count('pk'),
-                min=Min('quantity'),
-                max=Max('quantity'),
-                avg=Avg('quantity'),
-                drop_chance=Cast(Count('pk'), FloatField()) / grade_run_count * 100,
-                qty_per_100=Cast(Sum('quantity'), FloatField()) / grade_run_count * 100,
-            )
+            result = item_results.get((grade_id, item.pk), {})
+            count = result.get('count', 0)
+            total = result.get('total')
 
             grade_report['drops'].append({
                 'type': 'item',
                 'name': item.name,
                 'icon': item.icon,
-                **result,
+                'count': count,
+                'min': result.get('min'),
+                'max': result.get('max'),
+                'avg': result.get('avg'),
+                'drop_chance': float(count) / grade_run_count * 100,
+                'qty_per_100': float(total) / grade_run_count * 100 if total is not None else None,
             })
 
         for monster in all_monsters:
-            result = drops['monsters'].filter(
-                log__in=grade_qs,
-                monster=monster
-            ).aggregate(
-                count=Count('pk'),
-                drop_chance=Cast(Count('pk'), FloatField()) / grade_run_count * 100,
-                qty_per_100=Cast(Func(Count('pk'), 0, function='nullif'), FloatField()) / grade_run_count * 100,
-            )
+            count = monster_results.get((grade_id, monster.pk), 0)
 
             grade_report['drops'].append({
                 'type': 'monster',
                 'name': monster.name,
                 'icon': monster.image_filename,
                 'stars': monster.natural_stars,
-                **result,
+                'count': count,
+                'drop_chance': float(count) / grade_run_count * 100,
+                'qty_per_100': float(count) / grade_run_count * 100 if count else None,
             })
 
-        for stars in sorted(all_runes.values_list('stars', flat=True).distinct(), reverse=True):
-            result = drops['runes'].filter(
-                log__in=grade_qs,
-                stars=stars,
-            ).aggregate(
-                count=Count('pk'),
-                drop_chance=Cast(Count('pk'), FloatField()) / grade_run_count * 100,
-                qty_per_100=Cast(Func(Count('pk'), 0, function='nullif'), FloatField()) / grade_run_count * 100,
-            )
+        for stars in all_rune_stars:
+            count = rune_results.get((grade_id, stars), 0)
 
             grade_report['drops'].append({
                 'type': 'rune',
                 'name': f'{stars}⭐ Rune',
-                **result,
+                'count': count,
+                'drop_chance': float(count) / grade_run_count * 100,
+                'qty_per_100': float(count) / grade_run_count * 100 if count else None,
             })
 
         report_data.append(grade_report)
@@ -754,78 +839,392 @@ def grade_summary_report(qs, grade_choices):
     return report_data
 
 
+def _drop_rate(report, level, log_count, log_grade, drop_type, drop_count, quantity, **attributes):
+    drops_per_run = quantity / log_count
+    return models.LevelDropRate(
+        report=report,
+        level=level,
+        log_grade=log_grade,
+        drop_type=drop_type,
+        drop_count=drop_count,
+        quantity=quantity,
+        drop_chance=drop_count / log_count * 100,
+        drops_per_run=drops_per_run,
+        energy_cost=level.energy_cost,
+        drops_per_energy=drops_per_run / level.energy_cost if level.energy_cost else None,
+        sample_size=log_count,
+        **attributes
+    )
+
+
+def get_drop_rates(report, level, records, log_grade=None):
+    """
+    Per drop rates of a report's logs for the cross level drop rate index.
+
+    :return: list of unsaved LevelDropRate
+    """
+    log_count = records.count()
+    drops = get_drop_querysets(records)
+    rates = []
+
+    if 'items' in drops:
+        rates += [
+            _drop_rate(report, level, log_count, log_grade, models.LevelDropRate.DROP_ITEM, drop_count, quantity, item_id=item)
+            for item, drop_count, quantity in drops['items'].order_by().values_list('item').annotate(
+                drop_count=Count('log', distinct=True),
+                quantity=Sum('quantity'),
+            )
+        ]
+
+    if 'monsters' in drops:
+        rates += [
+            _drop_rate(report, level, log_count, log_grade, models.LevelDropRate.DROP_MONSTER, count, count, monster_id=monster, grade=grade)
+            for monster, grade, count in drops['monsters'].order_by().values_list('monster', 'grade').annotate(Count('pk'))
+        ]
+
+    if 'runes' in drops:
+        rates += [
+            _drop_rate(
+                report, level, log_count, log_grade, models.LevelDropRate.DROP_RUNE, count, count,
+                rune_type=rune_type, grade=stars, rune_quality=quality,
+            )
+            for rune_type, stars, quality, count in drops['runes'].order_by().values_list('type', 'stars', 'quality').annotate(Count('pk'))
+        ]
+
+    return rates
+
+
+def _update_drop_rate_index(level, drop_rates):
+    # Only the latest report of each level is indexed. Replaced in one transaction so readers never see the level missing.
+    with transaction.atomic():
+        models.LevelDropRate.objects.filter(level=level).delete()
+        models.LevelDropRate.objects.bulk_create(drop_rates)
+
+
+def _slice_records(qs, **kwargs):
+    # Same as slice_records(), also returning the chosen (window start, reason) for the generation audit
+    window = get_slice_window(qs, **kwargs)
+
+    if window[0] is None:
+        return qs, window
+
+    return qs.filter(timestamp__gte=window[0]), window
+
+
 def _generate_level_reports(model, **kwargs):
     content_type = ContentType.objects.get_for_model(model)
     levels = model.objects.values_list('level', flat=True).distinct().order_by()
 
     for level in Level.objects.filter(pk__in=levels):
-        records = slice_records(model.objects.filter(level=level, success=True), minimum_count=2500, report_timespan=timedelta(weeks=2))
-
-        if records.count() > 0:
-            report_data = drop_report(records, **kwargs)
-
-            models.LevelReport.objects.create(
-                level=level,
-                content_type=content_type,
-                start_timestamp=records[records.count() - 1].timestamp,  # first() and last() do not work on sliced qs
-                end_timestamp=records[0].timestamp,
-                log_count=records.count(),
-                unique_contributors=records.aggregate(Count('wizard_id', distinct=True))['wizard_id__count'],
-                report=report_data,
+        report = None
+
+        with audit_generation() as audit:
+            records, slice_window = _slice_records(
+                model.objects.filter(level=level, success=True),
+                minimum_count=2500,
+                report_timespan=timedelta(weeks=2)
             )
+            log_count = records.count()
+
+            if log_count > 0:
+                audit.add_slice_window(*slice_window)
+
+                rate_records = records
+
+                if kwargs.get('approximate') and log_count > APPROXIMATE_MINIMUM_COUNT:
+                    # Drop rates are estimated from the same sample as the report
+                    rate_records, _ = sample_records(records, kwargs.get('sample_size', APPROXIMATE_SAMPLE_SIZE))
+                    report_data = approximate_drop_report(records, **kwargs)
+                    unique_contributors = approx_count_distinct(records, 'wizard_id')
+                    report_data['approximate']['unique_contributors_error'] = 1.04 / sqrt(2 ** HLL_PRECISION)
+                else:
+                    report_data = drop_report(records, **kwargs)
+                    unique_contributors = records.aggregate(Count('wizard_id', distinct=True))['wizard_id__count']
+
+                report_data['charts'] = render_report_charts(report_data)
+
+                report = models.LevelReport.objects.create(
+                    level=level,
+                    content_type=content_type,
+                    start_timestamp=records[log_count - 1].timestamp,  # first() and last() do not work on sliced qs
+                    end_timestamp=records[0].timestamp,
+                    log_count=log_count,
+                    unique_contributors=unique_contributors,
+                    report=report_data,
+                )
+                _update_drop_rate_index(level, get_drop_rates(report, level, rate_records))
+
+        if report:
+            audit.save(report)
 
 
 def generate_dungeon_log_reports(**kwargs):
     _generate_level_reports(models.DungeonLog, **kwargs)
 
 
-def generate_rift_raid_reports():
-    _generate_level_reports(models.RiftRaidLog, include_currency=True, exclude_social_points=True)
+def generate_rift_raid_reports(**kwargs):
+    _generate_level_reports(models.RiftRaidLog, include_currency=True, exclude_social_points=True, **kwargs)
 
 
-def _generate_by_grade_reports(model):
+def _generate_by_grade_reports(model, **kwargs):
     content_type = ContentType.objects.get_for_model(model)
     levels = model.objects.values_list('level', flat=True).distinct().order_by()
 
     for level in Level.objects.filter(pk__in=levels):
-        all_records = model.objects.none()
-        report_data = {
-            'reports': []
-        }
+        report = None
 
-        # Generate a report by grade
-        for grade, grade_desc in model.GRADE_CHOICES:
-            records = slice_records(model.objects.filter(level=level, grade=grade), minimum_count=2500, report_timespan=timedelta(weeks=2))
+        with audit_generation() as audit:
+            all_records = model.objects.none()
+            grade_records = []
+            report_data = {
+                'reports': []
+            }
 
-            if records.count() > 0:
-                grade_report = drop_report(records)
-            else:
-                grade_report = None
+            # Generate a report by grade
+            for grade, grade_desc in model.GRADE_CHOICES:
+                records, slice_window = _slice_records(
+                    model.objects.filter(level=level, grade=grade),
+                    minimum_count=2500,
+                    report_timespan=timedelta(weeks=2)
+                )
 
-            report_data['reports'].append({
-                'grade': grade_desc,
-                'report': grade_report
-            })
-            all_records |= records
-
-        if all_records.count() > 0:
-            # Generate a report with all results for a complete list of all things that drop here
-            report_data['summary'] = grade_summary_report(all_records, model.GRADE_CHOICES)
-
-            models.LevelReport.objects.create(
-                level=level,
-                content_type=content_type,
-                start_timestamp=all_records.last().timestamp,
-                end_timestamp=all_records.first().timestamp,
-                log_count=all_records.count(),
-                unique_contributors=all_records.aggregate(Count('wizard_id', distinct=True))['wizard_id__count'],
-                report=report_data,
+                if records.count() > 0:
+                    audit.add_slice_window(*slice_window)
+                    grade_records.append((grade, records))
+                    grade_report = drop_report(records, **kwargs)
+                    grade_report['charts'] = render_report_charts(grade_report)
+                else:
+                    grade_report = None
+
+                report_data['reports'].append({
+                    'grade': grade_desc,
+                    'report': grade_report
+                })
+                all_records |= records
+
+            if all_records.count() > 0:
+                # Generate a report with all results for a complete list of all things that drop here
+                report_data['summary'] = grade_summary_report(all_records, model.GRADE_CHOICES)
+
+                report = models.LevelReport.objects.create(
+                    level=level,
+                    content_type=content_type,
+                    start_timestamp=all_records.last().timestamp,
+                    end_timestamp=all_records.first().timestamp,
+                    log_count=all_records.count(),
+                    unique_contributors=all_records.aggregate(Count('wizard_id', distinct=True))['wizard_id__count'],
+                    report=report_data,
+                )
+                _update_drop_rate_index(level, list(chain.from_iterable(
+                    get_drop_rates(report, level, records, log_grade=grade) for grade, records in grade_records
+                )))
+
+        if report:
+            audit.save(report)
+
+
+def generate_rift_dungeon_reports(**kwargs):
+    _generate_by_grade_reports(models.RiftDungeonLog, **kwargs)
+
+
+def generate_world_boss_dungeon_reports(**kwargs):
+    _generate_by_grade_reports(models.WorldBossLog, **kwargs)
+
+
+def _generate_grouped_reports(model, report_model, group_field, build_report):
+    """
+    Generate a report for each value of group_field, from the same recent slice of logs used for level reports.
+
+    :param build_report: function(records, log_count) returning the report data
+    """
+    content_type = ContentType.objects.get_for_model(model)
+    groups = model.objects.values_list(group_field, flat=True).distinct().order_by()
+
+    for group in groups:
+        report = None
+
+        with audit_generation() as audit:
+            records, slice_window = _slice_records(
+                model.objects.filter(**{group_field: group}),
+                minimum_count=2500,
+                report_timespan=timedelta(weeks=2)
             )
+            log_count = records.count()
+
+            if log_count > 0:
+                audit.add_slice_window(*slice_window)
+                report_data = build_report(records, log_count)
+                report_data['charts'] = render_report_charts(report_data)
+
+                report = report_model.objects.create(
+                    content_type=content_type,
+                    start_timestamp=records.last().timestamp,
+                    end_timestamp=records.first().timestamp,
+                    log_count=log_count,
+                    unique_contributors=records.aggregate(Count('wizard_id', distinct=True))['wizard_id__count'],
+                    report=report_data,
+                    **{group_field: group}
+                )
 
+        if report:
+            audit.save(report)
 
-def generate_rift_dungeon_reports():
-    _generate_by_grade_reports(models.RiftDungeonLog)
 
+def generate_magic_box_reports():
+    _generate_grouped_reports(
+        models.MagicBoxCraft,
+        models.MagicBoxReport,
+        'box_type',
+        lambda records, log_count: drop_report(records, include_currency=True),
+    )
+
+
+def generate_craft_rune_reports():
+    # Each log is a single crafted rune, so the logs themselves are the rune drops
+    _generate_grouped_reports(
+        models.CraftRuneLog,
+        models.CraftRuneReport,
+        'craft_level',
+        lambda records, log_count: {'runes': get_rune_report(records, log_count)},
+    )
+
+
+def _empty_summon_counters():
+    return {
+        'natural_stars': {},
+        'element': {},
+        'blessing_natural_stars': {},
+        'blessing_element': {},
+        'blessings_unchosen': 0,
+        'pending_blessings': [],
+        'recent_log_ids': [],
+        'contributor_registers': [0] * 2 ** HLL_PRECISION,
+    }
+
+
+def _add_summon_counts(counters, logs, prefix=''):
+    # Add logs to the natural stars and element counters. Counter keys are strings to survive a round trip through JSON.
+    for natural_stars, element, count in logs.order_by().values_list(
+        'monster__natural_stars', 'monster__element'
+    ).annotate(count=Count('pk')):
+        for key, value in [('natural_stars', natural_stars), ('element', element)]:
+            totals = counters[f'{prefix}{key}']
+            totals[str(value)] = totals.get(str(value), 0) + count
+
+
+def _counter_occurrences(totals, choices, sort_by_count=True):
+    choices = {str(value): name for value, name in choices}
+    data = [{'value': choices.get(value, value), 'count': count} for value, count in totals.items()]
+
+    if sort_by_count:
+        data.sort(key=lambda item: item['count'], reverse=True)
+    else:
+        data.sort(key=lambda item: item['value'])
+
+    return {
+        'type': 'occurrences',
+        'total': sum(totals.values()),
+        'data': transform_to_dict(data, name_key='value'),
+    }
+
+
+def summon_report(counters):
+    return {
+        'natural_stars': _counter_occurrences(counters['natural_stars'], Monster.STAR_CHOICES, sort_by_count=False),
+        'element': _counter_occurrences(counters['element'], Monster.ELEMENT_CHOICES),
+        'blessings': {
+            'chosen': sum(counters['blessing_element'].values()),
+            'unchosen': counters['blessings_unchosen'],
+            'pending': len(counters['pending_blessings']),
+            'natural_stars': _counter_occurrences(counters['blessing_natural_stars'], Monster.STAR_CHOICES, sort_by_count=False),
+            'element': _counter_occurrences(counters['blessing_element'], Monster.ELEMENT_CHOICES),
+        },
+    }
+
+
+def _update_summon_report(item, report, new_logs):
+    # Add new logs to the running counters of an item's report, rather than recounting all logs
+    counters = report.counters if report else _empty_summon_counters()
+    summons = new_logs.filter(blessing_id__isnull=True)
+    _add_summon_counts(counters, summons)
+
+    # Blessings only get a monster once the choice is logged, which may come after the report was last updated.
+    # Hold them as pending until then, giving up after SUMMON_BLESSING_TIMEOUT.
+    blessings = models.SummonLog.objects.filter(
+        Q(pk__in=counters['pending_blessings']) | Q(pk__in=new_logs.filter(blessing_id__isnull=False))
+    )
+    _add_summon_counts(counters, blessings.filter(monster__isnull=False), prefix='blessing_')
+    pending = blessings.filter(monster__isnull=True)
+    counters['blessings_unchosen'] += pending.filter(timestamp__lt=timezone.now() - SUMMON_BLESSING_TIMEOUT).count()
+    counters['pending_blessings'] = list(
+        pending.filter(timestamp__gte=timezone.now() - SUMMON_BLESSING_TIMEOUT).values_list('pk', flat=True)
+    )
+
+    counters['contributor_registers'] = merge_hll_registers(
+        counters['contributor_registers'],
+        hll_registers(new_logs, 'wizard_id'),
+    )
+
+    stats = new_logs.aggregate(count=Count('pk'), start=Min('timestamp'), end=Max('timestamp'))
+    if report is None:
+        report = models.SummonReport(
+            item=item,
+            content_type=ContentType.objects.get_for_model(models.SummonLog),
+            start_timestamp=stats['start'],
+            log_count=0,
+        )
+
+    report.end_timestamp = max(filter(None, [report.end_timestamp, stats['end']]))
+    report.log_count += stats['count']
+    report.unique_contributors = hll_estimate(counters['contributor_registers'])
+    report.counters = counters
+    report.report = summon_report(counters)
+    return report
+
+
+def generate_summon_reports():
+    """
+    Update the summon report for each summon item with SummonLogs received since the last update.
+    Reports are updated in place from running counters, so this is cheap enough to run every few minutes.
+
+    IDs are allocated before a log is committed, so a log can become visible with an ID below one already counted.
+    The last SUMMON_LOG_RESCAN_WINDOW IDs are scanned again each update, skipping the ones each report already counted.
+    """
+    reports = {report.item_id: report for report in models.SummonReport.objects.select_related('item')}
+    last_log_id = max([report.last_log_id for report in reports.values()], default=0)
+    newest_log_id = models.SummonLog.objects.aggregate(newest=Max('pk'))['newest'] or last_log_id
+    window_start = newest_log_id - SUMMON_LOG_RESCAN_WINDOW
+
+    new_logs = models.SummonLog.objects.filter(pk__lte=newest_log_id)
+    if reports:
+        new_logs = new_logs.filter(pk__gt=last_log_id - SUMMON_LOG_RESCAN_WINDOW)
+
+    items = set(new_logs.order_by().values_list('item', flat=True).distinct())
+    items |= {item for item, report in reports.items() if report.counters.get('pending_blessings')}
+
+    for item in GameItem.objects.filter(pk__in=items):
+        report = reports.get(item.pk)
+        item_logs = models.SummonLog.objects.filter(item=item, pk__lte=newest_log_id)
+        counted_ids = set()
+
+        if report:
+            counted_ids = set(report.counters.get('recent_log_ids', []))
+            item_logs = item_logs.filter(pk__gt=report.last_log_id - SUMMON_LOG_RESCAN_WINDOW).exclude(pk__in=counted_ids)
+
+        # Logs still within the window are fixed to a list of IDs, so a log committed during the update is neither
+        # counted nor recorded as counted
+        window_log_ids = set(item_logs.filter(pk__gt=window_start).values_list('pk', flat=True))
+        item_logs = item_logs.filter(Q(pk__lte=window_start) | Q(pk__in=window_log_ids))
+
+        if report and not report.counters.get('pending_blessings') and not item_logs.exists():
+            continue
+
+        with audit_generation() as audit:
+            report = _update_summon_report(item, report, item_logs)
+            report.last_log_id = newest_log_id
+            report.counters['recent_log_ids'] = sorted(
+                pk for pk in counted_ids | window_log_ids if pk > window_start
+            )
+            report.save()
 
-def generate_world_boss_dungeon_reports():
-    _generate_by_grade_reports(models.WorldBossLog)
\ No newline at end of file
+        audit.save(report)
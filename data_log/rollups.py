@@ -0,0 +1,210 @@
+from collections import Counter, defaultdict
+from datetime import datetime, time, timedelta
+from itertools import chain
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection, transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from herders.models import Summoner
+from . import models
+from .reports.generate import get_drop_querysets
+
+ROLLUP_MODELS = (models.DungeonLog, models.RiftDungeonLog)
+TIMESTAMP_FILTERS = ('timestamp__gte', 'timestamp__lte')
+ROLLUP_LOCK_NAMESPACE = 7001  # First key of the advisory locks serializing rollup rebuilds for a summoner
+
+
+def day_bounds(date):
+    # Days are split on local midnight, matching the dates shown throughout the site
+    start = timezone.make_aware(datetime.combine(date, time.min))
+    end = timezone.make_aware(datetime.combine(date + timedelta(days=1), time.min))
+    return start, end
+
+
+def completed_logs(model):
+    qs = model.objects.all()
+
+    if hasattr(model, 'success'):
+        # Exclude logs which only recorded a battle start
+        qs = qs.filter(success__isnull=False)
+
+    return qs
+
+
+def _aggregate_logs(logs):
+    # Log counts and drop totals for each level in the logs queryset
+    levels = defaultdict(lambda: {'log_count': 0, 'success_count': 0, 'items': [], 'monsters': [], 'runes': []})
+
+    counts = {'log_count': Count('pk')}
+    if hasattr(logs.model, 'success'):
+        counts['success_count'] = Count('pk', filter=Q(success=True))
+
+    for row in logs.order_by().values('level').annotate(**counts):
+        levels[row['level']]['log_count'] = row['log_count']
+        levels[row['level']]['success_count'] = row.get('success_count', row['log_count'])
+
+    drops = get_drop_querysets(logs)
+
+    if 'items' in drops:
+        for level, *item in drops['items'].order_by().values_list('log__level', 'item').annotate(Sum('quantity')):
+            levels[level]['items'].append(item)
+
+    if 'monsters' in drops:
+        for level, *monster in drops['monsters'].order_by().values_list('log__level', 'monster', 'grade').annotate(Count('pk')):
+            levels[level]['monsters'].append(monster)
+
+    if 'runes' in drops:
+        for level, *rune in drops['runes'].order_by().values_list('log__level', 'type', 'quality', 'stars').annotate(Count('pk')):
+            levels[level]['runes'].append(rune)
+
+    return levels
+
+
+def update_daily_rollups(summoner, model, timestamp):
+    """
+    Rebuild a summoner's drop rollups for the day containing timestamp.
+
+    :param summoner: Summoner who uploaded the logs
+    :param model: Log model, one of ROLLUP_MODELS
+    :param timestamp: Any datetime within the day to rebuild
+    """
+    date = timezone.localtime(timestamp).date()
+    start, end = day_bounds(date)
+    content_type = ContentType.objects.get_for_model(model)
+    logs = completed_logs(model).filter(summoner=summoner, timestamp__gte=start, timestamp__lt=end)
+
+    with transaction.atomic():
+        # Concurrent uploads by the same summoner rebuild one at a time, each from the logs committed before it.
+        # An advisory lock rather than a row lock, so the summoner row stays free for everything else.
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_advisory_xact_lock(%s, %s)', [ROLLUP_LOCK_NAMESPACE, summoner.pk])
+
+        models.DailyDropRollup.objects.filter(summoner=summoner, content_type=content_type, date=date).delete()
+        models.DailyDropRollup.objects.bulk_create([
+            models.DailyDropRollup(
+                summoner=summoner,
+                content_type=content_type,
+                level_id=level,
+                date=date,
+                **totals,
+            ) for level, totals in _aggregate_logs(logs).items()
+        ])
+
+
+def rebuild_daily_rollups(model, summoner=None):
+    """
+    Rebuild the drop rollups for every day with logs. Used to backfill rollups for logs uploaded before they existed.
+
+    :param model: Log model, one of ROLLUP_MODELS
+    :param summoner: Optionally limit the rebuild to a single summoner
+    :return: Generator yielding each rebuilt (summoner ID, date)
+    """
+    logs = completed_logs(model).filter(summoner__isnull=False)
+    if summoner:
+        logs = logs.filter(summoner=summoner)
+
+    days = logs.annotate(date=TruncDate('timestamp')).order_by('summoner', 'date').values_list('summoner', 'date').distinct()
+
+    for summoner_id, date in days.iterator():
+        update_daily_rollups(Summoner(pk=summoner_id), model, day_bounds(date)[0])
+        yield summoner_id, date
+
+
+def _full_day_range(timestamp_gte, timestamp_lte):
+    # Dates of the days lying entirely within the time range, as an inclusive (first, last) pair. None is unbounded.
+    first = last = None
+
+    if timestamp_gte:
+        local_start = timezone.localtime(timestamp_gte)
+        first = local_start.date()
+        if local_start != day_bounds(first)[0]:
+            first += timedelta(days=1)
+
+    if timestamp_lte:
+        local_end = timezone.localtime(timestamp_lte)
+        last = local_end.date()
+        # Time range filters have one second resolution, so a range ending at 23:59:59 covers the whole day
+        if day_bounds(last)[1] - local_end > timedelta(seconds=1):
+            last -= timedelta(days=1)
+
+    return first, last
+
+
+def get_drop_totals(summoner, model, filters):
+    """
+    Total a summoner's logs and drops, reading whole days from the daily rollups and only the partial days at the edges
+    of a time range from the raw logs.
+
+    :param summoner: Summoner to total
+    :param model: Log model
+    :param filters: Log queryset filters. Only level__ lookups and timestamp ranges can be answered from rollups.
+    :return: dict of per-level log counts and Counters of item quantities, monster and rune drops.
+    None if the filters cannot be answered by rollups and the caller must fall back to the raw logs.
+    """
+    if model not in ROLLUP_MODELS:
+        return None
+
+    filters = {key: value for key, value in filters.items() if value not in (None, '', [])}
+    if any(not key.startswith('level__') and key not in TIMESTAMP_FILTERS for key in filters):
+        return None
+
+    level_filters = {key: value for key, value in filters.items() if key.startswith('level__')}
+    timestamp_gte, timestamp_lte = [
+        parse_datetime(value) if isinstance(value, str) else value
+        for value in (filters.get('timestamp__gte'), filters.get('timestamp__lte'))
+    ]
+    first, last = _full_day_range(timestamp_gte, timestamp_lte)
+
+    rollups = models.DailyDropRollup.objects.filter(
+        summoner=summoner,
+        content_type=ContentType.objects.get_for_model(model),
+        **level_filters
+    )
+    raw_logs = completed_logs(model).filter(summoner=summoner, **level_filters)
+
+    if timestamp_gte:
+        raw_logs = raw_logs.filter(timestamp__gte=timestamp_gte)
+    if timestamp_lte:
+        raw_logs = raw_logs.filter(timestamp__lte=timestamp_lte)
+
+    if first is not None and last is not None and first > last:
+        # No whole days within the range
+        rollups = rollups.none()
+    else:
+        rolled_up_days = Q()
+        if first is not None:
+            rollups = rollups.filter(date__gte=first)
+            rolled_up_days &= Q(timestamp__gte=day_bounds(first)[0])
+        if last is not None:
+            rollups = rollups.filter(date__lte=last)
+            rolled_up_days &= Q(timestamp__lt=day_bounds(last)[1])
+
+        # Days not fully covered by the range are counted from raw logs
+        raw_logs = raw_logs.exclude(rolled_up_days) if rolled_up_days else raw_logs.none()
+
+    totals = {
+        'levels': defaultdict(Counter),
+        'items': Counter(),
+        'monsters': Counter(),
+        'runes': Counter(),
+    }
+    rows = chain(
+        rollups.values_list('level', 'log_count', 'success_count', 'items', 'monsters', 'runes'),
+        (
+            (level, raw['log_count'], raw['success_count'], raw['items'], raw['monsters'], raw['runes'])
+            for level, raw in _aggregate_logs(raw_logs).items()
+        ),
+    )
+
+    for level, log_count, success_count, items, monsters, runes in rows:
+        totals['levels'][level].update(log_count=log_count, success_count=success_count)
+        totals['items'].update({item: quantity for item, quantity in items})
+        totals['monsters'].update({(monster, grade): count for monster, grade, count in monsters})
+        totals['runes'].update({(rune_type, quality, stars): count for rune_type, quality, stars, count in runes})
+
+    return totals
+
@@ -0,0 +1,50 @@
+from rest_framework import serializers
+
+from . import models
+from .export import EXPORT_DATASETS
+
+
+class LevelDropRateSerializer(serializers.ModelSerializer):
+    drop_type = serializers.CharField(source='get_drop_type_display')
+    rune_type = serializers.CharField(source='get_rune_type_display')
+    rune_quality = serializers.CharField(source='get_rune_quality_display')
+
+    class Meta:
+        model = models.LevelDropRate
+        fields = [
+            'id',
+            'report',
+            'level',
+            'log_grade',
+            'drop_type',
+            'item',
+            'monster',
+            'grade',
+            'rune_type',
+            'rune_quality',
+            'drop_count',
+            'quantity',
+            'drop_chance',
+            'drops_per_run',
+            'energy_cost',
+            'drops_per_energy',
+            'sample_size',
+        ]
+
+
+class LevelDropRateTotalSerializer(serializers.Serializer):
+    # Drop rates of all matching drops summed per level, e.g. all 6* Violent runes regardless of quality
+    level = serializers.IntegerField()
+    log_grade = serializers.IntegerField()
+    drops_per_run = serializers.FloatField()
+    energy_cost = serializers.IntegerField()
+    drops_per_energy = serializers.FloatField()
+    sample_size = serializers.IntegerField()
+
+
+class DungeonLogExportSerializer(serializers.Serializer):
+    dataset = serializers.ChoiceField(choices=EXPORT_DATASETS, default='logs')
+    level = serializers.IntegerField(required=False)
+    start = serializers.DateTimeField(required=False)
+    end = serializers.DateTimeField(required=False)
+    compress = serializers.BooleanField(default=True)
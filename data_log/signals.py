@@ -0,0 +1,22 @@
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import LevelReport
+
+
+@receiver(post_save, sender=LevelReport)
+def update_latest_level_report(sender, instance, created, **kwargs):
+    if created:
+        # Only once committed, so a rolled back report is never cached as the latest
+        transaction.on_commit(lambda: cache.set(
+            LevelReport.latest_cache_key(instance.level_id),
+            (instance.pk, instance.content_type_id),
+            LevelReport.LATEST_CACHE_TIMEOUT
+        ))
+
+
+@receiver(post_delete, sender=LevelReport)
+def clear_latest_level_report(sender, instance, **kwargs):
+    LevelReport.clear_latest_ids(instance.level_id)
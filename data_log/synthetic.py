@@ -0,0 +1,209 @@
+import random
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from bestiary.models import Dungeon, GameItem, Level, Monster, Rune, RuneCraft
+from . import models
+
+SERVERS = list(models.LogEntry.TIMEZONE_SERVER_MAP.values())
+RUNE_TYPES = [rune_type for rune_type, _ in Rune.TYPE_CHOICES]
+RUNE_STARS = ([4, 5, 6], [50, 40, 10])
+RUNE_QUALITY = ([0, 1, 2, 3, 4], [5, 30, 35, 20, 10])
+GRADES = [grade for grade, _ in models.RiftDungeonLog.GRADE_CHOICES]
+GRADE_WEIGHTS = [1, 1, 2, 2, 3, 4, 6, 8, 10, 12, 8, 4]
+
+
+class SyntheticLogGenerator:
+    """
+    Populates the database with randomized but plausible data logs and drops for load testing report generation.
+    Requires bestiary data (levels, monsters and game items) to already be present.
+    """
+
+    def __init__(self, num_wizards=5000, days=14, batch_size=5000, seed=None):
+        self.rng = random.Random(seed)
+        self.num_wizards = num_wizards
+        self.timespan = timedelta(days=days)
+        self.batch_size = batch_size
+        self.now = timezone.now()
+
+        self.mana = GameItem.objects.filter(category=GameItem.CATEGORY_CURRENCY, name='Mana').first()
+        self.craft_items = list(GameItem.objects.filter(
+            category__in=[GameItem.CATEGORY_ESSENCE, GameItem.CATEGORY_CRAFT_STUFF, GameItem.CATEGORY_SUMMON_SCROLL]
+        ))
+        self.monsters = list(Monster.objects.filter(obtainable=True, natural_stars__lte=3))
+
+        if not self.craft_items or not self.monsters:
+            raise ValueError('Bestiary game items and monsters are required to generate synthetic logs')
+
+    # Common log data
+    def _log_entry(self, model, level):
+        return model(
+            wizard_id=self.rng.randint(1, self.num_wizards),
+            server=self.rng.choice(SERVERS),
+            timestamp=self.now - self.timespan * self.rng.random(),
+            level=level,
+        )
+
+    def _clear_time(self, average=60, std_dev=15):
+        return timedelta(seconds=max(5.0, self.rng.gauss(average, std_dev)))
+
+    # Drops
+    def _item_drop(self, model, item=None, quantity=None):
+        return model(
+            item=item or self.rng.choice(self.craft_items),
+            quantity=quantity or self.rng.randint(1, 5),
+        )
+
+    def _monster_drop(self, model):
+        monster = self.rng.choice(self.monsters)
+        return model(
+            monster=monster,
+            grade=monster.natural_stars,
+            level=1,
+        )
+
+    def _rune_drop(self, model):
+        stars = self.rng.choices(*RUNE_STARS)[0]
+        slot = self.rng.randint(1, 6)
+        main_stat = self.rng.choice(Rune.MAIN_STATS_BY_SLOT[slot])
+        available_stats = [stat for stat in Rune.SUBSTAT_INCREMENTS.keys() if stat != main_stat]
+        self.rng.shuffle(available_stats)
+
+        num_substats = self.rng.choices(*RUNE_QUALITY)[0]
+        innate_stat = available_stats.pop() if self.rng.random() < 0.3 else None
+        substats = available_stats[:num_substats]
+
+        rune = model(
+            type=self.rng.choice(RUNE_TYPES),
+            stars=stars,
+            level=0,
+            slot=slot,
+            original_quality=num_substats,
+            value=self.rng.randint(1000, 6000) * stars,
+            main_stat=main_stat,
+            innate_stat=innate_stat,
+            innate_stat_value=self.rng.randint(1, Rune.SUBSTAT_INCREMENTS[innate_stat][stars]) if innate_stat else None,
+            substats=substats,
+            substat_values=[self.rng.randint(1, Rune.SUBSTAT_INCREMENTS[stat][stars]) for stat in substats],
+            substats_enchanted=[False] * len(substats),
+            substats_grind_value=[0] * len(substats),
+        )
+        # bulk_create() bypasses save(), so calculate the derived fields here
+        rune.update_fields()
+        return rune
+
+    def _rune_craft_drop(self, model):
+        craft_type = self.rng.choice(RuneCraft.CRAFT_GRINDSTONES + RuneCraft.CRAFT_ENCHANT_GEMS)
+        return model(
+            type=craft_type,
+            rune=self.rng.choice(RUNE_TYPES),
+            stat=self.rng.choice(list(Rune.SUBSTAT_INCREMENTS.keys())),
+            quality=self.rng.choices(*RUNE_QUALITY)[0],
+        )
+
+    # Log generation
+    def _create_in_batches(self, count, make_log):
+        created = 0
+
+        while created < count:
+            batch_logs = []
+            batch_drops = {}
+
+            for _ in range(min(self.batch_size, count - created)):
+                log, drops = make_log()
+                batch_logs.append(log)
+
+                for drop in drops:
+                    batch_drops.setdefault(drop.__class__, []).append((log, drop))
+
+            with transaction.atomic():
+                log_model = batch_logs[0].__class__
+                log_model.objects.bulk_create(batch_logs)
+
+                for drop_model, drops in batch_drops.items():
+                    for log, drop in drops:
+                        drop.log = log
+                    drop_model.objects.bulk_create([drop for _, drop in drops])
+
+            created += len(batch_logs)
+            yield created
+
+    def dungeon_logs(self, count):
+        levels = list(Level.objects.filter(dungeon__category=Dungeon.CATEGORY_CAIROS))
+        if not levels:
+            raise ValueError('No Cairos dungeon levels found')
+
+        def make_log():
+            log = self._log_entry(models.DungeonLog, self.rng.choice(levels))
+            log.success = self.rng.random() < 0.9
+            log.clear_time = self._clear_time()
+            drops = []
+
+            if log.success:
+                if self.mana:
+                    drops.append(self._item_drop(models.DungeonItemDrop, self.mana, self.rng.randint(2000, 8000)))
+
+                roll = self.rng.random()
+                if roll < 0.6:
+                    drops.append(self._rune_drop(models.DungeonRuneDrop))
+                elif roll < 0.65:
+                    drops.append(self._monster_drop(models.DungeonMonsterDrop))
+                elif roll < 0.7:
+                    drops.append(self._rune_craft_drop(models.DungeonRuneCraftDrop))
+                else:
+                    drops.append(self._item_drop(models.DungeonItemDrop))
+
+            return log, drops
+
+        return self._create_in_batches(count, make_log)
+
+    def rift_dungeon_logs(self, count):
+        levels = list(Level.objects.filter(dungeon__category=Dungeon.CATEGORY_RIFT_OF_WORLDS_BEASTS))
+        if not levels:
+            raise ValueError('No Rift Beast levels found')
+
+        def make_log():
+            log = self._log_entry(models.RiftDungeonLog, self.rng.choice(levels))
+            log.grade = self.rng.choices(GRADES, GRADE_WEIGHTS)[0]
+            log.total_damage = self.rng.randint(100000, 5000000)
+            log.clear_time = self._clear_time(average=150, std_dev=30)
+            log.success = self.rng.random() < 0.95
+            drops = [self._item_drop(models.RiftDungeonItemDrop) for _ in range(self.rng.randint(1, 3))]
+
+            roll = self.rng.random()
+            if roll < 0.4:
+                drops.append(self._rune_drop(models.RiftDungeonRuneDrop))
+            elif roll < 0.6:
+                drops.append(self._rune_craft_drop(models.RiftDungeonRuneCraftDrop))
+            elif roll < 0.65:
+                drops.append(self._monster_drop(models.RiftDungeonMonsterDrop))
+
+            return log, drops
+
+        return self._create_in_batches(count, make_log)
+
+    def world_boss_logs(self, count):
+        level = Level.objects.filter(dungeon__category=Dungeon.CATEGORY_WORLD_BOSS, floor=1).first()
+        if not level:
+            raise ValueError('No World Boss level found')
+
+        def make_log():
+            log = self._log_entry(models.WorldBossLog, level)
+            log.grade = self.rng.choices(GRADES, GRADE_WEIGHTS)[0]
+            log.damage = self.rng.randint(1000000, 20000000)
+            log.battle_points = self.rng.randint(10000, 300000)
+            log.bonus_battle_points = self.rng.randint(0, 50000)
+            log.avg_monster_level = self.rng.uniform(30, 40)
+            log.monster_count = 15
+            drops = [self._item_drop(models.WorldBossLogItemDrop) for _ in range(self.rng.randint(1, 3))]
+
+            if self.rng.random() < 0.5:
+                drops.append(self._rune_drop(models.WorldBossLogRuneDrop))
+            if self.rng.random() < 0.05:
+                drops.append(self._monster_drop(models.WorldBossLogMonsterDrop))
+
+            return log, drops
+
+        return self._create_in_batches(count, make_log)
@@ -6,15 +6,24 @@ from django.utils import timezone
 
 from .models import DungeonLog, RiftRaidLog, WorldBossLog
 from .reports.generate import generate_dungeon_log_reports, generate_rift_raid_reports, generate_rift_dungeon_reports, \
-    generate_world_boss_dungeon_reports
+    generate_world_boss_dungeon_reports, generate_summon_reports, generate_magic_box_reports, generate_craft_rune_reports
 
 
 @shared_task
-def generate_all_reports():
-    generate_dungeon_log_reports()
-    generate_rift_raid_reports()
+def generate_all_reports(approximate=False):
+    # Approximate mode estimates reports for very high volume levels from a sample of the logs
+    generate_dungeon_log_reports(approximate=approximate)
+    generate_rift_raid_reports(approximate=approximate)
     generate_rift_dungeon_reports()
     generate_world_boss_dungeon_reports()
+    generate_magic_box_reports()
+    generate_craft_rune_reports()
+
+
+@shared_task
+def update_summon_reports():
+    # Incremental, so can be scheduled every few minutes for near real time summon rates
+    generate_summon_reports()
 
 
 @shared_task
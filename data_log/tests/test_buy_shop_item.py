@@ -1,4 +1,7 @@
+from django.utils import timezone
+
 from data_log import models
+from data_log.reports.generate import generate_craft_rune_reports, generate_magic_box_reports
 from .test_log_views import BaseLogTest
 
 
@@ -18,6 +21,17 @@ class CraftRuneTests(BaseLogTest):
         log = models.CraftRuneLog.objects.first()
         self.assertEqual(log.craft_level, models.CraftRuneLog.CRAFT_HIGH)
 
+    def test_craft_rune_report(self):
+        self._do_log('BuyShopItem/craft_rune_low.json')
+        models.CraftRuneLog.objects.update(timestamp=timezone.now())
+        generate_craft_rune_reports()
+
+        report = models.CraftRuneReport.objects.get()
+        self.assertEqual(report.craft_level, models.CraftRuneLog.CRAFT_LOW)
+        self.assertEqual(report.log_count, models.CraftRuneLog.objects.count())
+        self.assertIn('type', report.report['runes'])
+        self.assertIn('type', report.report['charts']['runes'])
+
 
 class CraftMagicBoxTests(BaseLogTest):
     fixtures = ['gameitem_initial']
@@ -52,6 +66,17 @@ class CraftMagicBoxTests(BaseLogTest):
         log = models.MagicBoxCraft.objects.first()
         self.assertEqual(log.items.count(), 4)
 
+    def test_magic_box_report(self):
+        self._do_log('BuyShopItem/craft_magic_box_mystical.json')
+        models.MagicBoxCraft.objects.update(timestamp=timezone.now())
+        generate_magic_box_reports()
+
+        report = models.MagicBoxReport.objects.get()
+        self.assertEqual(report.box_type, models.MagicBoxCraft.BOX_MYSTICAL_MAGIC)
+        self.assertEqual(report.log_count, 1)
+        self.assertTrue(report.report['summary']['table'])
+        self.assertEqual(list(models.MagicBoxReport.get_latest_reports()), [report])
+
 
 class BuyShopItemTests(BaseLogTest):
     def test_discarding_items_not_logged(self):
@@ -0,0 +1,57 @@
+from django.conf import settings
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from bestiary.models import Level
+from data_log import export, models
+
+
+class ExportTests(SimpleTestCase):
+    def test_unknown_dataset(self):
+        with self.assertRaises(ValueError):
+            export.get_export_queryset('summoners')
+
+    def test_stream_validates_before_iterating(self):
+        with self.assertRaises(ValueError):
+            export.stream_export('summoners')
+
+    def test_drop_datasets_available(self):
+        self.assertIn('logs', export.EXPORT_DATASETS)
+        self.assertIn('runes', export.EXPORT_DATASETS)
+
+    def test_writes_collected_into_chunks(self):
+        chunks = []
+        writer = export._ChunkWriter(chunks.append, chunk_size=4)
+        writer.write(b'ab')
+        self.assertEqual(chunks, [])
+        writer.write(b'cde')
+        writer.write(b'f')
+        writer.flush()
+        self.assertEqual(chunks, [b'abcde', b'f'])
+
+
+class AnonymizedExportTests(TestCase):
+    fixtures = ['test_levels']
+
+    def setUp(self):
+        level = Level.objects.first()
+        for wizard_id in [1, 1, 2]:
+            models.DungeonLog.objects.create(wizard_id=wizard_id, level=level, success=True, timestamp=timezone.now())
+
+    def test_contributor_replaces_wizard_id(self):
+        rows = list(export.get_export_queryset('logs'))
+        self.assertNotIn('wizard_id', rows[0])
+        self.assertNotIn('summoner_id', rows[0])
+
+        # Stable for one wizard, distinct between wizards
+        self.assertEqual(rows[0]['contributor'], rows[1]['contributor'])
+        self.assertNotEqual(rows[0]['contributor'], rows[2]['contributor'])
+        self.assertNotIn(rows[0]['contributor'], ['1', '2'])
+
+    def test_copy_sql(self):
+        sql = export.get_copy_sql(export.get_export_queryset('logs'))
+        self.assertTrue(sql.startswith('COPY (SELECT '))
+        self.assertTrue(sql.endswith(') TO STDOUT WITH (FORMAT csv, HEADER)'))
+        self.assertIn('md5(', sql.lower())
+        self.assertIn(export._contributor_salt(), sql)
+        self.assertNotIn(settings.SECRET_KEY, sql)
@@ -1,5 +1,8 @@
+import csv
 import json
+from datetime import datetime, timedelta
 
+import pytz
 from django.contrib.auth.models import User
 from django.test import TestCase
 from rest_framework.authtoken.models import Token
@@ -8,7 +11,9 @@ from rest_framework.test import APIRequestFactory
 
 from data_log import views, models
 from data_log.game_commands import accepted_api_params
+from data_log.util import get_data_log_version
 from herders.models import Summoner
+from herders.pagination import KeysetPage
 
 
 class BaseLogTest(TestCase):
@@ -142,6 +147,15 @@ class LogDataViewTests(BaseLogTest):
         self.assertEqual(log.summoner, u.summoner)
         self.assertEqual(log.wizard_id, 123)
 
+    def test_log_bumps_data_log_version(self):
+        u = User.objects.create(username='t')
+        Summoner.objects.create(user=u, com2us_id=123)
+        version = get_data_log_version(u.summoner.pk)
+
+        self._do_log('SummonUnit/scroll_unknown_qty1.json')
+
+        self.assertNotEqual(get_data_log_version(u.summoner.pk), version)
+
     def test_authenticated_log(self):
         u = User.objects.create(username='t')
         Summoner.objects.create(user=u)
@@ -166,3 +180,64 @@ class LogDataViewTests(BaseLogTest):
             )
             response = view(request)
             self.assertTrue(response.data.get('reinit'))
+
+
+class LogHistoryTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='tester')
+        self.summoner = Summoner.objects.create(user=self.user, com2us_id=123)
+
+        # Oldest first, with three logs sharing a timestamp
+        timestamp = datetime(2020, 1, 1, tzinfo=pytz.utc)
+        self.logs = [
+            models.ShopRefreshLog.objects.create(wizard_id=123, summoner=self.summoner, timestamp=timestamp + offset)
+            for offset in [timedelta(0)] + [timedelta(hours=1)] * 3 + [timedelta(hours=2)]
+        ]
+        self.newest_first = self.logs[::-1]
+
+    def _page(self, **kwargs):
+        return KeysetPage(models.ShopRefreshLog.objects.filter(summoner=self.summoner), 2, **kwargs)
+
+    def test_first_page(self):
+        page = self._page()
+        self.assertEqual(page.object_list, self.newest_first[:2])
+        self.assertFalse(page.has_previous)
+        self.assertIsNone(page.previous_cursor)
+        self.assertTrue(page.has_next)
+
+    def test_next_pages_split_tied_timestamps(self):
+        first = self._page()
+        second = self._page(after=first.next_cursor)
+        self.assertEqual(second.object_list, self.newest_first[2:4])
+        self.assertTrue(second.has_previous)
+        self.assertTrue(second.has_next)
+
+        last = self._page(after=second.next_cursor)
+        self.assertEqual(last.object_list, self.newest_first[4:])
+        self.assertFalse(last.has_next)
+        self.assertIsNone(last.next_cursor)
+
+    def test_previous_page(self):
+        second = self._page(after=self._page().next_cursor)
+        previous = self._page(before=second.previous_cursor)
+        self.assertEqual(previous.object_list, self.newest_first[:2])
+        self.assertFalse(previous.has_previous)
+        self.assertTrue(previous.has_next)
+
+    def test_cursor_round_trip(self):
+        log = self.logs[1]
+        self.assertEqual(KeysetPage.decode_cursor(KeysetPage.encode_cursor(log)), (log.timestamp, log.pk))
+        self.assertIsNone(KeysetPage.decode_cursor('invalid'))
+        self.assertIsNone(KeysetPage.decode_cursor(None))
+
+    def test_table_export(self):
+        self.client.force_login(self.user)
+        response = self.client.get(
+            reverse('herders:data_log_magic_shop_table', kwargs={'profile_name': 'tester'}),
+            {'export': 'csv'},
+        )
+        self.assertEqual(response['Content-Type'], 'text/csv')
+
+        rows = list(csv.reader(b''.join(response.streaming_content).decode().splitlines()))
+        ids = [int(row[rows[0].index('id')]) for row in rows[1:]]
+        self.assertEqual(ids, [log.pk for log in self.newest_first])
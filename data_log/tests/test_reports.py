@@ -0,0 +1,252 @@
+from datetime import timedelta
+
+import numpy as np
+from django.core.cache import cache
+from django.db import transaction
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+from django.utils import timezone
+from django_pivot.histogram import histogram
+
+from bestiary.models import Artifact, Level, Rune
+from data_log import models
+from data_log.reports import generate
+from data_log.reports.audit import GenerationAudit
+from data_log.reports.charts import render_report_charts
+from data_log.templatetags import report_charts
+from data_log.util import hll_estimate, merge_hll_registers
+
+
+class OccurrencesTests(SimpleTestCase):
+    def test_counts_sorted_by_count(self):
+        values = generate._int_array([1, 2, 2, 6, 6, 6])
+        data = generate._occurrences(values, name_key='stat')
+        self.assertEqual(list(data.items()), [(6, 3), (2, 2), (1, 1)])
+
+    def test_counts_sorted_by_value(self):
+        values = generate._int_array([6, 6, 1, 2, 2, 6])
+        data = generate._occurrences(values, sort_by_count=False, name_key='stat')
+        self.assertEqual(list(data.keys()), [1, 2, 6])
+
+    def test_min_count_filter(self):
+        values = generate._int_array([1, 2, 2, 6, 6, 6])
+        data = generate._occurrences(values, min_count=1, name_key='stat')
+        self.assertNotIn(1, data)
+        self.assertEqual(data[2], 2)
+
+    def test_choices_replaced(self):
+        values = generate._int_array([Rune.STAT_HP, Rune.STAT_SPD, Rune.STAT_SPD])
+        data = generate._occurrences(values, choices=Rune.STAT_CHOICES, name_key='stat')
+        self.assertEqual(data, {'SPD': 2, 'HP': 1})
+
+    def test_nulls_counted(self):
+        values = generate._int_array([None, Rune.STAT_HP, None])
+        data = generate._occurrences(values, choices=Rune.STAT_CHOICES, name_key='stat')
+        self.assertEqual(data, {'None': 2, 'HP': 1})
+
+    def test_string_values(self):
+        values = np.array(['fire', 'wind', 'fire'], dtype=object)
+        data = generate._occurrences(values, choices=Artifact.ELEMENT_CHOICES, name_key='element')
+        self.assertEqual(data, {'Fire': 2, 'Wind': 1})
+
+    def test_flattened_arrays(self):
+        values = generate._flat_int_array([[1, 2], [], [2, 3, 4]])
+        self.assertEqual(values.tolist(), [1, 2, 2, 3, 4])
+
+
+class DropChanceMarginTests(SimpleTestCase):
+    def test_full_population_has_no_error(self):
+        self.assertEqual(generate._drop_chance_margin(50, 1000, 1000), 0)
+
+    def test_margin_shrinks_with_sample_size(self):
+        small_sample = generate._drop_chance_margin(50, 100, 100000)
+        large_sample = generate._drop_chance_margin(50, 10000, 100000)
+        self.assertGreater(small_sample, large_sample)
+        self.assertAlmostEqual(small_sample, 9.8, places=1)
+
+    def test_margins_added_to_table_rows(self):
+        table = {
+            'items': [{'name': 'Mana', 'drop_chance': 100.0}, {'name': 'Crystal', 'drop_chance': 25.0}],
+            'runes': {'sets': [{'type': 'Energy', 'count': 3}]},
+        }
+        generate._add_drop_chance_margins(table, 1000, 100000)
+        self.assertEqual(table['items'][0]['drop_chance_margin'], 0)
+        self.assertGreater(table['items'][1]['drop_chance_margin'], 0)
+        self.assertNotIn('drop_chance_margin', table['runes']['sets'][0])
+
+
+class RenderReportChartsTests(SimpleTestCase):
+    report_data = {
+        'summary': {
+            'chart': [{'name': 'Mana', 'count': 10}],
+            'table': {},
+        },
+        'runes': {
+            'type': {'type': 'occurrences', 'total': 3, 'data': {'Energy': 2, 'Swift': 1}},
+            'stars': {'type': 'occurrences', 'total': 3, 'data': {6: 3}},
+        },
+        'rune_crafts': {
+            'grindstone': None,
+            'gem': {'stat': {'type': 'occurrences', 'total': 1, 'data': {'SPD': 1}}},
+        },
+    }
+
+    def test_charts_match_template_tag(self):
+        charts = render_report_charts(self.report_data)
+        self.assertEqual(
+            charts['runes']['type'],
+            report_charts.chart(self.report_data['runes']['type'], type='pie', title='Rune Set', sorted='rune'),
+        )
+        self.assertEqual(charts['summary'], report_charts.drop_summary(self.report_data['summary']['chart']))
+
+    def test_missing_sections_skipped(self):
+        charts = render_report_charts(self.report_data)
+        self.assertNotIn('artifacts', charts)
+        self.assertNotIn('slot', charts['runes'])
+        self.assertEqual(list(charts['rune_crafts'].keys()), ['gem'])
+
+    def test_template_tag_uses_rendered_chart(self):
+        self.assertEqual(report_charts.chart(self.report_data['runes']['type'], rendered='{}', type='pie'), '{}')
+
+
+class SummonReportDataTests(SimpleTestCase):
+    def test_report_from_counters(self):
+        counters = generate._empty_summon_counters()
+        counters['natural_stars'] = {'3': 5, '1': 20, '2': 10}
+        counters['element'] = {'fire': 20, 'light': 1}
+        counters['blessing_element'] = {'dark': 2}
+
+        report = generate.summon_report(counters)
+        self.assertEqual(list(report['natural_stars']['data'].keys()), ['1⭐', '2⭐', '3⭐'])
+        self.assertEqual(report['natural_stars']['total'], 35)
+        self.assertEqual(report['element']['data'], {'Fire': 20, 'Light': 1})
+        self.assertEqual(report['blessings']['chosen'], 2)
+
+    def test_merged_registers(self):
+        self.assertEqual(merge_hll_registers([0, 3, 1], [2, 1, 1]), [2, 3, 1])
+        self.assertEqual(hll_estimate([0] * 16), 0)
+
+
+class DropRateTests(SimpleTestCase):
+    def test_rates_per_run_and_energy(self):
+        level = Level(energy_cost=8)
+        rate = generate._drop_rate(
+            models.LevelReport(), level, 200, None, models.LevelDropRate.DROP_ITEM, 50, 150, item_id=1
+        )
+        self.assertEqual(rate.drop_chance, 25)
+        self.assertEqual(rate.drops_per_run, 0.75)
+        self.assertEqual(rate.drops_per_energy, 0.75 / 8)
+        self.assertEqual(rate.sample_size, 200)
+
+    def test_no_energy_cost(self):
+        rate = generate._drop_rate(
+            models.LevelReport(), Level(), 10, 3, models.LevelDropRate.DROP_RUNE, 1, 1, rune_type=Rune.TYPE_VIOLENT
+        )
+        self.assertIsNone(rate.drops_per_energy)
+        self.assertEqual(rate.log_grade, 3)
+
+
+class GenerationAuditTests(SimpleTestCase):
+    class FakeCursor:
+        def __init__(self, rowcount):
+            self.rowcount = rowcount
+
+    def _execute(self, audit, rowcount):
+        return audit(lambda *args: 'result', 'SELECT 1', None, False, {'cursor': self.FakeCursor(rowcount)})
+
+    def test_counts_queries_and_rows(self):
+        audit = GenerationAudit()
+        self.assertEqual(self._execute(audit, 10), 'result')
+        self._execute(audit, 5)
+        self.assertEqual(audit.query_count, 2)
+        self.assertEqual(audit.rows_scanned, 15)
+
+    def test_unknown_rowcount_ignored(self):
+        audit = GenerationAudit()
+        self._execute(audit, -1)
+        self.assertEqual(audit.query_count, 1)
+        self.assertEqual(audit.rows_scanned, 0)
+
+
+class LatestLevelReportTests(TransactionTestCase):
+    # The latest report is cached on commit, which TestCase never does
+    fixtures = ['test_levels']
+
+    def setUp(self):
+        cache.clear()
+        self.level = Level.objects.first()
+
+    def _create_report(self):
+        return models.LevelReport.objects.create(
+            level=self.level,
+            start_timestamp=timezone.now(),
+            end_timestamp=timezone.now(),
+            log_count=0,
+            unique_contributors=0,
+            report={},
+        )
+
+    def test_no_report(self):
+        self.assertEqual(models.LevelReport.get_latest_ids(self.level.pk), (None, None))
+
+    def test_new_report_replaces_cached_id(self):
+        self._create_report()
+        self.assertEqual(models.LevelReport.get_latest_ids(self.level.pk)[0], models.LevelReport.objects.latest().pk)
+        report = self._create_report()
+        self.assertEqual(models.LevelReport.get_latest_ids(self.level.pk)[0], report.pk)
+
+    def test_deleted_report_cleared(self):
+        first = self._create_report()
+        self._create_report().delete()
+        self.assertEqual(models.LevelReport.get_latest_ids(self.level.pk)[0], first.pk)
+
+    def test_rolled_back_report_not_cached(self):
+        first = self._create_report()
+        self.assertEqual(models.LevelReport.get_latest_ids(self.level.pk)[0], first.pk)
+
+        try:
+            with transaction.atomic():
+                self._create_report()
+                raise RuntimeError()
+        except RuntimeError:
+            pass
+
+        self.assertEqual(models.LevelReport.get_latest_ids(self.level.pk)[0], first.pk)
+
+
+class ClearTimeHistogramTests(TestCase):
+    fixtures = ['test_levels']
+
+    def setUp(self):
+        level = Level.objects.first()
+        for seconds, success in [(10, True), (31, True), (33, False), (40, True), (90, True), (None, False)]:
+            models.DungeonLog.objects.create(
+                wizard_id=123,
+                level=level,
+                success=success,
+                clear_time=timedelta(seconds=seconds) if seconds else None,
+            )
+
+        self.qs = models.DungeonLog.objects.all()
+        self.min_time = timedelta(seconds=30)
+        self.bin_width = timedelta(seconds=5)
+
+    def test_bins(self):
+        data = generate.clear_time_histogram(self.qs, self.min_time, timedelta(seconds=45), self.bin_width)
+
+        # Times below the first bin and missing times are excluded, times past the last bin are counted in it
+        self.assertEqual(data, [
+            {'bin': '0:00:30', 'False': 1, 'True': 1},
+            {'bin': '0:00:35', 'False': 0, 'True': 0},
+            {'bin': '0:00:40', 'False': 0, 'True': 2},
+        ])
+
+    def test_matches_pivot_histogram(self):
+        bins = [self.min_time + self.bin_width * x for x in range(3)]
+        self.assertEqual(
+            generate.clear_time_histogram(self.qs, self.min_time, timedelta(seconds=45), self.bin_width),
+            [dict(row) for row in histogram(self.qs, 'clear_time', bins, slice_on='success')],
+        )
+
+    def test_single_bin(self):
+        data = generate.clear_time_histogram(self.qs, self.min_time, self.min_time, self.bin_width)
+        self.assertEqual(data, [{'bin': '0:00:30', 'False': 1, 'True': 3}])
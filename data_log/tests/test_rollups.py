@@ -0,0 +1,62 @@
+from datetime import datetime, timedelta
+
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase
+from django.utils import timezone
+
+from data_log import models, rollups
+from herders.models import Summoner
+from .test_log_views import BaseLogTest
+
+
+class FullDayRangeTests(SimpleTestCase):
+    def _local(self, *args):
+        return timezone.make_aware(datetime(*args))
+
+    def test_unbounded(self):
+        self.assertEqual(rollups._full_day_range(None, None), (None, None))
+
+    def test_midnight_boundaries_are_whole_days(self):
+        first, last = rollups._full_day_range(self._local(2020, 1, 1), self._local(2020, 1, 3, 23, 59, 59))
+        self.assertEqual(first, datetime(2020, 1, 1).date())
+        self.assertEqual(last, datetime(2020, 1, 3).date())
+
+    def test_partial_days_excluded(self):
+        first, last = rollups._full_day_range(self._local(2020, 1, 1, 12), self._local(2020, 1, 3, 12))
+        self.assertEqual(first, datetime(2020, 1, 2).date())
+        self.assertEqual(last, datetime(2020, 1, 2).date())
+
+    def test_unsupported_filters_fall_back(self):
+        self.assertIsNone(rollups.get_drop_totals(None, models.RiftDungeonLog, {'grade__in': [1]}))
+        self.assertIsNone(rollups.get_drop_totals(None, models.SummonLog, {}))
+
+
+class DailyDropRollupTests(BaseLogTest):
+    fixtures = ['test_game_items', 'test_levels', 'test_summon_monsters']
+
+    def setUp(self):
+        super().setUp()
+        self.summoner = Summoner.objects.create(user=User.objects.create(username='t'), com2us_id=123)
+
+    def test_rollup_updated_on_upload(self):
+        self._do_log('BattleDungeonResult_V2/giants_b10_rune_drop.json')
+
+        log = models.DungeonLog.objects.get()
+        rollup = models.DailyDropRollup.objects.get()
+        self.assertEqual(rollup.level, log.level)
+        self.assertEqual(rollup.log_count, 1)
+        self.assertEqual(rollup.success_count, 1)
+        self.assertEqual(sum(rune[-1] for rune in rollup.runes), 1)
+
+    def test_totals_match_raw_logs(self):
+        self._do_log('BattleDungeonResult_V2/giants_b10_harmony_drop.json')
+        log = models.DungeonLog.objects.get()
+
+        # Time range ending partway through the day is answered from raw logs
+        for timestamp__lte in [None, log.timestamp + timedelta(seconds=1)]:
+            totals = rollups.get_drop_totals(self.summoner, models.DungeonLog, {'timestamp__lte': timestamp__lte})
+            self.assertEqual(totals['levels'][log.level_id]['log_count'], 1)
+            self.assertEqual(
+                dict(totals['items']),
+                {drop.item_id: drop.quantity for drop in log.items.all()},
+            )
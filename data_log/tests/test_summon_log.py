@@ -1,5 +1,6 @@
 from bestiary.models import Monster, GameItem
 from data_log import models
+from data_log.reports.generate import generate_summon_reports
 from .test_log_views import BaseLogTest
 
 
@@ -74,3 +75,53 @@ class SummonLogTests(BaseLogTest):
         self.assertEqual(models.SummonLog.objects.count(), 1)
         log.refresh_from_db()
         self.assertEqual(log.monster, Monster.objects.get(com2us_id=13103))
+
+
+class SummonReportTests(BaseLogTest):
+    fixtures = ['test_summon_monsters', 'test_game_items']
+
+    def test_report_created(self):
+        self._do_log('SummonUnit/scroll_unknown_qty10.json')
+        generate_summon_reports()
+
+        report = models.SummonReport.objects.get()
+        self.assertEqual(report.item, GameItem.objects.get(category=GameItem.CATEGORY_SUMMON_SCROLL, com2us_id=1))
+        self.assertEqual(report.log_count, 10)
+        self.assertEqual(report.last_log_id, models.SummonLog.objects.latest('pk').pk)
+        self.assertEqual(report.report['natural_stars']['total'], 10)
+        self.assertEqual(report.report['element']['total'], 10)
+
+    def test_report_updated_incrementally(self):
+        self._do_log('SummonUnit/scroll_unknown_qty10.json')
+        generate_summon_reports()
+        self._do_log('SummonUnit/scroll_unknown_qty1.json')
+        generate_summon_reports()
+
+        report = models.SummonReport.objects.get()
+        self.assertEqual(report.log_count, 11)
+        self.assertEqual(report.report['element']['total'], 11)
+        self.assertGreater(report.audit.query_count, 0)
+
+    def test_blessing_choice(self):
+        self._do_log('SummonUnit/scroll_mystical_blessing_pop.json')
+        self._do_log('ConfirmSummonChoice/blessing_selection.json')
+        generate_summon_reports()
+
+        report = models.SummonReport.objects.get()
+        self.assertEqual(report.report['blessings']['chosen'], 1)
+        self.assertEqual(report.report['element']['total'], 0)
+
+    def test_late_committed_log_counted_once(self):
+        self._do_log('SummonUnit/scroll_unknown_qty10.json')
+        late_log = models.SummonLog.objects.earliest('pk')
+        late_log.delete()
+        generate_summon_reports()
+
+        # Log with an ID below the last update becomes visible
+        late_log.save()
+        generate_summon_reports()
+        generate_summon_reports()
+
+        report = models.SummonReport.objects.get()
+        self.assertEqual(report.log_count, 10)
+        self.assertEqual(report.report['element']['total'], 10)
@@ -1,9 +1,33 @@
-from math import trunc
+from math import ceil, log, trunc
+from time import time_ns
 
+from django.core.cache import cache
+from django.db.models import F, Func, IntegerField, Min
 from django.utils import timezone
 
+SAMPLE_BUCKETS = 1024
+HLL_PRECISION = 12
 
-def slice_records(qs, *args, **kwargs):
+
+SLICE_ALL = 'all'
+SLICE_TIMESPAN = 'timespan'
+SLICE_MINIMUM_COUNT = 'minimum_count'
+SLICE_MAXIMUM_COUNT = 'maximum_count'
+
+SLICE_REASON_CHOICES = (
+    (SLICE_ALL, 'All records'),
+    (SLICE_TIMESPAN, 'Report timespan'),
+    (SLICE_MINIMUM_COUNT, 'Minimum count'),
+    (SLICE_MAXIMUM_COUNT, 'Maximum count'),
+)
+
+
+def get_slice_window(qs, *args, **kwargs):
+    """
+    Determine where slice_records() cuts off older records.
+
+    :return: tuple of (earliest included timestamp or None for all records, reason from SLICE_REASON_CHOICES)
+    """
     report_timespan = kwargs.get('report_timespan')
     minimum_count = kwargs.get('minimum_count')
     maximum_count = kwargs.get('maximum_count')
@@ -12,11 +36,13 @@ def slice_records(qs, *args, **kwargs):
         raise ValueError('Cannot use minimum_count and maximum_count at the same time.')
 
     if qs.count() == 0:
-        return qs
+        return None, SLICE_ALL
 
     if report_timespan:
-        result = qs.filter(timestamp__gte=timezone.now() - report_timespan)
+        window = timezone.now() - report_timespan, SLICE_TIMESPAN
+        result = qs.filter(timestamp__gte=window[0])
     else:
+        window = None, SLICE_ALL
         result = qs
 
     if minimum_count or maximum_count:
@@ -26,14 +52,101 @@ def slice_records(qs, *args, **kwargs):
             if minimum_count and num_records < minimum_count:
                 temp_slice = qs[:minimum_count]
                 earliest_record = temp_slice[temp_slice.count() - 1]
-                result = qs.filter(timestamp__gte=earliest_record.timestamp)
+                window = earliest_record.timestamp, SLICE_MINIMUM_COUNT
 
             if maximum_count and num_records > maximum_count:
                 temp_slice = qs[:maximum_count]
                 earliest_record = temp_slice[temp_slice.count() - 1]
-                result = qs.filter(timestamp__gte=earliest_record.timestamp)
+                window = earliest_record.timestamp, SLICE_MAXIMUM_COUNT
+
+    return window
+
+
+def slice_records(qs, *args, **kwargs):
+    window_start, _ = get_slice_window(qs, *args, **kwargs)
+
+    if window_start is None:
+        return qs
+
+    return qs.filter(timestamp__gte=window_start)
+
+
+def _hashed(field):
+    # 32 bit postgres hash of an integer column
+    return Func(F(field), function='hashint8', output_field=IntegerField())
+
+
+def sample_records(qs, sample_size):
+    """
+    Bernoulli sample of approximately sample_size records. Records are selected by a hash of the primary key
+    so that every query made against the returned queryset sees the same sample.
+
+    :return: tuple of (sampled queryset, sample rate)
+    """
+    num_records = qs.count()
+
+    if num_records <= sample_size:
+        return qs, 1.0
+
+    num_buckets = max(1, ceil(SAMPLE_BUCKETS * sample_size / num_records))
+    sampled = qs.annotate(
+        sample_bucket=_hashed('pk').bitand(SAMPLE_BUCKETS - 1)
+    ).filter(sample_bucket__lt=num_buckets)
+
+    return sampled, num_buckets / SAMPLE_BUCKETS
 
-    return result
+
+def hll_registers(qs, field, precision=HLL_PRECISION):
+    """
+    HyperLogLog registers of an integer field. Registers from separate querysets can be combined with
+    merge_hll_registers() to estimate the distinct count of their union.
+
+    :return: list of 2 ** precision ranks
+    """
+    num_registers = 2 ** precision
+    remaining_bits = 32 - precision
+
+    # The highest rank in each register belongs to the value with the lowest remaining bits
+    registers = qs.order_by().annotate(
+        register=_hashed(field).bitand(num_registers - 1),
+    ).values('register').annotate(
+        lowest=Min(_hashed(field).bitrightshift(precision).bitand(2 ** remaining_bits - 1)),
+    ).values_list('register', 'lowest')
+
+    ranks = [0] * num_registers
+    for register, lowest in registers:
+        ranks[register] = remaining_bits - lowest.bit_length() + 1
+
+    return ranks
+
+
+def merge_hll_registers(*registers):
+    return [max(ranks) for ranks in zip(*registers)]
+
+
+def hll_estimate(ranks):
+    num_registers = len(ranks)
+    alpha = 0.7213 / (1 + 1.079 / num_registers)
+    estimate = alpha * num_registers ** 2 / sum(2.0 ** -rank for rank in ranks)
+    empty_registers = ranks.count(0)
+
+    if estimate <= 2.5 * num_registers and empty_registers:
+        # Small range correction
+        estimate = num_registers * log(num_registers / empty_registers)
+    elif estimate > 2 ** 32 / 30:
+        # Large range correction
+        estimate = -2 ** 32 * log(1 - estimate / 2 ** 32)
+
+    return int(round(estimate))
+
+
+def approx_count_distinct(qs, field, precision=HLL_PRECISION):
+    """
+    HyperLogLog estimate of the number of distinct values of an integer field.
+    The registers are computed by the database as a single small GROUP BY, which is much cheaper than COUNT(DISTINCT)
+    on large tables. Standard error is 1.04 / sqrt(2 ** precision).
+    """
+    return hll_estimate(hll_registers(qs, field, precision))
 
 
 def floor_to_nearest(num, multiple_of):
@@ -92,3 +205,22 @@ def round_timedelta(input, to_nearest, direction='up'):
         return to_nearest * trunc(input / to_nearest) + to_nearest
     else:
         return to_nearest * trunc(input / to_nearest)
+
+
+def _data_log_version_key(summoner_id):
+    return f'data-log-version-{summoner_id}'
+
+
+def get_data_log_version(summoner_id):
+    """
+    Get a token identifying the current state of a summoner's data logs, for use in cache keys.
+
+    :param summoner_id: Summoner PK
+    :return: Version token that changes whenever the summoner uploads new logs
+    """
+    return cache.get_or_set(_data_log_version_key(summoner_id), time_ns, None)
+
+
+def bump_data_log_version(summoner_id):
+    # A timestamp, not a counter, so an evicted version can never be reissued and match stale cache entries
+    cache.set(_data_log_version_key(summoner_id), time_ns(), None)
@@ -1,12 +1,20 @@
 import json
+from datetime import datetime
 
+import pytz
+
+from django.http import StreamingHttpResponse
 from rest_framework import viewsets, permissions, versioning, exceptions, parsers
 from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 
 from herders.models import Summoner
+from .export import stream_export
 from .game_commands import active_log_commands, accepted_api_params
 from .models import FullLog
+from .rollups import update_daily_rollups
+from .serializers import DungeonLogExportSerializer
+from .util import bump_data_log_version
 
 
 class InvalidLogException(exceptions.APIException):
@@ -61,7 +69,16 @@ class LogData(viewsets.ViewSet):
             raise InvalidLogException(detail='Log data failed validation')
 
         # Parse the log
-        active_log_commands[api_command].parse(summoner, log_data)
+        command = active_log_commands[api_command]
+        command.parse(summoner, log_data)
+
+        if summoner:
+            if command.rollup_model:
+                timestamp = datetime.fromtimestamp(log_data['response']['tvalue'], tz=pytz.timezone('GMT'))
+                update_daily_rollups(summoner, command.rollup_model, timestamp)
+
+            bump_data_log_version(summoner.pk)
+
         response = {'detail': 'Log OK'}
 
         # Check if accepted API params version matches the active version
@@ -78,3 +95,31 @@ class AcceptedCommands(viewsets.ViewSet):
 
     def list(self, request):
         return Response(accepted_api_params)
+
+
+class CanExportDataLogs(permissions.BasePermission):
+    def has_permission(self, request, view):
+        return request.user.has_perm('data_log.view_dungeonlog')
+
+
+class DungeonLogExport(viewsets.ViewSet):
+    """
+    Download anonymized dungeon logs or one type of their drops as CSV, streamed from the database.
+    Query parameters: dataset, level, start, end and compress (gzip, default true).
+    """
+    permission_classes = (permissions.IsAuthenticated, CanExportDataLogs)
+
+    def list(self, request):
+        params = DungeonLogExportSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        options = params.validated_data
+        compress = options.pop('compress')
+        dataset = options.pop('dataset')
+
+        filename = f'dungeon_{dataset}.csv' + ('.gz' if compress else '')
+        response = StreamingHttpResponse(
+            stream_export(dataset, compress=compress, **options),
+            content_type='application/gzip' if compress else 'text/csv',
+        )
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
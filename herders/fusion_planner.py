@@ -0,0 +1,255 @@
+from collections import defaultdict
+
+from django.core.cache import cache
+
+from bestiary.models import Fusion
+from herders.models import MonsterInstance, MonsterPiece
+
+FUSION_GRAPH_CACHE_KEY = 'fusion-graph'
+FUSION_GRAPH_CACHE_TIMEOUT = 60 * 60 * 24
+FUSION_OVERVIEW_CACHE_TIMEOUT = 60 * 60 * 24
+ESSENCE_ELEMENTS = ('magic', 'fire', 'water', 'wind', 'light', 'dark')
+ESSENCE_SIZES = ('low', 'mid', 'high')
+
+
+class FusionGraph:
+    """
+    Every fusion with its product and ingredients, indexed by product. Built with a fixed number of queries and shared
+    between requests through the cache.
+    """
+
+    def __init__(self, fusions):
+        self.fusions = list(fusions)
+        self.by_product = {fusion.product_id: fusion for fusion in self.fusions}
+        self.by_slug = {fusion.product.bestiary_slug: fusion for fusion in self.fusions}
+        self.ingredients = {fusion.pk: list(fusion.ingredients.all()) for fusion in self.fusions}
+
+    @classmethod
+    def build(cls):
+        return cls(
+            Fusion.objects.select_related(
+                'product',
+                'product__awakens_to',
+            ).prefetch_related(
+                'ingredients__awakens_from__source',
+                'ingredients__awakens_to',
+            )
+        )
+
+    def get_sub_fusion(self, ingredient):
+        # Fusion producing the unawakened version of an ingredient
+        return self.by_product.get(ingredient.awakens_from_id)
+
+    def sub_fusion_available(self, fusion):
+        return any(self.get_sub_fusion(ingredient) for ingredient in self.ingredients[fusion.pk])
+
+    def monster_ids(self):
+        # Every monster whose ownership affects fusion progress
+        ids = set()
+        for fusion in self.fusions:
+            ids.update([fusion.product_id, fusion.product.awakens_to_id])
+            for ingredient in self.ingredients[fusion.pk]:
+                ids.update([ingredient.pk, ingredient.awakens_from_id])
+
+        ids.discard(None)
+        return ids
+
+
+def get_fusion_graph():
+    return cache.get_or_set(FUSION_GRAPH_CACHE_KEY, FusionGraph.build, FUSION_GRAPH_CACHE_TIMEOUT)
+
+
+def clear_fusion_graph():
+    cache.delete(FUSION_GRAPH_CACHE_KEY)
+
+
+class OwnershipIndex:
+    """
+    A summoner's monsters, summoning pieces and essences relevant to fusions, indexed by monster.
+    """
+
+    def __init__(self, summoner, monster_ids):
+        self.instances = defaultdict(list)
+        self.pieces = {}
+
+        for instance in MonsterInstance.objects.filter(
+            owner=summoner,
+            monster__in=monster_ids,
+        ).select_related(
+            'monster',
+            'monster__awakens_from',
+        ).order_by('-stars', '-level', '-monster__is_awakened'):
+            self.instances[instance.monster_id].append(instance)
+
+        for piece in MonsterPiece.objects.filter(owner=summoner, monster__in=monster_ids).select_related('monster'):
+            self.pieces[piece.monster_id] = piece
+
+        # Monsters with an instance available for fusion
+        self.available = {
+            monster_id for monster_id, instances in self.instances.items()
+            if any(not instance.ignore_for_fusion for instance in instances)
+        }
+        self.essences = summoner.storage.get_storage()
+
+    def owned(self, *monsters):
+        # Instances of any of the monsters, best first
+        instances = [instance for monster in monsters if monster for instance in self.instances.get(monster.pk, [])]
+        return sorted(
+            instances,
+            key=lambda instance: (instance.stars, instance.level, instance.monster.is_awakened),
+            reverse=True,
+        )
+
+    def get_pieces(self, *monsters):
+        for monster in monsters:
+            if monster and monster.pk in self.pieces:
+                return self.pieces[monster.pk]
+
+        return None
+
+
+def empty_essences():
+    return {element: {size: 0 for size in ESSENCE_SIZES} for element in ESSENCE_ELEMENTS}
+
+
+def missing_essences(cost, storage):
+    return {
+        element: {size: max(cost[element][size] - storage[element][size], 0) for size in sizes}
+        for element, sizes in cost.items()
+    }
+
+
+def essences_satisfied(missing):
+    return not any(qty > 0 for sizes in missing.values() for qty in sizes.values())
+
+
+class FusionPlanner:
+    """
+    Fusion progress of a summoner, computed from the cached fusion graph and a single index of the summoner's
+    collection. The number of queries does not depend on how many fusions or ingredients are checked.
+    """
+
+    def __init__(self, summoner, graph=None):
+        self.graph = graph or get_fusion_graph()
+        self.ownership = OwnershipIndex(summoner, self.graph.monster_ids())
+
+    def awakening_cost(self, fusion):
+        # Essences to awaken every ingredient not already owned awakened
+        cost = empty_essences()
+
+        for ingredient in self.graph.ingredients[fusion.pk]:
+            if ingredient.pk in self.ownership.available or not ingredient.awakens_from:
+                continue
+
+            for element in ESSENCE_ELEMENTS:
+                for size in ESSENCE_SIZES:
+                    cost[element][size] += getattr(ingredient.awakens_from, f'awaken_mats_{element}_{size}')
+
+        return cost
+
+    def get_ingredient_progress(self, fusion, ingredient):
+        level = fusion.product.max_level_from_stars()
+        owned = self.ownership.owned(ingredient, ingredient.awakens_from)
+        pieces = self.ownership.get_pieces(ingredient, ingredient.awakens_from)
+
+        # Determine if each individual requirement is met using highest evolved/leveled monster that is not ignored for fusion
+        for instance in owned:
+            if not instance.ignore_for_fusion:
+                acquired = True
+                evolved = instance.stars >= fusion.product.base_stars
+                leveled = instance.level >= level
+                awakened = instance.monster.is_awakened
+                break
+        else:
+            acquired = bool(pieces.can_summon()) if pieces else False
+            evolved = leveled = awakened = False
+
+        sub_fusion = self.graph.get_sub_fusion(ingredient)
+
+        return {
+            'instance': ingredient,
+            'owned': owned,
+            'pieces': pieces,
+            'complete': acquired and evolved and leveled and awakened,
+            'acquired': acquired,
+            'evolved': evolved,
+            'leveled': leveled,
+            'awakened': awakened,
+            'is_fuseable': sub_fusion is not None,
+            'sub_fusion_cost': self.awakening_cost(sub_fusion) if sub_fusion and not acquired else None,
+        }
+
+    def get_progress(self, fusion):
+        ingredients = [
+            self.get_ingredient_progress(fusion, ingredient) for ingredient in self.graph.ingredients[fusion.pk]
+        ]
+
+        total_cost = self.awakening_cost(fusion)
+        total_missing = missing_essences(total_cost, self.ownership.essences)
+
+        # Determine the total/missing essences including sub-fusions
+        if self.graph.sub_fusion_available(fusion):
+            total_sub_fusion_cost = self.awakening_cost(fusion)
+            for ingredient in ingredients:
+                if ingredient['sub_fusion_cost']:
+                    for element, sizes in total_sub_fusion_cost.items():
+                        for size in sizes:
+                            sizes[size] += ingredient['sub_fusion_cost'][element][size]
+
+            sub_fusion_total_missing = missing_essences(total_sub_fusion_cost, self.ownership.essences)
+            sub_fusion_mats_satisfied = essences_satisfied(sub_fusion_total_missing)
+        else:
+            sub_fusion_total_missing = None
+            sub_fusion_mats_satisfied = None
+
+        return {
+            'instance': fusion.product,
+            'acquired': bool(self.ownership.owned(fusion.product, fusion.product.awakens_to)),
+            'stars': fusion.product.base_stars,
+            'level': fusion.product.max_level_from_stars(),
+            'cost': fusion.cost,
+            'ingredients': ingredients,
+            'awakening_mats_cost': total_cost,
+            'awakening_mats_sufficient': essences_satisfied(total_missing),
+            'awakening_mats_missing': total_missing,
+            'sub_fusion_mats_missing': sub_fusion_total_missing,
+            'sub_fusion_mats_sufficient': sub_fusion_mats_satisfied,
+            'ready': all(ingredient['complete'] for ingredient in ingredients),
+        }
+
+    def get_all_progress(self):
+        return [self.get_progress(fusion) for fusion in self.graph.fusions]
+
+    def get_overview(self):
+        """
+        Summary of the progress of every fusion, small enough to cache.
+
+        :return: dict of fusion product ID to progress summary
+        """
+        overview = {}
+
+        for fusion in self.graph.fusions:
+            progress = self.get_progress(fusion)
+            overview[fusion.product_id] = {
+                'acquired': progress['acquired'],
+                'ready': progress['ready'],
+                'ingredient_count': len(progress['ingredients']),
+                'missing_ingredients': sum(not ingredient['acquired'] for ingredient in progress['ingredients']),
+                'complete_ingredients': sum(ingredient['complete'] for ingredient in progress['ingredients']),
+                'awakening_mats_sufficient': progress['awakening_mats_sufficient'],
+                'awakening_mats_missing': progress['awakening_mats_missing'],
+                'essences_missing': sum(
+                    qty for sizes in progress['awakening_mats_missing'].values() for qty in sizes.values()
+                ),
+            }
+
+        return overview
+
+
+def get_fusion_overview(summoner):
+    # Cached until anything in the summoner's collection or storage changes
+    return cache.get_or_set(
+        f'fusion-overview-{summoner.pk}-{summoner.get_inventory_version()}',
+        lambda: FusionPlanner(summoner).get_overview(),
+        FUSION_OVERVIEW_CACHE_TIMEOUT,
+    )
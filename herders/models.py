@@ -4,9 +4,11 @@ from math import floor, ceil
 
 from django.contrib.auth.models import User
 from django.contrib.postgres.fields import ArrayField, JSONField
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
-from django.db import models
-from django.db.models import Q, Count, Avg
+from django.db import models, transaction
+from django.db.models import Count, Avg
+from django.utils import timezone
 from django.utils.functional import cached_property
 from django.utils.safestring import mark_safe
 from timezone_field import TimeZoneField
@@ -32,6 +34,8 @@ class Summoner(models.Model):
         (SERVER_CHINA, 'China'),
     ]
 
+    LAST_UPDATE_INTERVAL = 5 * 60  # Seconds between last_update refreshes when the profile is modified
+
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     summoner_name = models.CharField(max_length=256, null=True, blank=True)
     com2us_id = models.BigIntegerField(default=None, null=True, blank=True)
@@ -44,15 +48,37 @@ class Summoner(models.Model):
     last_update = models.DateTimeField(auto_now=True)
 
     def get_rune_counts(self):
-        counts = {}
+        from herders.profile_stats import get_profile_stats
 
-        for rune_type in RuneInstance.TYPE_CHOICES:
-            counts[rune_type[1]] = RuneInstance.objects.filter(owner=self, type=rune_type[0]).count()
+        return dict(get_profile_stats(self)['runes']['type'])
 
-        return counts
+    @staticmethod
+    def get_inventory_version_cache_key(summoner_id):
+        return f'summoner-{summoner_id}-inventory-version'
+
+    def get_inventory_version(self):
+        # Changes whenever anything shown in the summoner's inventories changes. Used to key cached inventory pages.
+        return cache.get_or_set(self.get_inventory_version_cache_key(self.pk), lambda: uuid.uuid4().hex, None)
+
+    @classmethod
+    def bump_inventory_version(cls, summoner_id):
+        # After the current transaction commits, so pages rendered from the old rows are never cached under the new version
+        transaction.on_commit(
+            lambda: cache.set(cls.get_inventory_version_cache_key(summoner_id), uuid.uuid4().hex, None)
+        )
+
+    @classmethod
+    def touch_last_update(cls, summoner_id):
+        # Updates only the last_update column, at most once per LAST_UPDATE_INTERVAL and after the current transaction
+        # commits, so bulk edits and imports don't rewrite and lock the summoner row for every instance saved.
+        if cache.add(f'summoner-{summoner_id}-last-update-touched', True, cls.LAST_UPDATE_INTERVAL):
+            transaction.on_commit(
+                lambda: cls.objects.filter(pk=summoner_id).update(last_update=timezone.now())
+            )
 
     def save(self, *args, **kwargs):
         super(Summoner, self).save(*args, **kwargs)
+        self.bump_inventory_version(self.pk)
 
         # Update new storage model
         if not hasattr(self, 'storage'):
@@ -590,27 +616,15 @@ class MonsterInstance(models.Model, base.Stars):
         return stats
 
     def get_building_stats(self, area=Building.AREA_GENERAL):
-        owned_bldgs = BuildingInstance.objects.filter(
-            Q(building__element__isnull=True) | Q(building__element=self.monster.element),
-            owner=self.owner,
-            building__area=area,
-        ).select_related('building')
+        area_bonuses = BuildingInstance.get_bonus_table(self.owner_id).get(area, {})
+        all_elements = area_bonuses.get(None, {})
+        own_element = area_bonuses.get(self.monster.element, {})
 
         bonuses = {
-            Building.STAT_HP: 0,
-            Building.STAT_ATK: 0,
-            Building.STAT_DEF: 0,
-            Building.STAT_SPD: 0,
-            Building.STAT_CRIT_RATE_PCT: 0,
-            Building.STAT_CRIT_DMG_PCT: 0,
-            Building.STAT_RESIST_PCT: 0,
-            Building.STAT_ACCURACY_PCT: 0,
+            stat: all_elements.get(stat, 0) + own_element.get(stat, 0)
+            for stat in BuildingInstance.BONUS_STATS
         }
 
-        for b in owned_bldgs:
-            if b.building.affected_stat in bonuses.keys() and b.level > 0:
-                bonuses[b.building.affected_stat] += b.building.stat_bonus[b.level - 1]
-
         return {
             'hp': int(ceil(round(self.base_hp * (bonuses[Building.STAT_HP] / 100.0), 3))),
             'attack': int(ceil(round(self.base_attack * (bonuses[Building.STAT_ATK] / 100.0), 3))),
@@ -626,26 +640,30 @@ class MonsterInstance(models.Model, base.Stars):
         return self.get_building_stats(Building.AREA_GUILD)
 
     def get_possible_skillups(self):
-        same_family = Q(monster__family_id=self.monster.family_id)
+        from herders.skillups import get_skillup_index
 
-        # Handle a few special cases for skillups outside of own family
-        # Vampire Lord
-        if self.monster.family_id == 23000:
-            same_family |= Q(monster__family_id=14700)
+        index = get_skillup_index(self.owner)
+        family_ids = index.get_family_instance_ids(self.monster.family_id, exclude=self.pk)
+        piece_ids = index.get_piece_ids(self.monster.family_id)
 
-        # Fairy Queen
-        if self.monster.family_id == 19100:
-            same_family |= Q(monster__family_id=10100)
+        family = []
+        if family_ids:
+            family = list(MonsterInstance.objects.filter(
+                pk__in=family_ids,
+            ).select_related(
+                'monster',
+                'monster__awakens_from',
+            ).order_by('ignore_for_fusion'))
 
-        devilmon = MonsterInstance.objects.filter(owner=self.owner, monster__name='Devilmon').count()
-        family = MonsterInstance.objects.filter(owner=self.owner).filter(same_family).exclude(pk=self.pk).order_by('ignore_for_fusion')
-        pieces = MonsterPiece.objects.filter(owner=self.owner, monster__family_id=self.monster.family_id)
+        pieces = []
+        if piece_ids:
+            pieces = list(MonsterPiece.objects.filter(pk__in=piece_ids).select_related('monster'))
 
         return {
-            'devilmon': devilmon,
+            'devilmon': index.devilmon,
             'family': family,
             'pieces': pieces,
-            'none': devilmon + family.count() + pieces.count() == 0,
+            'none': index.devilmon + len(family) + len(pieces) == 0,
         }
 
     def clean(self):
@@ -1033,6 +1051,19 @@ class Team(models.Model):
 
 
 class BuildingInstance(models.Model):
+    BONUS_STATS = [
+        Building.STAT_HP,
+        Building.STAT_ATK,
+        Building.STAT_DEF,
+        Building.STAT_SPD,
+        Building.STAT_CRIT_RATE_PCT,
+        Building.STAT_CRIT_DMG_PCT,
+        Building.STAT_RESIST_PCT,
+        Building.STAT_ACCURACY_PCT,
+    ]
+    BONUS_TABLE_CACHE_TIMEOUT = 60 * 60 * 24
+    BONUS_TABLE_VERSION_CACHE_KEY = 'building-bonuses-version'
+
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     owner = models.ForeignKey(Summoner, on_delete=models.CASCADE)
     building = models.ForeignKey(Building, on_delete=models.CASCADE)
@@ -1041,6 +1072,46 @@ class BuildingInstance(models.Model):
     class Meta:
         ordering = ['building']
 
+    @classmethod
+    def get_bonus_table_cache_key(cls, summoner_id):
+        # Versioned so a change to the building definitions invalidates every summoner's table at once
+        version = cache.get_or_set(cls.BONUS_TABLE_VERSION_CACHE_KEY, lambda: uuid.uuid4().hex, None)
+        return f'summoner-{summoner_id}-building-bonuses-{version}'
+
+    @classmethod
+    def get_bonus_table(cls, summoner_id):
+        """
+        Total stat bonuses from a summoner's buildings, as {area: {element: {stat: bonus}}}. Bonuses of buildings
+        affecting every element are under the element None. Cached until one of the summoner's buildings changes.
+        """
+        cache_key = cls.get_bonus_table_cache_key(summoner_id)
+        table = cache.get(cache_key)
+
+        if table is None:
+            table = {}
+            buildings = cls.objects.filter(
+                owner_id=summoner_id,
+                level__gt=0,
+                building__affected_stat__in=cls.BONUS_STATS,
+            ).values_list('building__area', 'building__element', 'building__affected_stat', 'building__stat_bonus', 'level')
+
+            for area, element, stat, stat_bonus, level in buildings:
+                element_bonuses = table.setdefault(area, {}).setdefault(element, {})
+                element_bonuses[stat] = element_bonuses.get(stat, 0) + stat_bonus[level - 1]
+
+            cache.set(cache_key, table, cls.BONUS_TABLE_CACHE_TIMEOUT)
+
+        return table
+
+    @classmethod
+    def clear_bonus_table(cls, summoner_id):
+        # After the current transaction commits, so a table built from the old levels is never cached afterwards
+        transaction.on_commit(lambda: cache.delete(cls.get_bonus_table_cache_key(summoner_id)))
+
+    @classmethod
+    def clear_all_bonus_tables(cls):
+        transaction.on_commit(lambda: cache.set(cls.BONUS_TABLE_VERSION_CACHE_KEY, uuid.uuid4().hex, None))
+
     def remaining_upgrade_cost(self):
         return sum(self.building.upgrade_cost[self.level:])
 
@@ -1,3 +1,6 @@
+from datetime import datetime, timedelta, timezone
+
+from django.db.models import Q
 from rest_framework.pagination import PageNumberPagination
 
 
@@ -11,3 +14,62 @@ class ProfileItemPagination(PageNumberPagination):
     page_size = 1000
     page_size_query_param = 'page_size'
     max_page_size = 1000000
+
+
+class KeysetPage:
+    """
+    A page of logs from keyset pagination on (timestamp, pk), newest first.
+    Pages are located by the cursor of a neighboring row instead of an offset, so deep pages cost the same as the first.
+    """
+    EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+    def __init__(self, queryset, page_size, after=None, before=None):
+        after = self.decode_cursor(after)
+        before = self.decode_cursor(before)
+
+        if before:
+            # Walk forwards in time from the cursor, then flip the page back to newest first
+            timestamp, pk = before
+            queryset = queryset.filter(Q(timestamp__gt=timestamp) | Q(timestamp=timestamp, pk__gt=pk))
+            object_list = list(queryset.order_by('timestamp', 'pk')[:page_size + 1])
+            self.has_previous = len(object_list) > page_size
+            self.has_next = True
+            self.object_list = object_list[:page_size][::-1]
+        else:
+            if after:
+                timestamp, pk = after
+                queryset = queryset.filter(Q(timestamp__lt=timestamp) | Q(timestamp=timestamp, pk__lt=pk))
+
+            object_list = list(queryset.order_by('-timestamp', '-pk')[:page_size + 1])
+            self.has_previous = after is not None
+            self.has_next = len(object_list) > page_size
+            self.object_list = object_list[:page_size]
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    @classmethod
+    def encode_cursor(cls, obj):
+        offset = obj.timestamp - cls.EPOCH
+        return f'{offset // timedelta(microseconds=1)}-{obj.pk}'
+
+    @classmethod
+    def decode_cursor(cls, cursor):
+        try:
+            microseconds, pk = cursor.split('-')
+            return cls.EPOCH + timedelta(microseconds=int(microseconds)), int(pk)
+        except (AttributeError, ValueError):
+            return None
+
+    @property
+    def next_cursor(self):
+        if self.has_next and self.object_list:
+            return self.encode_cursor(self.object_list[-1])
+
+    @property
+    def previous_cursor(self):
+        if self.has_previous and self.object_list:
+            return self.encode_cursor(self.object_list[0])
@@ -0,0 +1,86 @@
+from collections import OrderedDict
+
+from django.core.cache import cache
+from django.db.models import Count
+
+from bestiary.models import Monster
+from herders.models import MonsterInstance, RuneInstance, ArtifactInstance
+
+PROFILE_STATS_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def _counter(choices):
+    # Zero count for each choice, keyed by display name in choice order
+    return OrderedDict((name, 0) for value, name in choices)
+
+
+def _grouped_counts(queryset, *fields):
+    # Single GROUP BY over every combination of the fields
+    return queryset.order_by().values_list(*fields).annotate(count=Count('pk'))
+
+
+def get_rune_stats(summoner):
+    stats = {
+        'total': 0,
+        'type': _counter(RuneInstance.TYPE_CHOICES),
+        'slot': OrderedDict((slot, 0) for slot in range(1, 7)),
+        'stars': OrderedDict((stars, 0) for stars in range(1, 7)),
+    }
+    type_names = dict(RuneInstance.TYPE_CHOICES)
+
+    for rune_type, slot, stars, count in _grouped_counts(RuneInstance.objects.filter(owner=summoner), 'type', 'slot', 'stars'):
+        stats['total'] += count
+        type_name = type_names.get(rune_type, rune_type)
+        stats['type'][type_name] = stats['type'].get(type_name, 0) + count
+        stats['slot'][slot] = stats['slot'].get(slot, 0) + count
+        stats['stars'][stars] = stats['stars'].get(stars, 0) + count
+
+    return stats
+
+
+def get_monster_stats(summoner):
+    stats = {
+        'total': 0,
+        'stars': OrderedDict((stars, 0) for stars in range(1, 7)),
+        'element': _counter(Monster.ELEMENT_CHOICES),
+    }
+    element_names = dict(Monster.ELEMENT_CHOICES)
+
+    for stars, element, count in _grouped_counts(MonsterInstance.objects.filter(owner=summoner), 'stars', 'monster__element'):
+        stats['total'] += count
+        stats['stars'][stars] = stats['stars'].get(stars, 0) + count
+        element_name = element_names.get(element, element)
+        stats['element'][element_name] = stats['element'].get(element_name, 0) + count
+
+    return stats
+
+
+def get_artifact_stats(summoner):
+    stats = {
+        'total': 0,
+        'slot': _counter(ArtifactInstance.SLOT_CHOICES),
+    }
+    slot_names = dict(ArtifactInstance.SLOT_CHOICES)
+
+    for slot, count in _grouped_counts(ArtifactInstance.objects.filter(owner=summoner), 'slot'):
+        stats['total'] += count
+        slot_name = slot_names.get(slot, slot)
+        stats['slot'][slot_name] = stats['slot'].get(slot_name, 0) + count
+
+    return stats
+
+
+def get_profile_stats(summoner):
+    """
+    Counts of a summoner's runes by set, slot and stars, monsters by stars and element and artifacts by slot. One grouped
+    query for each, cached until anything in the summoner's inventory changes.
+    """
+    return cache.get_or_set(
+        f'profile-stats-{summoner.pk}-{summoner.get_inventory_version()}',
+        lambda: {
+            'runes': get_rune_stats(summoner),
+            'monsters': get_monster_stats(summoner),
+            'artifacts': get_artifact_stats(summoner),
+        },
+        PROFILE_STATS_CACHE_TIMEOUT,
+    )
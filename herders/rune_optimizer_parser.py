@@ -1,11 +1,26 @@
 import json
 import random
 
+from django.db.models import Prefetch
+
+from bestiary.models import Skill
 from herders.models import MonsterInstance, BuildingInstance
 from .rune_optimizer_mapping import *
 
 
+EXPORT_QUERY_CHUNK_SIZE = 500
+EXPORT_STREAM_CHUNK_SIZE = 64 * 1024
+
+
 def export_win10(summoner):
+    return ''.join(export_win10_stream(summoner))
+
+
+def export_win10_stream(summoner):
+    """
+    Generator yielding the optimizer export JSON in chunks as it is built, so large accounts are never held in memory
+    as one document. Related objects are prefetched for each chunk of instances instead of queried per instance.
+    """
     # Fake storage building
     storage_bldg_id = 1234567890
     buildings = [
@@ -15,46 +30,61 @@ def export_win10(summoner):
         }
     ]
 
-    # Build the unit list
-    unit_list = []
-    for m in MonsterInstance.objects.filter(owner=summoner):
-        unit_list.append(_convert_monster_to_win10_json(m))
-
-    # Build the rune list
-    runes = []
-    for r in RuneInstance.objects.filter(owner=summoner, assigned_to=None):
-        runes.append(_convert_rune_to_win10_json(r))
-
-    # Build the rune craft list
-    rune_craft_item_list = []
-    for c in RuneCraftInstance.objects.filter(owner=summoner):
-        rune_craft_item_list.append(_convert_rune_craft_to_win10_json(c))
-
-    # Build the artifact list
-    artifact_list = []
-    for a in ArtifactInstance.objects.filter(owner=summoner):
-        artifact_list.append(_convert_artifact_to_win10_json(a))
-
-    # Build the artifact craft list
-    artifact_craft_list = []
-    for c in ArtifactCraftInstance.objects.filter(owner=summoner):
-        artifact_craft_list.append(_convert_artifact_craft_to_win10_json(c))
-
-    # Build the decoration list
-    deco_list = []
-    for d in BuildingInstance.objects.filter(owner=summoner):
-        deco_list.append(_convert_deco_to_win10(d))
-
-    return json.dumps({
-        'building_list': buildings,
-        'unit_list': unit_list,
-        'runes': runes,
-        'rune_craft_item_list': rune_craft_item_list,
-        'artifacts': artifact_list,
-        'artifact_crafts': artifact_craft_list,
-        'deco_list': deco_list,
-        'wizard_id': summoner.com2us_id if summoner.com2us_id else 0,
-    })
+    monsters = MonsterInstance.objects.filter(owner=summoner).select_related('monster').prefetch_related(
+        Prefetch('monster__skills', queryset=Skill.objects.order_by('slot')),
+        'runeinstance_set',
+        'artifactinstance_set',
+    )
+    lists = [
+        ('unit_list', monsters, _convert_monster_to_win10_json),
+        ('runes', RuneInstance.objects.filter(owner=summoner, assigned_to=None), _convert_rune_to_win10_json),
+        ('rune_craft_item_list', RuneCraftInstance.objects.filter(owner=summoner), _convert_rune_craft_to_win10_json),
+        ('artifacts', ArtifactInstance.objects.filter(owner=summoner).select_related('assigned_to'), _convert_artifact_to_win10_json),
+        ('artifact_crafts', ArtifactCraftInstance.objects.filter(owner=summoner), _convert_artifact_craft_to_win10_json),
+        ('deco_list', BuildingInstance.objects.filter(owner=summoner).select_related('building'), _convert_deco_to_win10),
+    ]
+
+    def generate():
+        yield '{"building_list": ' + json.dumps(buildings)
+
+        for key, queryset, convert in lists:
+            yield f', "{key}": ['
+            for idx, instance in enumerate(_iterate_in_chunks(queryset)):
+                yield (', ' if idx else '') + json.dumps(convert(instance))
+            yield ']'
+
+        yield ', "wizard_id": ' + json.dumps(summoner.com2us_id if summoner.com2us_id else 0) + '}'
+
+    # Combine the many small pieces into larger chunks for the response
+    buffer = []
+    buffer_size = 0
+    for piece in generate():
+        buffer.append(piece)
+        buffer_size += len(piece)
+
+        if buffer_size >= EXPORT_STREAM_CHUNK_SIZE:
+            yield ''.join(buffer)
+            buffer = []
+            buffer_size = 0
+
+    if buffer:
+        yield ''.join(buffer)
+
+
+def _iterate_in_chunks(queryset, chunk_size=EXPORT_QUERY_CHUNK_SIZE):
+    # QuerySet.iterator() ignores prefetch_related, so fetch chunks by primary key instead
+    queryset = queryset.order_by('pk')
+    last_pk = None
+
+    while True:
+        chunk = queryset.filter(pk__gt=last_pk) if last_pk is not None else queryset
+        chunk = list(chunk[:chunk_size])
+
+        if not chunk:
+            return
+
+        yield from chunk
+        last_pk = chunk[-1].pk
 
 
 def _convert_rune_to_win10_json(rune):
@@ -120,7 +150,7 @@ def _convert_monster_to_win10_json(monster):
         monster.skill_3_level,
         monster.skill_4_level,
     ]
-    for idx, skill in enumerate(monster.monster.skills.all().order_by('slot')):
+    for idx, skill in enumerate(monster.monster.skills.all()):
         mon_json['skills'].append([
             skill.com2us_id,
             skill_levels[idx]
@@ -1,16 +1,57 @@
 from django.core.exceptions import ValidationError
 from django.db.models import Count
-from django.db.models.signals import post_save, m2m_changed
+from django.db.models.signals import post_save, post_delete, m2m_changed
 from django.dispatch import receiver
 
-from .models import MonsterInstance, RuneInstance, RuneBuild, RuneCraftInstance
+from bestiary.models import Building, Monster, Fusion
+from .fusion_planner import clear_fusion_graph
+from .models import Summoner, Storage, BuildingInstance, MonsterInstance, MonsterPiece, RuneInstance, RuneBuild, RuneCraftInstance, \
+    ArtifactInstance, ArtifactCraftInstance
 
 
 @receiver(post_save, sender=MonsterInstance)
 @receiver(post_save, sender=RuneInstance)
 @receiver(post_save, sender=RuneCraftInstance)
 def update_profile_date(sender, instance, **kwargs):
-    instance.owner.save()
+    Summoner.touch_last_update(instance.owner_id)
+
+
+@receiver(post_save, sender=MonsterInstance)
+@receiver(post_save, sender=MonsterPiece)
+@receiver(post_save, sender=RuneInstance)
+@receiver(post_save, sender=RuneCraftInstance)
+@receiver(post_save, sender=ArtifactInstance)
+@receiver(post_save, sender=ArtifactCraftInstance)
+@receiver(post_save, sender=Storage)
+@receiver(post_delete, sender=MonsterInstance)
+@receiver(post_delete, sender=MonsterPiece)
+@receiver(post_delete, sender=RuneInstance)
+@receiver(post_delete, sender=RuneCraftInstance)
+@receiver(post_delete, sender=ArtifactInstance)
+@receiver(post_delete, sender=ArtifactCraftInstance)
+def update_inventory_version(sender, instance, **kwargs):
+    Summoner.bump_inventory_version(instance.owner_id)
+
+
+@receiver(post_save, sender=BuildingInstance)
+@receiver(post_delete, sender=BuildingInstance)
+def update_building_bonuses(sender, instance, **kwargs):
+    BuildingInstance.clear_bonus_table(instance.owner_id)
+
+
+@receiver(post_save, sender=Building)
+@receiver(post_delete, sender=Building)
+def update_all_building_bonuses(sender, **kwargs):
+    BuildingInstance.clear_all_bonus_tables()
+
+
+@receiver(post_save, sender=Fusion)
+@receiver(post_save, sender=Monster)
+@receiver(post_delete, sender=Fusion)
+@receiver(post_delete, sender=Monster)
+@receiver(m2m_changed, sender=Fusion.ingredients.through)
+def update_fusion_graph(sender, **kwargs):
+    clear_fusion_graph()
 
 
 @receiver(m2m_changed, sender=RuneBuild.runes.through)
@@ -0,0 +1,66 @@
+from collections import defaultdict
+
+from django.core.cache import cache
+
+from herders.models import MonsterInstance, MonsterPiece
+
+SKILLUP_INDEX_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Families that can also be skilled up by monsters of other families
+SKILLUP_FAMILY_ALIASES = {
+    23000: [14700],  # Vampire Lord
+    19100: [10100],  # Fairy Queen
+}
+
+
+class SkillupIndex:
+    """
+    A summoner's monster instances and summoning pieces indexed by monster family, with their Devilmon count. Small
+    enough to cache, so finding skill-up sources is a dictionary lookup.
+    """
+
+    def __init__(self, summoner_id):
+        self.devilmon = 0
+        self.instances = defaultdict(list)
+        self.pieces = defaultdict(list)
+
+        instances = MonsterInstance.objects.filter(
+            owner_id=summoner_id,
+        ).order_by('ignore_for_fusion').values_list('pk', 'monster__family_id', 'monster__name', 'ignore_for_fusion')
+
+        for pk, family_id, name, ignore_for_fusion in instances:
+            if name == 'Devilmon':
+                self.devilmon += 1
+
+            self.instances[family_id].append((ignore_for_fusion, pk))
+
+        for pk, family_id in MonsterPiece.objects.filter(owner_id=summoner_id).values_list('pk', 'monster__family_id'):
+            self.pieces[family_id].append(pk)
+
+    def get_family_instance_ids(self, family_id, exclude=None):
+        # IDs of instances which can skill up the family, instances used for fusion first
+        instances = [
+            instance
+            for skillup_family in [family_id] + SKILLUP_FAMILY_ALIASES.get(family_id, [])
+            for instance in self.instances.get(skillup_family, [])
+        ]
+        return [pk for ignore_for_fusion, pk in sorted(instances, key=lambda instance: instance[0]) if pk != exclude]
+
+    def get_piece_ids(self, family_id):
+        return self.pieces.get(family_id, [])
+
+    def get_skillup_counts(self, family_id, exclude=None):
+        return {
+            'devilmon': self.devilmon,
+            'family': len(self.get_family_instance_ids(family_id, exclude=exclude)),
+            'pieces': len(self.get_piece_ids(family_id)),
+        }
+
+
+def get_skillup_index(summoner):
+    # Cached until anything in the summoner's collection changes
+    return cache.get_or_set(
+        f'skillup-index-{summoner.pk}-{summoner.get_inventory_version()}',
+        lambda: SkillupIndex(summoner.pk),
+        SKILLUP_INDEX_CACHE_TIMEOUT,
+    )
@@ -112,6 +112,7 @@ def com2us_data_import(data, user_id, import_options):
 
         # Set missing buildings to level 0
         BuildingInstance.objects.filter(owner=summoner).exclude(pk__in=[bldg.pk for bldg in results['buildings']]).update(level=0)
+        BuildingInstance.clear_bonus_table(summoner.pk)
 
     if not current_task.request.called_directly:
         current_task.update_state(state=states.STARTED, meta={'step': 'monsters'})
@@ -1,7 +1,6 @@
-from collections import OrderedDict
-
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
+from django.core.cache import cache
 from django.http import HttpResponseForbidden, JsonResponse, HttpResponse, HttpResponseBadRequest
 from django.shortcuts import render, get_object_or_404
 from django.template import loader
@@ -12,6 +11,7 @@ from herders.decorators import username_case_redirect
 from herders.filters import ArtifactInstanceFilter
 from herders.forms import FilterArtifactForm, ArtifactInstanceForm, AssignArtifactForm
 from herders.models import Summoner, MonsterInstance, ArtifactInstance, ArtifactCraftInstance
+from herders.views.base import INVENTORY_CACHE_TIMEOUT, get_inventory_cache_key, group_instances, group_by_assigned_monster
 
 
 @username_case_redirect
@@ -57,88 +57,72 @@ def inventory(request, profile_name, box_grouping=None):
         return HttpResponseBadRequest()
 
     is_owner = (request.user.is_authenticated and summoner.user == request.user)
+
+    if is_owner or summoner.public:
+        cache_key = get_inventory_cache_key(request, summoner, 'artifacts', box_grouping)
+        cached_content = cache.get(cache_key)
+        if cached_content is not None:
+            return HttpResponse(cached_content)
+
     artifact_queryset = ArtifactInstance.objects.filter(
         owner=summoner
     ).select_related(
         'assigned_to', 'assigned_to__monster'
     ).order_by('-quality', '-level')
-    total_count = artifact_queryset.count()
     form = FilterArtifactForm(request.POST or None)
 
     if form.is_valid():
         artifact_filter = ArtifactInstanceFilter(form.cleaned_data, queryset=artifact_queryset)
+        total_count = artifact_queryset.count()
     else:
         artifact_filter = ArtifactInstanceFilter(None, queryset=artifact_queryset)
-
-    filtered_count = artifact_filter.qs.count()
+        total_count = None
 
     context = {
-        'artifacts': artifact_filter.qs,
-        'total_count': total_count,
-        'filtered_count': filtered_count,
         'profile_name': profile_name,
         'summoner': summoner,
         'is_owner': is_owner,
     }
 
     if is_owner or summoner.public:
-        artifact_box = []
+        # Fetch the filtered artifacts once and group them in memory
+        filtered_artifacts = list(artifact_filter.qs)
+        context['filtered_count'] = len(filtered_artifacts)
+        context['total_count'] = total_count if total_count is not None else len(filtered_artifacts)
+
         if box_grouping == 'slot':
             # Element + archetype
-            for slot_val, slot_desc in ArtifactInstance.NORMAL_ELEMENT_CHOICES:
-                artifact_box.append({
-                    'name': slot_desc,
-                    'artifacts': artifact_filter.qs.filter(element=slot_val)
-                })
-            for slot_val, slot_desc in ArtifactInstance.ARCHETYPE_CHOICES:
-                artifact_box.append({
-                    'name': slot_desc,
-                    'artifacts': artifact_filter.qs.filter(archetype=slot_val)
-                })
+            artifact_box = group_instances(
+                filtered_artifacts,
+                key=lambda artifact: artifact.element if artifact.slot == ArtifactInstance.SLOT_ELEMENTAL else artifact.archetype,
+                groups=ArtifactInstance.NORMAL_ELEMENT_CHOICES + ArtifactInstance.ARCHETYPE_CHOICES,
+                items_key='artifacts',
+            )
         elif box_grouping == 'quality':
-            for qual_val, qual_desc in reversed(ArtifactInstance.QUALITY_CHOICES):
-                artifact_box.append({
-                    'name': qual_desc,
-                    'artifacts': artifact_filter.qs.filter(quality=qual_val)
-                })
+            artifact_box = group_instances(
+                filtered_artifacts,
+                key=lambda artifact: artifact.quality,
+                groups=reversed(ArtifactInstance.QUALITY_CHOICES),
+                items_key='artifacts',
+            )
         elif box_grouping == 'orig. quality':
-            for qual_val, qual_desc in reversed(ArtifactInstance.QUALITY_CHOICES):
-                artifact_box.append({
-                    'name': qual_desc,
-                    'artifacts': artifact_filter.qs.filter(original_quality=qual_val)
-                })
-        elif box_grouping == 'equipped':
-            artifact_box.append({
-                'name': 'Not Equipped',
-                'artifacts': artifact_filter.qs.filter(assigned_to__isnull=True)
-            })
-
-            # Create a dictionary of monster PKs and their equipped runes
-            monsters = OrderedDict()
-            unassigned_runes = artifact_filter.qs.filter(
-                assigned_to__isnull=False
-            ).select_related(
-                'assigned_to',
-                'assigned_to__monster'
-            ).order_by(
-                'assigned_to__monster__name',
-                'slot'
+            artifact_box = group_instances(
+                filtered_artifacts,
+                key=lambda artifact: artifact.original_quality,
+                groups=reversed(ArtifactInstance.QUALITY_CHOICES),
+                items_key='artifacts',
             )
-
-            for rune in unassigned_runes:
-                if rune.assigned_to.pk not in monsters:
-                    monsters[rune.assigned_to.pk] = {
-                        'name': str(rune.assigned_to),
-                        'artifacts': []
-                    }
-
-                monsters[rune.assigned_to.pk]['artifacts'].append(rune)
-            for monster_runes in monsters.values():
-                artifact_box.append(monster_runes)
+        elif box_grouping == 'equipped':
+            artifact_box = group_by_assigned_monster(filtered_artifacts, items_key='artifacts')
+        else:
+            artifact_box = []
 
         context['artifacts'] = artifact_box
         context['box_grouping'] = box_grouping
-        return render(request, 'herders/profile/artifacts/inventory.html', context)
+
+        response = render(request, 'herders/profile/artifacts/inventory.html', context)
+        cache.set(cache_key, response.content, INVENTORY_CACHE_TIMEOUT)
+        return response
     else:
         return render(request, 'herders/profile/not_public.html', context)
 
@@ -1,3 +1,7 @@
+import json
+from collections import OrderedDict
+from hashlib import md5
+
 from django.contrib.auth.mixins import UserPassesTestMixin
 from django.http import Http404, HttpResponseRedirect
 from django.urls import reverse
@@ -60,3 +64,70 @@ class OwnerRequiredMixin(IsOwnerMixin, UserPassesTestMixin):
 
     def test_func(self):
         return self.is_owner()
+
+
+# Inventory rendering
+INVENTORY_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def get_inventory_cache_key(request, summoner, inventory, *options):
+    """
+    Cache key for a rendered inventory page. Keyed on the summoner's inventory version so any change to the inventory is
+    shown immediately, and on everything else the page depends on: viewing options, submitted filters and ownership.
+
+    :param inventory: Name of the inventory, e.g. 'runes'
+    :param options: View mode, box grouping or other options the page was rendered with
+    """
+    is_owner = request.user.is_authenticated and summoner.user_id == request.user.pk
+    filters = sorted((field, values) for field, values in request.POST.lists() if field != 'csrfmiddlewaretoken')
+    page_hash = md5(json.dumps([inventory, options, is_owner, filters]).encode()).hexdigest()
+
+    return f'inventory-{summoner.pk}-{summoner.get_inventory_version()}-{page_hash}'
+
+
+def group_instances(instances, key, groups=None, name=str, items_key='instances'):
+    """
+    Partition already fetched instances into boxes in a single pass, keeping the order they were given in.
+
+    :param instances: Iterable of instances, ordered for display within each box
+    :param key: Function returning the key of the box an instance belongs to
+    :param groups: Optional iterable of (key, name) pairs fixing which boxes are shown and in what order. Instances with
+    any other key are left out. By default a box is created for each key in order of first appearance.
+    :param name: Function returning a box name from its first instance, when groups are not given
+    :param items_key: Key of each box's list of instances
+    :return: List of dicts with the name and instances of each box
+    """
+    if groups is not None:
+        boxes = OrderedDict((group_key, {'name': group_name, items_key: []}) for group_key, group_name in groups)
+    else:
+        boxes = OrderedDict()
+
+    for instance in instances:
+        instance_key = key(instance)
+
+        if instance_key not in boxes:
+            if groups is not None:
+                continue
+            boxes[instance_key] = {'name': name(instance), items_key: []}
+
+        boxes[instance_key][items_key].append(instance)
+
+    return list(boxes.values())
+
+
+def group_by_assigned_monster(instances, items_key='instances'):
+    """
+    Box for unequipped instances followed by a box for each monster they are equipped on, sorted by monster name.
+    """
+    unequipped = [instance for instance in instances if instance.assigned_to_id is None]
+    equipped = sorted(
+        (instance for instance in instances if instance.assigned_to_id is not None),
+        key=lambda instance: (instance.assigned_to.monster.name, instance.slot),
+    )
+
+    return [{'name': 'Not Equipped', items_key: unequipped}] + group_instances(
+        equipped,
+        key=lambda instance: instance.assigned_to_id,
+        name=lambda instance: str(instance.assigned_to),
+        items_key=items_key,
+    )
@@ -1,19 +1,29 @@
+import csv
+import json
+from collections import Counter
 from datetime import datetime
-from functools import reduce
+from hashlib import md5
+from itertools import chain
 
+from django.core.cache import cache
 from django.core.exceptions import ImproperlyConfigured
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db.models import Model, QuerySet, Q, F, Min, Max, Avg, Count, Sum, Value, CharField, Case, When
 from django.db.models.functions import Concat
-from django.http import Http404
+from django.http import Http404, StreamingHttpResponse
 from django.views.generic import FormView, ListView, TemplateView
 from django_pivot.histogram import histogram
 
 from bestiary.models import Dungeon, Level, GameItem, RuneCraft
 from data_log.reports.generate import get_drop_querysets, drop_report, get_monster_report, get_rune_report
-from data_log.util import transform_to_dict, replace_value_with_choice, floor_to_nearest, ceil_to_nearest
+from data_log.models import CraftRuneReport, MagicBoxReport
+from data_log.rollups import get_drop_totals
+from data_log.util import transform_to_dict, replace_value_with_choice, floor_to_nearest, ceil_to_nearest, \
+    get_data_log_version
 from herders.forms import FilterLogTimestamp, FilterDungeonLogForm, FilterRiftDungeonForm, FilterSummonLogForm, \
     FilterWorldBossLogForm, FilterRiftDungeonFormGradeOnly, FilterRiftRaidLogForm, FilterRuneCraftLogForm, FilterMagicBoxCraftLogForm
 from herders.models import Monster, RuneInstance
+from herders.pagination import KeysetPage
 from .base import SummonerMixin, OwnerRequiredMixin
 
 
@@ -31,6 +41,7 @@ class DataLogView(SectionMixin, SummonerMixin, OwnerRequiredMixin, FormView):
     timestamp_session_key = 'data_log_timestamps'
     log_count = None
     max_records = 2000
+    summary_cache_timeout = 60 * 60 * 24
 
     def get(self, request, *args, **kwargs):
         form = self.get_form()
@@ -62,24 +73,42 @@ class DataLogView(SectionMixin, SummonerMixin, OwnerRequiredMixin, FormView):
         qs = qs.filter(query)
 
         # Trim queryset to max number of records, if defined
+        max_records = self.get_max_records()
         num_records = qs.count()
-        if self.max_records and num_records > self.max_records:
-            temp_slice = qs[:self.max_records]
+        if max_records and num_records > max_records:
+            temp_slice = qs[:max_records]
             earliest_record = temp_slice[temp_slice.count() - 1]
             qs = qs.filter(timestamp__gte=earliest_record.timestamp)
 
         return qs
 
-    def get_context_data(self, **kwargs):
-        context = {
+    def get_summary_data(self):
+        # Everything calculated from the summoner's logs. Subclasses extend this rather than get_context_data()
+        # so the result is cached until new logs are uploaded.
+        # The count may come from rollups, so it does not guarantee the queryset has any logs
+        first_log = self.get_queryset().last()
+        last_log = self.get_queryset().first()
+
+        return {
             'total_count': self.get_log_count(),
-            'records_limited': self.max_records and self.get_log_count() == self.max_records,
-            'start_date': self.get_queryset().last().timestamp if self.get_log_count() else None,
-            'end_date': self.get_queryset().first().timestamp if self.get_log_count() else None,
+            'records_limited': self.get_max_records() and self.get_log_count() == self.get_max_records(),
+            'start_date': first_log.timestamp if first_log else None,
+            'end_date': last_log.timestamp if last_log else None,
         }
+
+    def get_summary_cache_key(self):
+        filters = json.dumps(self.get_filters(), sort_keys=True)
+        request_hash = md5(f'{self.request.path}{filters}'.encode()).hexdigest()
+        return f'data-log-summary-{self.summoner.pk}-{get_data_log_version(self.summoner.pk)}-{request_hash}'
+
+    def get_context_data(self, **kwargs):
+        context = cache.get_or_set(self.get_summary_cache_key(), self.get_summary_data, self.summary_cache_timeout)
         context.update(kwargs)
         return super().get_context_data(**context)
 
+    def get_max_records(self):
+        return self.max_records
+
     def get_log_type(self):
         if self.log_type is None:
             raise ImproperlyConfigured("log_type is required")
@@ -138,37 +167,211 @@ class SuccessMixin:
         qs = super().get_queryset()
         return qs.filter(success__isnull=False)
 
-    def get_context_data(self, **kwargs):
-        context = {
-            'success_rate': self.get_success_rate()
-        }
-        context.update(kwargs)
-        return super().get_context_data(**context)
+    def get_summary_data(self):
+        summary = super().get_summary_data()
+        summary['success_rate'] = self.get_success_rate()
+        return summary
 
 
 class GradeMixin:
     def get_grade_statistics(self):
         return super().get_queryset().aggregate(min=Min('grade'), avg=Avg('grade'), max=Max('grade'))
 
-    def get_context_data(self, **kwargs):
-        context = {
-            'grade_stats': self.get_grade_statistics()
+    def get_summary_data(self):
+        summary = super().get_summary_data()
+        summary['grade_stats'] = self.get_grade_statistics()
+        return summary
+
+
+class DropsMixin:
+    def get_recent_drops(self):
+        all_drops = get_drop_querysets(self.get_queryset())
+        return {
+            'items': list(all_drops['items'].values(
+                'item',
+                name=F('item__name'),
+                icon=F('item__icon'),
+            ).annotate(
+                count=Sum('quantity')
+            ).order_by('-count')) if 'items' in all_drops else [],
+            'monsters': replace_value_with_choice(
+                list(all_drops['monsters'].values(
+                    name=F('monster__name'),
+                    icon=F('monster__image_filename'),
+                    element=F('monster__element'),
+                    stars=F('grade'),
+                    is_awakened=F('monster__is_awakened'),
+                    can_awaken=F('monster__can_awaken'),
+                ).annotate(
+                    count=Count('pk')
+                ).order_by('-count')),
+                {'element': Monster.ELEMENT_CHOICES}) if 'monsters' in all_drops else [],
+            'runes': replace_value_with_choice(
+                list(all_drops['runes'].values(
+                    'type',
+                    'quality',
+                    'stars',
+                ).annotate(
+                    count=Count('pk')
+                ).order_by('-count') if 'runes' in all_drops else []),
+                {
+                    'type': RuneInstance.TYPE_CHOICES,
+                    'quality': RuneInstance.QUALITY_CHOICES,
+                }
+            ),
+        }
+
+
+class DropRollupMixin(DropsMixin):
+    # Log counts and drop totals are read from the daily drop rollups when the filters allow it, falling back to the
+    # raw logs otherwise. Rollups cover the summoner's entire history so max_records does not apply to them.
+    rollup_filters = {}
+    drop_totals = None
+
+    def get_drop_totals(self):
+        if self.drop_totals is None:
+            model = getattr(self.summoner, f'{self.get_log_type()}_set').model
+            filters = dict(self.get_filters(), **self.rollup_filters)
+            self.drop_totals = get_drop_totals(self.summoner, model, filters) or {}
+
+        return self.drop_totals
+
+    def get_max_records(self):
+        return None if self.get_drop_totals() else super().get_max_records()
+
+    def get_log_count(self):
+        if self.get_drop_totals():
+            return sum(level['log_count'] for level in self.get_drop_totals()['levels'].values())
+
+        return super().get_log_count()
+
+    def get_success_rate(self):
+        if not self.get_drop_totals():
+            return super().get_success_rate()
+
+        if self.get_log_count():
+            success_count = sum(level['success_count'] for level in self.get_drop_totals()['levels'].values())
+            return float(success_count) / self.get_log_count() * 100
+
+    def get_recent_drops(self):
+        totals = self.get_drop_totals()
+        if not totals:
+            return super().get_recent_drops()
+
+        items = GameItem.objects.in_bulk(totals['items'].keys())
+        monsters = Monster.objects.in_bulk({monster for monster, _ in totals['monsters'].keys()})
+
+        # Rollups are per monster and grade. Regroup to match the raw log query.
+        monster_drops = Counter()
+        for (monster_id, grade), count in totals['monsters'].items():
+            monster = monsters[monster_id]
+            monster_drops[(
+                monster.name,
+                monster.image_filename,
+                monster.element,
+                grade,
+                monster.is_awakened,
+                monster.can_awaken,
+            )] += count
+
+        return {
+            'items': [
+                {'item': item_id, 'name': items[item_id].name, 'icon': items[item_id].icon, 'count': count}
+                for item_id, count in totals['items'].most_common()
+            ],
+            'monsters': replace_value_with_choice(
+                [
+                    dict(zip(('name', 'icon', 'element', 'stars', 'is_awakened', 'can_awaken'), monster), count=count)
+                    for monster, count in monster_drops.most_common()
+                ],
+                {'element': Monster.ELEMENT_CHOICES}
+            ),
+            'runes': replace_value_with_choice(
+                [
+                    {'type': rune_type, 'quality': quality, 'stars': stars, 'count': count}
+                    for (rune_type, quality, stars), count in totals['runes'].most_common()
+                ],
+                {
+                    'type': RuneInstance.TYPE_CHOICES,
+                    'quality': RuneInstance.QUALITY_CHOICES,
+                }
+            ),
         }
-        context.update(**kwargs)
-        return super().get_context_data(**context)
+
+    def get_rollup_energy_spent(self):
+        # (level, energy spent) for each level in the rollups, most energy first
+        levels = Level.objects.select_related('dungeon').in_bulk(self.get_drop_totals()['levels'].keys())
+        return sorted(
+            [
+                (levels[level_id], totals['log_count'] * (levels[level_id].energy_cost or 0))
+                for level_id, totals in self.get_drop_totals()['levels'].items()
+            ],
+            key=lambda level_energy: level_energy[1],
+            reverse=True,
+        )
+
+
+class _Echo:
+    # File-like object that hands back what is written, for streaming csv.writer output
+    def write(self, value):
+        return value
 
 
 class TableView(DataLogView, ListView):
     paginate_by = 50
+    max_records = None  # Keyset pagination pages through the entire log history
     context_object_name = 'logs'
+    export_formats = ('csv', 'ndjson')
+    export_chunk_size = 2000
+
+    def get(self, request, *args, **kwargs):
+        export_format = request.GET.get('export')
+        if export_format in self.export_formats:
+            return self.export(export_format)
+
+        return super().get(request, *args, **kwargs)
+
+    def get_queryset(self):
+        # Logs without a timestamp cannot be placed by the (timestamp, pk) keyset
+        return super().get_queryset().filter(timestamp__isnull=False)
+
+    def paginate_queryset(self, queryset, page_size):
+        page = KeysetPage(
+            queryset,
+            page_size,
+            after=self.request.GET.get('after'),
+            before=self.request.GET.get('before'),
+        )
+        return None, page, page.object_list, page.has_next or page.has_previous
+
+    def get_export_fields(self):
+        return [field.attname for field in self.get_queryset().model._meta.concrete_fields]
+
+    def export(self, export_format):
+        fields = self.get_export_fields()
+        rows = self.get_queryset().order_by('-timestamp', '-pk').values_list(*fields).iterator(
+            chunk_size=self.export_chunk_size
+        )
+
+        if export_format == 'csv':
+            writer = csv.writer(_Echo())
+            content = chain([writer.writerow(fields)], (writer.writerow(row) for row in rows))
+            content_type = 'text/csv'
+        else:
+            content = (json.dumps(dict(zip(fields, row)), cls=DjangoJSONEncoder) + '\n' for row in rows)
+            content_type = 'application/x-ndjson'
+
+        response = StreamingHttpResponse(content, content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="{self.get_log_type()}.{export_format}"'
+        return response
 
 
 # Home views
 class Dashboard(SectionMixin, SummonerMixin, OwnerRequiredMixin, TemplateView):
     template_name = 'herders/profile/data_logs/dashboard.html'
 
-    def get_context_data(self, **kwargs):
-        log_counts = {
+    def get_log_counts(self):
+        return {
             'magic_shop': self.summoner.shoprefreshlog_set.count(),
             'wish': self.summoner.wishlog_set.count(),
             'rune_crafting': self.summoner.craftrunelog_set.count(),
@@ -179,8 +382,15 @@ class Dashboard(SectionMixin, SummonerMixin, OwnerRequiredMixin, TemplateView):
             'rift_raid': self.summoner.riftraidlog_set.count(),
             'world_boss': self.summoner.worldbosslog_set.count(),
         }
+
+    def get_context_data(self, **kwargs):
+        log_counts = cache.get_or_set(
+            f'data-log-counts-{self.summoner.pk}-{get_data_log_version(self.summoner.pk)}',
+            self.get_log_counts,
+            DataLogView.summary_cache_timeout,
+        )
         kwargs['counts'] = log_counts
-        kwargs['total'] = reduce(lambda a, b: a + b, log_counts.values())
+        kwargs['total'] = sum(log_counts.values())
 
         return super().get_context_data(**kwargs)
 
@@ -201,84 +411,60 @@ class DungeonMixin(SuccessMixin):
         return qs.filter(success__isnull=False).exclude(level__dungeon__enabled=False)
 
 
-class DungeonDashboard(DashboardMixin, DungeonMixin, DataLogView):
+class DungeonDashboard(DashboardMixin, DropRollupMixin, DungeonMixin, DataLogView):
     template_name = 'herders/profile/data_logs/dungeons/dashboard.html'
+    rollup_filters = {'level__dungeon__enabled': True}
+
+    def get_summary_data(self):
+        recent_drops = self.get_recent_drops()
+
+        if self.get_drop_totals():
+            energy_spent = self.get_rollup_energy_spent()
+            energy_spent_data = Counter()
+            for level, energy in energy_spent:
+                energy_spent_data[f'{level.dungeon.name} B{level.floor}'] += energy
+            energy_spent_data = dict(energy_spent_data.most_common())
+            level_list = [level for level, _ in energy_spent[:20]]
+        else:
+            energy_spent_data = transform_to_dict(
+                list(
+                    self.get_queryset().values(
+                        'level'
+                    ).annotate(
+                        dungeon_name=Concat(
+                            F('level__dungeon__name'),
+                            Value(' B'),
+                            F('level__floor'),
+                            output_field=CharField()
+                        ),
+                        count=Sum('level__energy_cost'),
+                    ).order_by('-count')
+                ),
+                name_key='dungeon_name',
+            )
 
-    def get_context_data(self, **kwargs):
-        all_drops = get_drop_querysets(self.get_queryset())
-        recent_drops = {
-            'items': all_drops['items'].values(
-                'item',
-                name=F('item__name'),
-                icon=F('item__icon'),
-            ).annotate(
-                count=Sum('quantity')
-            ).order_by('-count') if 'items' in all_drops else [],
-            'monsters': replace_value_with_choice(
-                list(all_drops['monsters'].values(
-                    name=F('monster__name'),
-                    icon=F('monster__image_filename'),
-                    element=F('monster__element'),
-                    stars=F('grade'),
-                    is_awakened=F('monster__is_awakened'),
-                    can_awaken=F('monster__can_awaken'),
-                ).annotate(
-                    count=Count('pk')
-                ).order_by('-count')),
-                {'element': Monster.ELEMENT_CHOICES}) if 'monsters' in all_drops else [],
-            # 'monster_pieces': 'insert_data_here' if 'monster_pieces' in all_drops else [],
-            'runes': replace_value_with_choice(
-                list(all_drops['runes'].values(
-                    'type',
-                    'quality',
-                    'stars',
-                ).annotate(
-                    count=Count('pk')
-                ).order_by('-count') if 'runes' in all_drops else []),
-                {
-                    'type': RuneInstance.TYPE_CHOICES,
-                    'quality': RuneInstance.QUALITY_CHOICES,
-                }
-            ),
-            # 'secret_dungeons': 'insert_data_here' if 'runes' in all_drops else [],
-        }
+            level_order = self.get_queryset().values('level').annotate(
+                energy_spent=Sum('level__energy_cost')
+            ).order_by('-energy_spent').values_list('level', flat=True)
+            preserved_order = Case(*[When(pk=pk, then=pos) for pos, pk in enumerate(level_order)])
+            level_list = Level.objects.filter(
+                pk__in=set(self.get_queryset().values_list('level', flat=True))
+            ).order_by(preserved_order).prefetch_related('dungeon')[:20]
 
         dashboard_data = {
             'energy_spent': {
                 'type': 'occurrences',
                 'total': self.get_log_count(),
-                'data': transform_to_dict(
-                    list(
-                        self.get_queryset().values(
-                            'level'
-                        ).annotate(
-                            dungeon_name=Concat(
-                                F('level__dungeon__name'),
-                                Value(' B'),
-                                F('level__floor'),
-                                output_field=CharField()
-                            ),
-                            count=Sum('level__energy_cost'),
-                        ).order_by('-count')
-                    ),
-                    name_key='dungeon_name',
-                ),
+                'data': energy_spent_data,
             },
             'recent_drops': recent_drops,
         }
 
-        level_order = self.get_queryset().values('level').annotate(
-            energy_spent=Sum('level__energy_cost')
-        ).order_by('-energy_spent').values_list('level', flat=True)
-        preserved_order = Case(*[When(pk=pk, then=pos) for pos, pk in enumerate(level_order)])
-        level_list = Level.objects.filter(
-            pk__in=set(self.get_queryset().values_list('level', flat=True))
-        ).order_by(preserved_order).prefetch_related('dungeon')[:20]
+        summary = super().get_summary_data()
+        summary['dashboard'] = dashboard_data
+        summary['level_list'] = list(level_list)
 
-        kwargs['dashboard'] = dashboard_data
-        kwargs['level_list'] = level_list
-
-        return super().get_context_data(**kwargs)
+        return summary
 
 
 class DungeonDetail(DetailMixin, DungeonMixin, DataLogView):
@@ -289,11 +475,15 @@ class DungeonDetail(DetailMixin, DungeonMixin, DataLogView):
     def get_queryset(self):
         return super().get_queryset().filter(level=self.get_level())
 
+    def get_summary_data(self):
+        summary = super().get_summary_data()
+        summary['report'] = drop_report(self.get_queryset(), min_count=0)
+        return summary
+
     def get_context_data(self, **kwargs):
         context = {
             'dungeon': self.get_dungeon(),
             'level': self.get_level(),
-            'report': drop_report(self.get_queryset(), min_count=0),
         }
 
         context.update(kwargs)
@@ -360,72 +550,48 @@ class ElementalRiftDungeonMixin(SuccessMixin, GradeMixin):
     form_class = FilterRiftDungeonForm
 
 
-class ElementalRiftDungeonDashboard(DashboardMixin, ElementalRiftDungeonMixin, DataLogView):
+class ElementalRiftDungeonDashboard(DashboardMixin, DropRollupMixin, ElementalRiftDungeonMixin, DataLogView):
     template_name = 'herders/profile/data_logs/rift_dungeon/dashboard.html'
 
-    def get_context_data(self, **kwargs):
-        all_drops = get_drop_querysets(self.get_queryset())
-        recent_drops = {
-            'items': all_drops['items'].values(
-                'item',
-                name=F('item__name'),
-                icon=F('item__icon'),
-            ).annotate(
-                count=Sum('quantity')
-            ).order_by('-count') if 'items' in all_drops else [],
-            'monsters': replace_value_with_choice(
-                list(all_drops['monsters'].values(
-                    name=F('monster__name'),
-                    icon=F('monster__image_filename'),
-                    element=F('monster__element'),
-                    stars=F('grade'),
-                    is_awakened=F('monster__is_awakened'),
-                    can_awaken=F('monster__can_awaken'),
-                ).annotate(
-                    count=Count('pk')
-                ).order_by('-count')),
-                {'element': Monster.ELEMENT_CHOICES}) if 'monsters' in all_drops else [],
-            'runes': replace_value_with_choice(
-                list(all_drops['runes'].values(
-                    'type',
-                    'quality',
-                    'stars',
-                ).annotate(
-                    count=Count('pk')
-                ).order_by('-count') if 'runes' in all_drops else []),
-                {
-                    'type': RuneInstance.TYPE_CHOICES,
-                    'quality': RuneInstance.QUALITY_CHOICES,
-                }
-            ),
-        }
+    def get_summary_data(self):
+        recent_drops = self.get_recent_drops()
+
+        if self.get_drop_totals():
+            energy_spent = self.get_rollup_energy_spent()
+            energy_spent_data = Counter()
+            for level, energy in energy_spent:
+                energy_spent_data[level.dungeon.name] += energy
+            energy_spent_data = dict(energy_spent_data.most_common())
+            level_list = [level for level, _ in energy_spent]
+        else:
+            energy_spent_data = transform_to_dict(
+                list(
+                    self.get_queryset().values(
+                        'level__dungeon__name'
+                    ).annotate(
+                        count=Sum('level__energy_cost'),
+                    ).order_by('-count')
+                ),
+                name_key='level__dungeon__name',
+            )
+            level_list = Level.objects.filter(
+                pk__in=set(self.get_queryset().values_list('level', flat=True))
+            )
 
         dashboard_data = {
             'energy_spent': {
                 'type': 'occurrences',
                 'total': self.get_log_count(),
-                'data': transform_to_dict(
-                    list(
-                        self.get_queryset().values(
-                            'level__dungeon__name'
-                        ).annotate(
-                            count=Sum('level__energy_cost'),
-                        ).order_by('-count')
-                    ),
-                    name_key='level__dungeon__name',
-                ),
+                'data': energy_spent_data,
             },
             'recent_drops': recent_drops,
         }
 
-        level_list = Level.objects.filter(
-            pk__in=set(self.get_queryset().values_list('level', flat=True))
-        )
+        summary = super().get_summary_data()
+        summary['dashboard'] = dashboard_data
+        summary['level_list'] = list(level_list)
 
-        kwargs['dashboard'] = dashboard_data
-        kwargs['level_list'] = level_list
-
-        return super().get_context_data(**kwargs)
+        return summary
 
 
 class ElementalRiftDungeonDetail(DashboardMixin, ElementalRiftDungeonMixin, DataLogView):
@@ -437,7 +603,7 @@ class ElementalRiftDungeonDetail(DashboardMixin, ElementalRiftDungeonMixin, Data
     def get_queryset(self):
         return super().get_queryset().filter(level=self.get_level())
 
-    def get_context_data(self, **kwargs):
+    def get_summary_data(self):
         if self.get_log_count():
             bin_width = 50000
             damage_stats = self.get_queryset().aggregate(min=Min('total_damage'), max=Max('total_damage'))
@@ -446,16 +612,23 @@ class ElementalRiftDungeonDetail(DashboardMixin, ElementalRiftDungeonMixin, Data
             damage_histogram = {
                 'type': 'histogram',
                 'width': bin_width,
-                'data': histogram(self.get_queryset(), 'total_damage', range(bin_start, bin_end, bin_width)),
+                'data': list(histogram(self.get_queryset(), 'total_damage', range(bin_start, bin_end, bin_width))),
             }
         else:
             damage_histogram = None
 
+        summary = super().get_summary_data()
+        summary.update({
+            'report': drop_report(self.get_queryset(), min_count=0),
+            'damage_histogram': damage_histogram
+        })
+
+        return summary
+
+    def get_context_data(self, **kwargs):
         context = {
             'dungeon': self.get_dungeon(),
             'level': self.get_level(),
-            'report': drop_report(self.get_queryset(), min_count=0),
-            'damage_histogram': damage_histogram
         }
 
         context.update(kwargs)
@@ -494,16 +667,16 @@ class RiftRaidMixin(SuccessMixin):
 class RiftRaidDashboard(DashboardMixin, RiftRaidMixin, DataLogView):
     template_name = 'herders/profile/data_logs/rift_raid/dashboard.html'
 
-    def get_context_data(self, **kwargs):
+    def get_summary_data(self):
         all_drops = get_drop_querysets(self.get_queryset())
         recent_drops = {
-            'items': all_drops['items'].values(
+            'items': list(all_drops['items'].values(
                 'item',
                 name=F('item__name'),
                 icon=F('item__icon'),
             ).annotate(
                 count=Sum('quantity')
-            ).order_by('-count') if 'items' in all_drops else [],
+            ).order_by('-count')) if 'items' in all_drops else [],
             'monsters': replace_value_with_choice(
                 list(all_drops['monsters'].values(
                     name=F('monster__name'),
@@ -537,12 +710,13 @@ class RiftRaidDashboard(DashboardMixin, RiftRaidMixin, DataLogView):
             pk__in=set(self.get_queryset().values_list('level', flat=True))
         ).order_by('-floor').prefetch_related('dungeon')
 
-        kwargs['dashboard'] = {
+        summary = super().get_summary_data()
+        summary['dashboard'] = {
             'recent_drops': recent_drops,
         }
-        kwargs['level_list'] = level_list
+        summary['level_list'] = list(level_list)
 
-        return super().get_context_data(**kwargs)
+        return summary
 
 
 class RiftRaidDetail(DetailMixin, RiftRaidMixin, DataLogView):
@@ -554,19 +728,18 @@ class RiftRaidDetail(DetailMixin, RiftRaidMixin, DataLogView):
     def get_queryset(self):
         return super().get_queryset().filter(level=self.get_level())
 
-    def get_context_data(self, **kwargs):
+    def get_summary_data(self):
         if self.get_log_count():
             contribution_histogram = {
                 'type': 'histogram',
                 'width': 1,
-                'data': histogram(self.get_queryset(), 'contribution_amount', range(0, 100)),
+                'data': list(histogram(self.get_queryset(), 'contribution_amount', range(0, 100))),
             }
         else:
             contribution_histogram = None
 
-        context = {
-            'dungeon': self.get_dungeon(),
-            'level': self.get_level(),
+        summary = super().get_summary_data()
+        summary.update({
             'report': drop_report(
                 self.get_queryset(),
                 min_count=0,
@@ -575,6 +748,14 @@ class RiftRaidDetail(DetailMixin, RiftRaidMixin, DataLogView):
                 owner_only=True,
             ),
             'contribution_histogram': contribution_histogram
+        })
+
+        return summary
+
+    def get_context_data(self, **kwargs):
+        context = {
+            'dungeon': self.get_dungeon(),
+            'level': self.get_level(),
         }
 
         context.update(kwargs)
@@ -611,45 +792,11 @@ class WorldBossMixin(GradeMixin):
     form_class = FilterWorldBossLogForm
 
 
-class WorldBossDashboard(DashboardMixin, WorldBossMixin, DataLogView):
+class WorldBossDashboard(DashboardMixin, DropsMixin, WorldBossMixin, DataLogView):
     template_name = 'herders/profile/data_logs/world_boss/dashboard.html'
 
-    def get_context_data(self, **kwargs):
-        all_drops = get_drop_querysets(self.get_queryset())
-        recent_drops = {
-            'items': all_drops['items'].values(
-                'item',
-                name=F('item__name'),
-                icon=F('item__icon'),
-            ).annotate(
-                count=Sum('quantity')
-            ).order_by('-count') if 'items' in all_drops else [],
-            'monsters': replace_value_with_choice(
-                list(all_drops['monsters'].values(
-                    name=F('monster__name'),
-                    icon=F('monster__image_filename'),
-                    element=F('monster__element'),
-                    stars=F('grade'),
-                    is_awakened=F('monster__is_awakened'),
-                    can_awaken=F('monster__can_awaken'),
-                ).annotate(
-                    count=Count('pk')
-                ).order_by('-count')),
-                {'element': Monster.ELEMENT_CHOICES}) if 'monsters' in all_drops else [],
-            'runes': replace_value_with_choice(
-                list(all_drops['runes'].values(
-                    'type',
-                    'quality',
-                    'stars',
-                ).annotate(
-                    count=Count('pk')
-                ).order_by('-count') if 'runes' in all_drops else []),
-                {
-                    'type': RuneInstance.TYPE_CHOICES,
-                    'quality': RuneInstance.QUALITY_CHOICES,
-                }
-            ),
-        }
+    def get_summary_data(self):
+        recent_drops = self.get_recent_drops()
 
         if self.get_log_count():
             bin_width = 50000
@@ -659,21 +806,21 @@ class WorldBossDashboard(DashboardMixin, WorldBossMixin, DataLogView):
             damage_histogram = {
                 'type': 'histogram',
                 'width': bin_width,
-                'data': histogram(self.get_queryset(), 'damage', range(bin_start, bin_end, bin_width)),
+                'data': list(histogram(self.get_queryset(), 'damage', range(bin_start, bin_end, bin_width))),
             }
         else:
             damage_histogram = None
 
-        context = {
+        summary = super().get_summary_data()
+        summary.update({
             'dashboard': {
                 'recent_drops': recent_drops,
             },
             'report': drop_report(self.get_queryset(), min_count=0),
             'damage_histogram': damage_histogram
-        }
+        })
 
-        context.update(kwargs)
-        return super().get_context_data(**context)
+        return summary
 
 
 class WorldBossTable(WorldBossMixin, TableView):
@@ -689,7 +836,7 @@ class SummonsMixin:
 class SummonsDashboard(DashboardMixin, SummonsMixin, DataLogView):
     template_name = 'herders/profile/data_logs/summons/dashboard.html'
 
-    def get_context_data(self, **kwargs):
+    def get_summary_data(self):
         dashboard_data = {
             'summons_performed': {
                 'type': 'occurrences',
@@ -705,13 +852,13 @@ class SummonsDashboard(DashboardMixin, SummonsMixin, DataLogView):
             pk__in=set(self.get_queryset().values_list('item', flat=True))
         )
 
-        context = {
+        summary = super().get_summary_data()
+        summary.update({
             'dashboard': dashboard_data,
-            'item_list': item_list,
-        }
+            'item_list': list(item_list),
+        })
 
-        context.update(kwargs)
-        return super().get_context_data(**context)
+        return summary
 
 
 class SummonsDetail(DetailMixin, SummonsMixin, DataLogView):
@@ -732,10 +879,14 @@ class SummonsDetail(DetailMixin, SummonsMixin, DataLogView):
 
         return self.item
 
+    def get_summary_data(self):
+        summary = super().get_summary_data()
+        summary['report'] = get_monster_report(self.get_queryset(), self.get_log_count(), min_count=0)
+        return summary
+
     def get_context_data(self, **kwargs):
         context = {
             'item': self.get_item(),
-            'report': get_monster_report(self.get_queryset(), self.get_log_count(), min_count=0)
         }
 
         context.update(kwargs)
@@ -755,12 +906,10 @@ class MagicShopMixin:
 class MagicShopDashboard(DashboardMixin, MagicShopMixin, DataLogView):
     template_name = 'herders/profile/data_logs/magic_shop/dashboard.html'
 
-    def get_context_data(self, **kwargs):
-        context = {
-            'report': drop_report(self.get_queryset(), min_count=0)
-        }
-        context.update(kwargs)
-        return super().get_context_data(**context)
+    def get_summary_data(self):
+        summary = super().get_summary_data()
+        summary['report'] = drop_report(self.get_queryset(), min_count=0)
+        return summary
 
 
 class MagicShopTable(MagicShopMixin, TableView):
@@ -776,12 +925,10 @@ class WishMixin:
 class WishDashboard(DashboardMixin, WishMixin, DataLogView):
     template_name = 'herders/profile/data_logs/wish/dashboard.html'
 
-    def get_context_data(self, **kwargs):
-        context = {
-            'report': drop_report(self.get_queryset(), min_count=0, include_currency=True)
-        }
-        context.update(kwargs)
-        return super().get_context_data(**context)
+    def get_summary_data(self):
+        summary = super().get_summary_data()
+        summary['report'] = drop_report(self.get_queryset(), min_count=0, include_currency=True)
+        return summary
 
 
 class WishTable(WishMixin, TableView):
@@ -797,10 +944,16 @@ class RuneCraftMixin:
 class RuneCraftDashboard(DashboardMixin, RuneCraftMixin, DataLogView):
     template_name = 'herders/profile/data_logs/rune_craft/dashboard.html'
 
+    def get_summary_data(self):
+        summary = super().get_summary_data()
+        summary['report'] = get_rune_report(self.get_queryset(), self.get_log_count(), min_count=0)
+        return summary
+
     def get_context_data(self, **kwargs):
         context = {
-            'report': get_rune_report(self.get_queryset(), self.get_log_count(), min_count=0)
+            'global_reports': CraftRuneReport.get_latest_reports().defer('report'),  # Report data is only loaded if not cached
         }
+
         context.update(kwargs)
         return super().get_context_data(**context)
 
@@ -818,10 +971,16 @@ class MagicBoxCraftMixin:
 class MagicBoxCraftDashboard(DashboardMixin, MagicBoxCraftMixin, DataLogView):
     template_name = 'herders/profile/data_logs/magic_box/dashboard.html'
 
+    def get_summary_data(self):
+        summary = super().get_summary_data()
+        summary['report'] = drop_report(self.get_queryset(), min_count=0, include_currency=True)
+        return summary
+
     def get_context_data(self, **kwargs):
         context = {
-            'report': drop_report(self.get_queryset(), min_count=0, include_currency=True)
+            'global_reports': MagicBoxReport.get_latest_reports().defer('report'),  # Report data is only loaded if not cached
         }
+
         context.update(kwargs)
         return super().get_context_data(**context)
 
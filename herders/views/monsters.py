@@ -3,8 +3,8 @@ from collections import OrderedDict
 from crispy_forms.bootstrap import FieldWithButtons, StrictButton, Field, Div
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
+from django.core.cache import cache
 from django.core.exceptions import PermissionDenied, ObjectDoesNotExist
-from django.db.models import Q
 from django.forms.models import modelformset_factory
 from django.http import HttpResponseForbidden, JsonResponse, HttpResponse, HttpResponseBadRequest
 from django.shortcuts import render, redirect, get_object_or_404
@@ -20,10 +20,87 @@ from herders.forms import FilterMonsterInstanceForm, \
     BulkAddMonsterInstanceFormset, EditMonsterInstanceForm, PowerUpMonsterInstanceForm, AwakenMonsterInstanceForm, \
     MonsterPieceForm
 from herders.models import Summoner, MonsterInstance, MonsterPiece, Storage, ArtifactInstance
+from herders.views.base import INVENTORY_CACHE_TIMEOUT, get_inventory_cache_key, group_instances
 
 DEFAULT_VIEW_MODE = 'box'
 
 
+def _level_range(instance):
+    if instance.level == 40:
+        return '40'
+    elif instance.level > 30:
+        return '39-31'
+    elif instance.level > 20:
+        return '30-21'
+    elif instance.level > 10:
+        return '20-11'
+    else:
+        return '10-1'
+
+
+# Box grouping: (order of monsters within each box, function returning an instance's box, (key, box name) pairs)
+# Boxes are created for each family as they are found, so it has no fixed list.
+MONSTER_BOX_GROUPINGS = {
+    'grade': (
+        ('-level', 'monster__element', 'monster__name'),
+        lambda instance: instance.stars,
+        [(stars, f'{stars}*') for stars in reversed(range(1, 7))],
+    ),
+    'natural_stars': (
+        ('-stars', '-level', 'monster__name'),
+        lambda instance: instance.monster.natural_stars,
+        [(stars, f'Natural {stars}*') for stars in reversed(range(1, 6))],
+    ),
+    'level': (
+        ('-level', '-stars', 'monster__element', 'monster__name'),
+        _level_range,
+        [(level_range, level_range) for level_range in ('40', '39-31', '30-21', '20-11', '10-1')],
+    ),
+    'element': (
+        ('-stars', '-level', 'monster__name'),
+        lambda instance: instance.monster.element,
+        [(element, element) for element in (
+            Monster.ELEMENT_WATER,
+            Monster.ELEMENT_FIRE,
+            Monster.ELEMENT_WIND,
+            Monster.ELEMENT_LIGHT,
+            Monster.ELEMENT_DARK,
+        )],
+    ),
+    'archetype': (
+        ('-stars', '-level', 'monster__name'),
+        lambda instance: instance.monster.archetype,
+        [
+            (Monster.ARCHETYPE_ATTACK, 'attack'),
+            (Monster.ARCHETYPE_HP, 'hp'),
+            (Monster.ARCHETYPE_SUPPORT, 'support'),
+            (Monster.ARCHETYPE_DEFENSE, 'defense'),
+            (Monster.ARCHETYPE_MATERIAL, 'material'),
+            (Monster.ARCHETYPE_NONE, 'other'),
+        ],
+    ),
+    'priority': (
+        ('-level', 'monster__element', 'monster__name'),
+        lambda instance: instance.priority or None,
+        [
+            (MonsterInstance.PRIORITY_HIGH, 'High'),
+            (MonsterInstance.PRIORITY_MED, 'Medium'),
+            (MonsterInstance.PRIORITY_LOW, 'Low'),
+            (None, 'None'),
+        ],
+    ),
+    'family': (
+        ('-stars', '-level', 'monster__name'),
+        lambda instance: instance.monster.base_monster.name,
+        None,
+    ),
+}
+BOX_GROUPING_ALIASES = {
+    'stars': 'grade',
+    'attribute': 'element',
+}
+
+
 @username_case_redirect
 def monsters(request, profile_name):
     try:
@@ -70,11 +147,18 @@ def monster_inventory(request, profile_name, view_mode=None, box_grouping=None):
     except Summoner.DoesNotExist:
         return render(request, 'herders/profile/not_found.html')
 
-    monster_queryset = MonsterInstance.objects.filter(owner=summoner).select_related('monster', 'monster__awakens_from')
-    total_monsters = monster_queryset.count()
-
     is_owner = (request.user.is_authenticated and summoner.user == request.user)
 
+    # The list view shows teams, tags and builds, which don't change the inventory version, so it is never cached
+    cache_key = None
+    if (is_owner or summoner.public) and view_mode != 'list':
+        cache_key = get_inventory_cache_key(request, summoner, 'monsters', view_mode, box_grouping)
+        cached_content = cache.get(cache_key)
+        if cached_content is not None:
+            return HttpResponse(cached_content)
+
+    monster_queryset = MonsterInstance.objects.filter(owner=summoner).select_related('monster', 'monster__awakens_from')
+
     if view_mode == 'list':
         monster_queryset = monster_queryset.select_related(
             'monster__leader_skill',
@@ -92,15 +176,12 @@ def monster_inventory(request, profile_name, view_mode=None, box_grouping=None):
     form = FilterMonsterInstanceForm(request.POST or None, auto_id='id_filter_%s')
     if form.is_valid():
         monster_filter = MonsterInstanceFilter(form.cleaned_data, queryset=monster_queryset)
+        total_monsters = monster_queryset.count()
     else:
         monster_filter = MonsterInstanceFilter(queryset=monster_queryset)
-
-    filtered_count = monster_filter.qs.count()
+        total_monsters = None
 
     context = {
-        'monsters': monster_filter.qs,
-        'total_count': total_monsters,
-        'filtered_count': filtered_count,
         'profile_name': profile_name,
         'is_owner': is_owner,
     }
@@ -110,60 +191,38 @@ def monster_inventory(request, profile_name, view_mode=None, box_grouping=None):
             context['monster_pieces'] = MonsterPiece.objects.filter(owner=summoner).select_related('monster')
             template = 'herders/profile/monster_inventory/summoning_pieces.html'
         elif view_mode == 'list':
+            context['monsters'] = list(monster_filter.qs)
+            context['filtered_count'] = len(context['monsters'])
+            context['total_count'] = total_monsters if total_monsters is not None else context['filtered_count']
             template = 'herders/profile/monster_inventory/list.html'
         else:
-            # Group up the filtered monsters
-            monster_stable = OrderedDict()
-
-            if box_grouping == 'grade' or box_grouping == 'stars':
-                for x in reversed(range(6)):
-                    monster_stable[f'{x+1}*'] = monster_filter.qs.filter(stars=x+1).order_by('-level', 'monster__element', 'monster__name')
-            elif box_grouping == 'natural_stars':
-                for x in reversed(range(5)):
-                    monster_stable[f'Natural {x+1}*'] = monster_filter.qs.filter(monster__natural_stars=x+1).order_by('-stars', '-level', 'monster__name')
-            elif box_grouping == 'level':
-                monster_stable['40'] = monster_filter.qs.filter(level=40).order_by('-level', '-stars', 'monster__element', 'monster__name')
-                monster_stable['39-31'] = monster_filter.qs.filter(level__gt=30).filter(level__lt=40).order_by('-level', '-stars', 'monster__element', 'monster__name')
-                monster_stable['30-21'] = monster_filter.qs.filter(level__gt=20).filter(level__lte=30).order_by( '-level', '-stars', 'monster__element', 'monster__name')
-                monster_stable['20-11'] = monster_filter.qs.filter(level__gt=10).filter(level__lte=20).order_by( '-level', '-stars', 'monster__element', 'monster__name')
-                monster_stable['10-1'] = monster_filter.qs.filter(level__lte=10).order_by('-level', '-stars', 'monster__element', 'monster__name')
-            elif box_grouping == 'element' or box_grouping == 'attribute':
-                monster_stable['water'] = monster_filter.qs.filter(monster__element=Monster.ELEMENT_WATER).order_by('-stars', '-level', 'monster__name')
-                monster_stable['fire'] = monster_filter.qs.filter(monster__element=Monster.ELEMENT_FIRE).order_by('-stars', '-level', 'monster__name')
-                monster_stable['wind'] = monster_filter.qs.filter(monster__element=Monster.ELEMENT_WIND).order_by('-stars', '-level', 'monster__name')
-                monster_stable['light'] = monster_filter.qs.filter(monster__element=Monster.ELEMENT_LIGHT).order_by('-stars', '-level', 'monster__name')
-                monster_stable['dark'] = monster_filter.qs.filter(monster__element=Monster.ELEMENT_DARK).order_by('-stars', '-level', 'monster__name')
-            elif box_grouping == 'archetype':
-                monster_stable['attack'] = monster_filter.qs.filter(monster__archetype=Monster.ARCHETYPE_ATTACK).order_by('-stars', '-level', 'monster__name')
-                monster_stable['hp'] = monster_filter.qs.filter(monster__archetype=Monster.ARCHETYPE_HP).order_by('-stars', '-level', 'monster__name')
-                monster_stable['support'] = monster_filter.qs.filter(monster__archetype=Monster.ARCHETYPE_SUPPORT).order_by('-stars', '-level', 'monster__name')
-                monster_stable['defense'] = monster_filter.qs.filter(monster__archetype=Monster.ARCHETYPE_DEFENSE).order_by('-stars', '-level', 'monster__name')
-                monster_stable['material'] = monster_filter.qs.filter(monster__archetype=Monster.ARCHETYPE_MATERIAL).order_by('-stars', '-level', 'monster__name')
-                monster_stable['other'] = monster_filter.qs.filter(monster__archetype=Monster.ARCHETYPE_NONE).order_by('-stars', '-level', 'monster__name')
-            elif box_grouping == 'priority':
-                monster_stable['High'] = monster_filter.qs.select_related('monster').filter(owner=summoner, priority=MonsterInstance.PRIORITY_HIGH).order_by('-level', 'monster__element', 'monster__name')
-                monster_stable['Medium'] = monster_filter.qs.select_related('monster').filter(owner=summoner, priority=MonsterInstance.PRIORITY_MED).order_by('-level', 'monster__element', 'monster__name')
-                monster_stable['Low'] = monster_filter.qs.select_related('monster').filter(owner=summoner, priority=MonsterInstance.PRIORITY_LOW).order_by('-level', 'monster__element', 'monster__name')
-                monster_stable['None'] = monster_filter.qs.select_related('monster').filter(owner=summoner).filter(Q(priority=None) | Q(priority=0)).order_by('-level', 'monster__element', 'monster__name')
-            elif box_grouping == 'family':
-                for mon in monster_filter.qs:
-                    family_name = mon.monster.base_monster.name
-
-                    if family_name not in monster_stable:
-                        monster_stable[family_name] = []
-
-                    monster_stable[family_name].append(mon)
-
-                # Sort ordered dict alphabetically by family name
-                monster_stable = OrderedDict(sorted(monster_stable.items(), key=lambda family:family[0]))
-            else:
+            grouping = MONSTER_BOX_GROUPINGS.get(BOX_GROUPING_ALIASES.get(box_grouping, box_grouping))
+            if grouping is None:
                 return HttpResponseBadRequest('Invalid sort method')
 
+            # Fetch the filtered monsters once in box order and partition them in memory
+            order_by, key, groups = grouping
+            filtered_monsters = list(
+                monster_filter.qs.select_related('monster__awakens_from__awakens_from').order_by(*order_by)
+            )
+            context['monsters'] = filtered_monsters
+            context['filtered_count'] = len(filtered_monsters)
+            context['total_count'] = total_monsters if total_monsters is not None else context['filtered_count']
+
+            boxes = group_instances(filtered_monsters, key=key, groups=groups, name=key, items_key='monsters')
+            if groups is None:
+                # Families are sorted alphabetically
+                boxes.sort(key=lambda box: box['name'])
+
+            monster_stable = OrderedDict((box['name'], box['monsters']) for box in boxes)
             context['monster_stable'] = monster_stable
             context['box_grouping'] = box_grouping.replace('_', ' ')
             template = 'herders/profile/monster_inventory/box.html'
 
-        return render(request, template, context)
+        response = render(request, template, context)
+        if cache_key:
+            cache.set(cache_key, response.content, INVENTORY_CACHE_TIMEOUT)
+        return response
     else:
         return render(request, 'herders/profile/not_public.html', context)
 
@@ -12,7 +12,7 @@ from django.contrib.auth.models import User, Group
 from django.core.mail import mail_admins
 from django.db import IntegrityError
 from django.db.models import FieldDoesNotExist
-from django.http import HttpResponse, JsonResponse, Http404, HttpResponseBadRequest, HttpResponseForbidden
+from django.http import HttpResponse, StreamingHttpResponse, JsonResponse, Http404, HttpResponseBadRequest, HttpResponseForbidden
 from django.shortcuts import get_object_or_404, render, redirect, reverse
 from django.template import loader
 from django.template.context_processors import csrf
@@ -23,7 +23,7 @@ from herders.forms import RegisterUserForm, CrispyChangeUsernameForm, DeleteProf
     EditSummonerForm, EditBuildingForm, ImportSWParserJSONForm
 from herders.models import Summoner, Storage, Building, BuildingInstance
 from herders.profile_parser import validate_sw_json
-from herders.rune_optimizer_parser import export_win10
+from herders.rune_optimizer_parser import export_win10_stream
 from herders.tasks import com2us_data_import
 
 
@@ -618,9 +618,7 @@ def import_status(request, profile_name):
 def export_win10_optimizer(request, profile_name):
     summoner = get_object_or_404(Summoner, user=request.user)
 
-    export_data = export_win10(summoner)
-
-    response = HttpResponse(export_data)
+    response = StreamingHttpResponse(export_win10_stream(summoner), content_type='application/json')
     response['Content-Disposition'] = f'attachment; filename={request.user.username}_swarfarm_win10_optimizer_export.json'
 
     return response
@@ -2,6 +2,7 @@ from collections import OrderedDict
 
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
+from django.core.cache import cache
 from django.http import HttpResponseForbidden, JsonResponse, HttpResponse, HttpResponseBadRequest
 from django.shortcuts import render, get_object_or_404
 from django.template import loader
@@ -9,6 +10,7 @@ from django.template.context_processors import csrf
 from django.urls import reverse
 
 from herders.decorators import username_case_redirect
+from herders.views.base import INVENTORY_CACHE_TIMEOUT, get_inventory_cache_key, group_instances, group_by_assigned_monster
 from herders.filters import RuneInstanceFilter
 from herders.forms import FilterRuneForm, \
     AddRuneInstanceForm, AssignRuneForm, AddRuneCraftInstanceForm
@@ -66,103 +68,62 @@ def rune_inventory(request, profile_name, view_mode=None, box_grouping=None):
         return HttpResponseBadRequest()
 
     is_owner = (request.user.is_authenticated and summoner.user == request.user)
+
+    if is_owner or summoner.public:
+        cache_key = get_inventory_cache_key(request, summoner, 'runes', view_mode, box_grouping)
+        cached_content = cache.get(cache_key)
+        if cached_content is not None:
+            return HttpResponse(cached_content)
+
     rune_queryset = RuneInstance.objects.filter(owner=summoner).select_related('assigned_to', 'assigned_to__monster')
-    total_count = rune_queryset.count()
     form = FilterRuneForm(request.POST or None)
 
     if form.is_valid():
         rune_filter = RuneInstanceFilter(form.cleaned_data, queryset=rune_queryset)
+        total_count = rune_queryset.count()
     else:
         rune_filter = RuneInstanceFilter(None, queryset=rune_queryset)
-
-    filtered_count = rune_filter.qs.count()
+        total_count = None
 
     context = {
-        'runes': rune_filter.qs,
-        'total_count': total_count,
-        'filtered_count': filtered_count,
         'profile_name': profile_name,
         'summoner': summoner,
         'is_owner': is_owner,
     }
 
     if is_owner or summoner.public:
+        # Fetch the filtered runes once and group them in memory
+        filtered_runes = list(rune_filter.qs)
+        context['runes'] = filtered_runes
+        context['filtered_count'] = len(filtered_runes)
+        context['total_count'] = total_count if total_count is not None else len(filtered_runes)
+
         if view_mode == 'box':
-            rune_box = []
             if box_grouping == 'slot':
-                rune_box.append({
-                    'name': 'Slot 1',
-                    'runes': rune_filter.qs.filter(slot=1)
-                })
-                rune_box.append({
-                    'name': 'Slot 2',
-                    'runes': rune_filter.qs.filter(slot=2)
-                })
-                rune_box.append({
-                    'name': 'Slot 3',
-                    'runes': rune_filter.qs.filter(slot=3)
-                })
-                rune_box.append({
-                    'name': 'Slot 4',
-                    'runes': rune_filter.qs.filter(slot=4)
-                })
-                rune_box.append({
-                    'name': 'Slot 5',
-                    'runes': rune_filter.qs.filter(slot=5)
-                })
-                rune_box.append({
-                    'name': 'Slot 6',
-                    'runes': rune_filter.qs.filter(slot=6)
-                })
+                rune_box = group_instances(
+                    filtered_runes,
+                    key=lambda rune: rune.slot,
+                    groups=[(slot, f'Slot {slot}') for slot in range(1, 7)],
+                    items_key='runes',
+                )
             elif box_grouping == 'grade':
-                rune_box.append({
-                    'name': '6*',
-                    'runes': rune_filter.qs.filter(stars=6)
-                })
-                rune_box.append({
-                    'name': '5*',
-                    'runes': rune_filter.qs.filter(stars=5)
-                })
-                rune_box.append({
-                    'name': '4*',
-                    'runes': rune_filter.qs.filter(stars=4)
-                })
-                rune_box.append({
-                    'name': '3*',
-                    'runes': rune_filter.qs.filter(stars=3)
-                })
-                rune_box.append({
-                    'name': '2*',
-                    'runes': rune_filter.qs.filter(stars=2)
-                })
-                rune_box.append({
-                    'name': '1*',
-                    'runes': rune_filter.qs.filter(stars=1)
-                })
+                rune_box = group_instances(
+                    filtered_runes,
+                    key=lambda rune: rune.stars,
+                    groups=[(stars, f'{stars}*') for stars in reversed(range(1, 7))],
+                    items_key='runes',
+                )
             elif box_grouping == 'equipped':
-                rune_box.append({
-                    'name': 'Not Equipped',
-                    'runes': rune_filter.qs.filter(assigned_to__isnull=True)
-                })
-
-                # Create a dictionary of monster PKs and their equipped runes
-                monsters = OrderedDict()
-                for rune in rune_filter.qs.filter(assigned_to__isnull=False).select_related('assigned_to', 'assigned_to__monster').order_by('assigned_to__monster__name', 'slot'):
-                    if rune.assigned_to.pk not in monsters:
-                        monsters[rune.assigned_to.pk] = {
-                            'name': str(rune.assigned_to),
-                            'runes': []
-                        }
-
-                    monsters[rune.assigned_to.pk]['runes'].append(rune)
-                for monster_runes in monsters.values():
-                    rune_box.append(monster_runes)
+                rune_box = group_by_assigned_monster(filtered_runes, items_key='runes')
             elif box_grouping == 'type':
-                for (type, type_name) in RuneInstance.TYPE_CHOICES:
-                    rune_box.append({
-                        'name': type_name,
-                        'runes': rune_filter.qs.filter(type=type)
-                    })
+                rune_box = group_instances(
+                    filtered_runes,
+                    key=lambda rune: rune.type,
+                    groups=RuneInstance.TYPE_CHOICES,
+                    items_key='runes',
+                )
+            else:
+                rune_box = []
 
             context['runes'] = rune_box
             context['box_grouping'] = box_grouping
@@ -172,7 +133,9 @@ def rune_inventory(request, profile_name, view_mode=None, box_grouping=None):
         else:
             template = 'herders/profile/runes/inventory_table.html'
 
-        return render(request, template, context)
+        response = render(request, template, context)
+        cache.set(cache_key, response.content, INVENTORY_CACHE_TIMEOUT)
+        return response
     else:
         return render(request, 'herders/profile/not_public.html', context)
 